@@ -0,0 +1,152 @@
+# Copyright: (c) 2023 Fortinet
+# GNU General Public License v3.0+ (see LICENSE or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+# Every FortiFlex module only talks to the FortiFlex REST API, so there is no need to ship
+# an AnsiballZ payload to the target and start a new interpreter there for each task.
+# meta/runtime.yml routes the action of every module to this plugin. When the environment variable
+# FORTIFLEX_CONTROLLER_EXECUTION is true, it imports the module and runs its main() inside the
+# controller worker process. Otherwise, and on ansible-core versions outside CONTROLLER_EXECUTION_VERSIONS,
+# the module runs as usual.
+
+import io
+import os
+import json
+import sys
+import traceback
+import importlib
+from contextlib import contextmanager
+
+from ansible.module_utils import basic
+from ansible.module_utils.common.text.converters import to_bytes, to_native, to_text
+from ansible.module_utils.compat.version import LooseVersion
+from ansible.module_utils.parsing.convert_bool import boolean
+from ansible.plugins.action import ActionBase
+from ansible.release import __version__ as ansible_version
+from ansible.utils.display import Display
+
+display = Display()
+
+MODULES_PACKAGE = "ansible_collections.fortinet.fortiflexvm.plugins.modules"
+# ansible-core versions on which running the modules in the controller process was tested, [min, max).
+# 2.19 changed how module results are serialized, which the in-process execution doesn't follow.
+CONTROLLER_EXECUTION_VERSIONS = ("2.15", "2.19")
+
+
+@contextmanager
+def module_arguments(args):
+    # AnsibleModule reads its arguments from basic._ANSIBLE_ARGS before falling back to stdin.
+    saved_args = basic._ANSIBLE_ARGS
+    basic._ANSIBLE_ARGS = to_bytes(json.dumps({"ANSIBLE_MODULE_ARGS": args}))
+    try:
+        yield
+    finally:
+        basic._ANSIBLE_ARGS = saved_args
+
+
+@contextmanager
+def task_environment(environment):
+    # The environment keyword of the task, as a normal module execution would see it.
+    saved = dict((name, os.environ.get(name)) for name in environment)
+    os.environ.update((name, to_native(value)) for name, value in environment.items())
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+
+@contextmanager
+def captured_stdout():
+    # exit_json() and fail_json() print the result to stdout.
+    saved_stdout = sys.stdout
+    sys.stdout = io.StringIO()
+    try:
+        yield sys.stdout
+    finally:
+        sys.stdout = saved_stdout
+
+
+def parse_module_output(output):
+    for line in reversed(output.strip().splitlines()):
+        line = line.strip()
+        if line.startswith("{"):
+            try:
+                return json.loads(line)
+            except ValueError:
+                break
+    return {"failed": True, "msg": "The module did not return a valid result.", "module_stdout": output}
+
+
+class ActionModule(ActionBase):
+
+    _supports_check_mode = True
+    _supports_async = True
+
+    def run(self, tmp=None, task_vars=None):
+        result = super(ActionModule, self).run(tmp, task_vars)
+        del tmp
+
+        if not self._run_on_controller():
+            # Same as ansible.builtin.normal
+            wrap_async = self._task.async_val and not self._connection.has_native_async
+            result.update(self._execute_module(module_name=self._task.action, module_args=self._task.args,
+                                               task_vars=task_vars, wrap_async=wrap_async))
+            if not wrap_async:
+                self._remove_tmp_path(self._connection._shell.tmpdir)
+            return result
+
+        module_name = self._task.action.split(".")[-1]
+        try:
+            module = importlib.import_module("{0}.{1}".format(MODULES_PACKAGE, module_name))
+        except ImportError as e:
+            result.update(failed=True, msg="Failed to load module {0}: {1}".format(module_name, to_text(e)))
+            return result
+
+        result.update(self._run_module(module, module_name, task_vars))
+        return result
+
+    def _run_on_controller(self):
+        if not boolean(os.environ.get("FORTIFLEX_CONTROLLER_EXECUTION", False), strict=False):
+            return False
+        min_version, max_version = CONTROLLER_EXECUTION_VERSIONS
+        if not LooseVersion(min_version) <= LooseVersion(ansible_version) < LooseVersion(max_version):
+            display.warning("FORTIFLEX_CONTROLLER_EXECUTION is not supported on ansible-core {0}, "
+                            "the module runs as usual.".format(ansible_version))
+            return False
+        # Async tasks run as usual, wrapped by the async wrapper on the target.
+        if self._task.async_val:
+            return False
+        # Tasks using the fortiflexvm httpapi plugin need the persistent connection that
+        # only the normal module execution sets up.
+        return not self._play_context.connection.endswith("httpapi")
+
+    def _run_module(self, module, module_name, task_vars):
+        # Same internal arguments (_ansible_check_mode, _ansible_no_log, ...) as a normal module execution.
+        args = dict(self._task.args)
+        self._update_module_args(module_name, args, task_vars)
+
+        environment = {}
+        self._compute_environment_string(environment)
+
+        with module_arguments(args), task_environment(environment):
+            with captured_stdout() as output:
+                try:
+                    module.main()
+                except SystemExit:
+                    pass
+                except Exception as e:
+                    return {"failed": True, "msg": "Module {0} raised an exception: {1}".format(module_name, to_text(e)),
+                            "exception": traceback.format_exc()}
+        return parse_module_output(output.getvalue())
@@ -0,0 +1,94 @@
+# Copyright: (c) 2023 Fortinet
+# GNU General Public License v3.0+ (see LICENSE or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+DOCUMENTATION = """
+---
+name: fortiflexvm
+short_description: HttpApi Plugin for FortiFlex.
+description:
+    - This HttpApi plugin keeps one authenticated FortiFlex session in the persistent connection process.
+    - The token and the keep-alive connection pool are shared by all FortiFlex tasks that run against the same host in a play,
+      so the modules don't log in again in every task.
+    - Use it with C(ansible_connection=ansible.netcommon.httpapi) and C(ansible_network_os=fortinet.fortiflexvm.fortiflexvm).
+    - The username and password are read from C(ansible_user) and C(ansible_httpapi_pass). If not declared, the environment
+      variables FORTIFLEX_ACCESS_USERNAME and FORTIFLEX_ACCESS_PASSWORD are used. The username and password options of the
+      modules are ignored in this mode.
+    - Retries and the token cache are configured through the FORTIFLEX_* environment variables of the controller.
+      The connect_timeout, read_timeout and task_timeout options of the modules apply to the requests of their task.
+version_added: "2.4.0"
+author:
+    - Xinwei Du (@dux-fortinet)
+"""
+
+import json
+import time
+from contextlib import contextmanager
+from ansible.module_utils.common.text.converters import to_text
+from ansible.module_utils.connection import ConnectionError
+from ansible.plugins.httpapi import HttpApiBase
+from ansible_collections.fortinet.fortiflexvm.plugins.module_utils.connection import Connection
+
+
+class PersistentModule():
+    # Stands in for AnsibleModule inside the persistent connection process.
+    # Errors are raised back to the module, which reports them with fail_json.
+    def __init__(self):
+        self.params = {}
+
+    def fail_json(self, msg, **kwargs):
+        # Only the text of the error crosses the JSON-RPC socket, so the details (response, status, ...)
+        # are sent as JSON and passed on to fail_json() by the module.
+        kwargs["msg"] = msg
+        raise ConnectionError(json.dumps(kwargs, default=to_text))
+
+
+class HttpApi(HttpApiBase):
+    def __init__(self, connection):
+        super(HttpApi, self).__init__(connection)
+        self.fortiflex = None
+
+    def login(self, username, password, timeouts=None):
+        # The process lives for the whole play, so the deadline of the task that logs in only covers the login.
+        # Every request carries the timeouts of the task that sends it.
+        timeouts = timeouts or {}
+        self.fortiflex = Connection(PersistentModule(), username or "", password or "",
+                                    connect_timeout=timeouts.get("connect_timeout"), read_timeout=timeouts.get("read_timeout"),
+                                    task_timeout=timeouts.get("remaining_time") or 0)
+        self.fortiflex.deadline = None
+
+    def logout(self):
+        if self.fortiflex is not None:
+            self.fortiflex.close()
+            self.fortiflex = None
+
+    def send_request(self, url, data, method="post", idempotent=None, timeouts=None):
+        # Called by the modules over JSON-RPC. The status check stays on the module side.
+        timeouts = timeouts or {}
+        if self.fortiflex is None:
+            self.login(self.connection.get_option("remote_user"), self.connection.get_option("password"), timeouts)
+        with self._task_timeouts(timeouts):
+            response = self.fortiflex.request(url, data, method=method, idempotent=idempotent)
+            return response.status_code, self.fortiflex.response_json(response)
+
+    @contextmanager
+    def _task_timeouts(self, timeouts):
+        # Apply connect_timeout, read_timeout and the time left to the task (remaining_time) for one request.
+        saved = (self.fortiflex.connect_timeout, self.fortiflex.read_timeout, self.fortiflex.deadline)
+        for name in ["connect_timeout", "read_timeout"]:
+            if timeouts.get(name) is not None:
+                setattr(self.fortiflex, name, timeouts[name])
+        if timeouts.get("remaining_time") is not None:
+            self.fortiflex.deadline = time.time() + timeouts["remaining_time"]
+        try:
+            yield
+        finally:
+            self.fortiflex.connect_timeout, self.fortiflex.read_timeout, self.fortiflex.deadline = saved
@@ -0,0 +1,286 @@
+# Copyright: (c) 2023 Fortinet
+# GNU General Public License v3.0+ (see LICENSE or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+DOCUMENTATION = """
+---
+name: fortiflexvm
+short_description: FortiFlex entitlements inventory source.
+description:
+    - Builds an inventory with one host per FortiFlex entitlement.
+    - The programs and their configurations are listed first, then the entitlements of the configurations
+      are fetched concurrently on a shared connection pool.
+    - The hosts are added to the groups fortiflex_config_<configId>, fortiflex_product_<productType>,
+      fortiflex_status_<status> and fortiflex_token_<tokenStatus>. Entitlements that have a folderPath are
+      also added to fortiflex_folder_<folderPath>.
+    - Every host gets the variables fortiflex_entitlement, fortiflex_config and fortiflex_product_type.
+    - With the inventory cache enabled, repeated runs read the entitlements from the cache until it expires
+      instead of calling the API.
+    - The inventory file name must end with fortiflexvm.yml or fortiflexvm.yaml.
+version_added: "2.4.0"
+author:
+    - Xinwei Du (@dux-fortinet)
+extends_documentation_fragment:
+    - constructed
+    - inventory_cache
+options:
+    plugin:
+        description: The name of this plugin.
+        type: str
+        required: true
+        choices: ["fortinet.fortiflexvm.fortiflexvm"]
+    username:
+        description:
+            - The username to authenticate.
+        type: str
+        env:
+            - name: FORTIFLEX_ACCESS_USERNAME
+    password:
+        description:
+            - The password to authenticate.
+        type: str
+        env:
+            - name: FORTIFLEX_ACCESS_PASSWORD
+    connect_timeout:
+        description:
+            - Seconds to wait for a connection to FortiFlex to be established.
+        type: float
+        env:
+            - name: FORTIFLEX_CONNECT_TIMEOUT
+    read_timeout:
+        description:
+            - Seconds to wait for FortiFlex to send a response.
+        type: float
+        env:
+            - name: FORTIFLEX_READ_TIMEOUT
+    task_timeout:
+        description:
+            - Overall time limit of the inventory update in seconds.
+        type: float
+        env:
+            - name: FORTIFLEX_TASK_TIMEOUT
+    programSerialNumbers:
+        description:
+            - Only include the entitlements of these programs. Every program of the account is included if not declared.
+        type: list
+        elements: str
+    configIds:
+        description:
+            - Only include the entitlements of these configurations.
+        type: list
+        elements: int
+    status:
+        description:
+            - Only include the entitlements with one of these status, for example C(ACTIVE).
+        type: list
+        elements: str
+    hostname:
+        description:
+            - The field of the entitlement used as inventory hostname.
+            - With description, the entitlements whose description is empty or not unique are named by serialNumber,
+              with a warning for the latter.
+        type: str
+        choices: ["serialNumber", "description"]
+        default: serialNumber
+    include_tokens:
+        description:
+            - Keep the token of the entitlements in fortiflex_entitlement.
+            - The tokens are also written to the inventory cache when it is enabled.
+        type: bool
+        default: false
+    workers:
+        description:
+            - The maximum number of requests sent at the same time.
+        type: int
+        default: 4
+"""
+
+EXAMPLES = """
+# fortiflexvm.yml
+plugin: fortinet.fortiflexvm.fortiflexvm
+programSerialNumbers: ["ELAVMS000000XXXX"]
+status: ["ACTIVE"]
+hostname: description
+cache: true
+cache_plugin: ansible.builtin.jsonfile
+cache_connection: ~/.ansible/fortiflex/inventory
+cache_timeout: 3600
+compose:
+  ansible_host: fortiflex_entitlement.description
+keyed_groups:
+  - key: fortiflex_config.name
+    prefix: config_name
+"""
+
+from ansible.errors import AnsibleError
+from ansible.plugins.inventory import BaseInventoryPlugin, Constructable, Cacheable
+from ansible_collections.fortinet.fortiflexvm.plugins.module_utils import utils
+from ansible_collections.fortinet.fortiflexvm.plugins.module_utils.connection import Connection
+from ansible_collections.fortinet.fortiflexvm.plugins.module_utils.mirror import config_product_type
+
+
+def list_configs(module, connection):
+    program = module.params["program"]
+    data = {"programSerialNumber": program["serialNumber"]}
+    if program.get("accountId"):
+        data["accountId"] = program["accountId"]
+    configs = []
+    for config in connection.iter_response_items("fortiflex/v2/configs/list", data, "configs", method="POST"):
+        config = utils.transform_config_output(config)
+        config.setdefault("programSerialNumber", program["serialNumber"])
+        configs.append(config)
+    module.exit_json(configs=configs)
+
+
+def list_entitlements(module, connection):
+    data = {"configId": module.params["configId"]}
+    status = module.params["status"]
+    # The API filters by one status, several are filtered here
+    if status and len(status) == 1:
+        data["status"] = status[0]
+    entitlements = []
+    for entitlement in connection.iter_response_items("fortiflex/v2/entitlements/list", data, "entitlements", method="POST"):
+        if status and entitlement.get("status") not in status:
+            continue
+        if not module.params["include_tokens"]:
+            entitlement.pop("token", None)
+        entitlements.append(entitlement)
+    module.exit_json(entitlements=entitlements)
+
+
+def item_error(name, result):
+    msg = "{0}: {1}".format(name, result["msg"])
+    response = result.get("response")
+    if response:
+        msg = "{0}: {1}".format(msg, response.get("message") or response)
+    return utils.PluginModuleError(msg)
+
+
+class InventoryModule(BaseInventoryPlugin, Constructable, Cacheable):
+
+    NAME = "fortinet.fortiflexvm.fortiflexvm"
+
+    def verify_file(self, path):
+        if super(InventoryModule, self).verify_file(path):
+            return path.endswith(("fortiflexvm.yml", "fortiflexvm.yaml"))
+        return False
+
+    def parse(self, inventory, loader, path, cache=True):
+        super(InventoryModule, self).parse(inventory, loader, path, cache)
+        self._read_config_data(path)
+
+        # Read the cache when allowed, refresh it when it is missing, expired or a refresh was requested
+        cache_key = self.get_cache_key(path)
+        use_cache = self.get_option("cache") and cache
+        update_cache = self.get_option("cache") and not cache
+        data = None
+        if use_cache:
+            try:
+                data = self._cache[cache_key]
+            except KeyError:
+                update_cache = True
+        if data is None:
+            data = self._fetch()
+        if update_cache:
+            self._cache[cache_key] = data
+        self._populate(data)
+
+    def _fetch(self):
+        workers = self.get_option("workers")
+        if workers < 1:
+            raise AnsibleError("workers should be at least 1.")
+        params = dict((name, self.get_option(name)) for name in ["connect_timeout", "read_timeout", "task_timeout"])
+        module = utils.PluginModule(params, warn=self.display.warning)
+        try:
+            connection = Connection(module, self.get_option("username"), self.get_option("password"), pool_size=workers)
+            try:
+                return self._fetch_entitlements(module, connection, workers)
+            finally:
+                connection.close()
+        except utils.PluginModuleError as e:
+            raise AnsibleError("Failed to fetch the FortiFlex inventory: {0}".format(e))
+
+    def _fetch_entitlements(self, module, connection, workers):
+        programs = connection.send_request("fortiflex/v2/programs/list", {}, method="POST")["programs"]
+        selected = self.get_option("programSerialNumbers")
+        if selected:
+            programs = [program for program in programs if program["serialNumber"] in selected]
+        results = utils.run_items(module, connection, list_configs, [{"program": program} for program in programs], workers)
+        configs = []
+        for program, result in zip(programs, results):
+            if result["failed"]:
+                raise item_error("program {0}".format(program["serialNumber"]), result)
+            configs.extend(result["configs"])
+        if self.get_option("configIds"):
+            configs = [config for config in configs if config["id"] in self.get_option("configIds")]
+
+        results = utils.run_items(module, connection, list_entitlements, [
+            {"configId": config["id"], "status": self.get_option("status"), "include_tokens": self.get_option("include_tokens")}
+            for config in configs], workers)
+        entitlements = []
+        for config, result in zip(configs, results):
+            if result["failed"]:
+                raise item_error("config {0}".format(config["id"]), result)
+            entitlements.extend(result["entitlements"])
+        return {"configs": configs, "entitlements": entitlements}
+
+    def _hostnames(self, entitlements):
+        # serialNumber -> inventory hostname. A description that is empty, shared by several entitlements or equal to
+        # a serial number falls back to the serial number, so that no entitlement is merged into another host.
+        serial_numbers = set(entitlement["serialNumber"] for entitlement in entitlements)
+        hostnames = dict((serial_number, serial_number) for serial_number in serial_numbers)
+        if self.get_option("hostname") != "description":
+            return hostnames
+        counts = {}
+        for entitlement in entitlements:
+            if entitlement.get("description"):
+                counts[entitlement["description"]] = counts.get(entitlement["description"], 0) + 1
+        duplicates = set()
+        for entitlement in entitlements:
+            description = entitlement.get("description")
+            if not description:
+                continue
+            if counts[description] > 1 or description in serial_numbers:
+                duplicates.add(description)
+                continue
+            hostnames[entitlement["serialNumber"]] = description
+        if duplicates:
+            self.display.warning("The entitlements with the description {0} are named by serialNumber, since the description "
+                                 "is not unique.".format(", ".join(sorted(duplicates))))
+        return hostnames
+
+    def _populate(self, data):
+        configs = dict((config["id"], config) for config in data["configs"])
+        strict = self.get_option("strict")
+        hostnames = self._hostnames(data["entitlements"])
+        for entitlement in data["entitlements"]:
+            hostname = hostnames[entitlement["serialNumber"]]
+            config = configs.get(entitlement.get("configId"), {})
+            product_type = config_product_type(config)
+            self.inventory.add_host(hostname)
+            self.inventory.set_variable(hostname, "fortiflex_entitlement", entitlement)
+            self.inventory.set_variable(hostname, "fortiflex_config", config)
+            self.inventory.set_variable(hostname, "fortiflex_product_type", product_type)
+
+            groups = ["config_{0}".format(entitlement.get("configId")), "status_{0}".format(entitlement.get("status")),
+                      "token_{0}".format(entitlement.get("tokenStatus"))]
+            if product_type:
+                groups.append("product_{0}".format(product_type))
+            if entitlement.get("folderPath"):
+                groups.append("folder_{0}".format(entitlement["folderPath"]))
+            for group in groups:
+                group = self.inventory.add_group(self._sanitize_group_name("fortiflex_" + group))
+                self.inventory.add_child(group, hostname)
+
+            hostvars = self.inventory.get_host(hostname).get_vars()
+            self._set_composite_vars(self.get_option("compose"), hostvars, hostname, strict=strict)
+            self._add_host_to_composed_groups(self.get_option("groups"), hostvars, hostname, strict=strict)
+            self._add_host_to_keyed_groups(self.get_option("keyed_groups"), hostvars, hostname, strict=strict)
@@ -0,0 +1,270 @@
+# Copyright: (c) 2023 Fortinet
+# GNU General Public License v3.0+ (see LICENSE or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+DOCUMENTATION = """
+---
+name: entitlement
+short_description: Look up FortiFlex entitlements, tokens and configurations by serial number.
+description:
+    - Returns the entitlement, its token or its configuration for every serial number.
+    - The first lookup lists the entitlements and configurations of every program, with one entitlements/list and one
+      configs/list call per program sent concurrently. The result is kept in memory and in a file cache shared by the
+      processes of the run, so the other lookups of the run don't call the API.
+    - The listing is only sent again when it is older than cache_ttl. A serial number missing from a listing is
+      reported as missing until the listing expires.
+    - The tokens are only kept in the listing when a lookup asks for C(token).
+version_added: "2.4.0"
+author:
+    - Xinwei Du (@dux-fortinet)
+options:
+    _terms:
+        description: The serial numbers of the entitlements.
+        required: true
+        type: list
+        elements: str
+    field:
+        description:
+            - What to return for every serial number. C(entitlement) returns the entitlement as returned by
+              M(fortinet.fortiflexvm.fortiflexvm_entitlements_list_info) without its token, C(token) its token, and C(config)
+              its configuration as returned by M(fortinet.fortiflexvm.fortiflexvm_configs_list_info).
+        type: str
+        choices: ["entitlement", "token", "config"]
+        default: entitlement
+    errors:
+        description:
+            - What to do with serial numbers that don't exist. With warn and ignore, None is returned for them.
+        type: str
+        choices: ["strict", "warn", "ignore"]
+        default: strict
+    programSerialNumbers:
+        description:
+            - Only list the entitlements of these programs. Every program of the account is listed if not declared.
+        type: list
+        elements: str
+    username:
+        description:
+            - The username to authenticate.
+        type: str
+        env:
+            - name: FORTIFLEX_ACCESS_USERNAME
+    password:
+        description:
+            - The password to authenticate.
+        type: str
+        env:
+            - name: FORTIFLEX_ACCESS_PASSWORD
+    connect_timeout:
+        description:
+            - Seconds to wait for a connection to FortiFlex to be established.
+        type: float
+        env:
+            - name: FORTIFLEX_CONNECT_TIMEOUT
+    read_timeout:
+        description:
+            - Seconds to wait for FortiFlex to send a response.
+        type: float
+        env:
+            - name: FORTIFLEX_READ_TIMEOUT
+    cache_ttl:
+        description:
+            - Seconds a listing is reused. 0 disables the file cache, the listing is then only reused by the lookups
+              of the same process.
+        type: float
+        default: 300
+        env:
+            - name: FORTIFLEX_LOOKUP_CACHE_TTL
+    cache_path:
+        description:
+            - The file cache. It is written with mode 0600, its entries are keyed by an HMAC of the credential with
+              a random secret kept in the file cache_path.key.
+            - It only contains the tokens of the entitlements after a lookup with C(field=token). Such a lookup lists
+              the programs again when the cached listing has no tokens.
+        type: path
+        default: ~/.ansible/fortiflex/lookup_cache.json
+        env:
+            - name: FORTIFLEX_LOOKUP_CACHE_PATH
+    workers:
+        description:
+            - The maximum number of requests sent at the same time.
+        type: int
+        default: 4
+"""
+
+EXAMPLES = """
+- name: Render the bootstrap configuration of every VM
+  ansible.builtin.template:
+    src: bootstrap.conf.j2
+    dest: "/tmp/{{ inventory_hostname }}.conf"
+  vars:
+    fortiflex_token: "{{ lookup('fortinet.fortiflexvm.entitlement', serial_number, field='token') }}"
+
+- name: Display the configuration of two entitlements
+  ansible.builtin.debug:
+    msg: "{{ query('fortinet.fortiflexvm.entitlement', 'FGVMMLTM00000001', 'FGVMMLTM00000002', field='config') }}"
+"""
+
+RETURN = """
+_raw:
+    description: The entitlement, token or configuration of every serial number, None for missing serial numbers.
+    type: list
+"""
+
+import time
+import hashlib
+import threading
+from ansible.errors import AnsibleError
+from ansible.plugins.lookup import LookupBase
+from ansible.utils.display import Display
+from ansible_collections.fortinet.fortiflexvm.plugins.module_utils import utils
+from ansible_collections.fortinet.fortiflexvm.plugins.module_utils.connection import Connection
+from ansible_collections.fortinet.fortiflexvm.plugins.module_utils.token_cache import FileCache
+
+display = Display()
+
+# Listings fetched or read by this process, keyed like the file cache
+_listings = {}
+_listings_lock = threading.Lock()
+
+
+def without_tokens(listing):
+    entitlements = {}
+    for serial_number, entitlement in listing["entitlements"].items():
+        entitlement = dict(entitlement)
+        entitlement.pop("token", None)
+        entitlements[serial_number] = entitlement
+    return dict(listing, entitlements=entitlements, tokens=False)
+
+
+def list_program(module, connection):
+    program = module.params["program"]
+    data = {"programSerialNumber": program["serialNumber"]}
+    if program.get("accountId"):
+        data["accountId"] = program["accountId"]
+    if module.params["records"] == "configs":
+        records = [utils.transform_config_output(config) for config in
+                   connection.iter_response_items("fortiflex/v2/configs/list", data, "configs", method="POST")]
+    else:
+        # entitlements/list needs accountId to list a whole program
+        if not data.get("accountId"):
+            module.fail_json(msg="FortiFlex didn't return the accountId of the program, can't list its entitlements.")
+        records = list(connection.iter_response_items("fortiflex/v2/entitlements/list", data, "entitlements", method="POST"))
+    module.exit_json(records=records)
+
+
+class LookupModule(LookupBase):
+
+    def run(self, terms, variables=None, **kwargs):
+        self.set_options(var_options=variables, direct=kwargs)
+        serial_numbers = [str(term) for term in terms]
+        listing = self._listing(self.get_option("field") == "token")
+
+        field = self.get_option("field")
+        ret = []
+        for serial_number in serial_numbers:
+            entitlement = listing["entitlements"].get(serial_number)
+            if entitlement is None:
+                msg = "The FortiFlex entitlement {0} doesn't exist.".format(serial_number)
+                if self.get_option("errors") == "strict":
+                    raise AnsibleError(msg)
+                if self.get_option("errors") == "warn":
+                    display.warning(msg)
+                ret.append(None)
+            elif field == "token":
+                ret.append(entitlement.get("token"))
+            elif field == "config":
+                ret.append(listing["configs"].get(str(entitlement.get("configId"))))
+            else:
+                entitlement = dict(entitlement)
+                entitlement.pop("token", None)
+                ret.append(entitlement)
+        return ret
+
+    def _listing(self, tokens):
+        # The listing of this process, else the file cache, else a new listing. A listing is complete, so it is reused
+        # until it expires even for serial numbers missing from it. Only a lookup of tokens keeps them in the listing.
+        ttl = self.get_option("cache_ttl")
+        cache = FileCache(self.get_option("cache_path")) if ttl > 0 else None
+
+        def usable(listing):
+            if not listing or (ttl > 0 and time.time() - listing["time"] >= ttl):
+                return False
+            return listing.get("tokens") or not tokens
+
+        with _listings_lock:
+            try:
+                key = self._cache_key(cache)
+            except (IOError, OSError) as e:
+                raise AnsibleError("Failed to use the FortiFlex lookup cache {0}: {1}".format(self.get_option("cache_path"), e))
+            if usable(_listings.get(key)):
+                return _listings[key]
+            if ttl <= 0:
+                listing = self._fetch()
+                _listings[key] = listing if tokens else without_tokens(listing)
+                return _listings[key]
+            try:
+                # One process of the run lists the programs, the others wait for its result
+                with cache.lock(lock_path=cache.path + ".fetch.lock"):
+                    listing = cache.get(key)
+                    if not usable(listing):
+                        listing = self._fetch()
+                        if not tokens:
+                            listing = without_tokens(listing)
+                        cache.set(key, listing)
+            except (IOError, OSError) as e:
+                raise AnsibleError("Failed to use the FortiFlex lookup cache {0}: {1}".format(cache.path, e))
+            _listings[key] = listing
+            return listing
+
+    def _cache_key(self, cache):
+        # Without file cache the key stays in memory. The file cache uses an HMAC with its secret instead,
+        # so that it holds no hash of the password.
+        parts = [self.get_option("username") or "", self.get_option("password") or "",
+                 ",".join(sorted(self.get_option("programSerialNumbers") or []))]
+        if cache is None:
+            return hashlib.sha256("\0".join(parts).encode('utf-8')).hexdigest()
+        return cache.credential_key(*parts)
+
+    def _fetch(self):
+        workers = self.get_option("workers")
+        if workers < 1:
+            raise AnsibleError("workers should be at least 1.")
+        params = dict((name, self.get_option(name)) for name in ["connect_timeout", "read_timeout"])
+        module = utils.PluginModule(params, warn=display.warning)
+        try:
+            connection = Connection(module, self.get_option("username"), self.get_option("password"), pool_size=workers)
+            try:
+                return self._fetch_programs(module, connection, workers)
+            finally:
+                connection.close()
+        except utils.PluginModuleError as e:
+            raise AnsibleError("Failed to list the FortiFlex entitlements: {0}".format(e))
+
+    def _fetch_programs(self, module, connection, workers):
+        fetched_at = time.time()
+        programs = connection.send_request("fortiflex/v2/programs/list", {}, method="POST")["programs"]
+        selected = self.get_option("programSerialNumbers")
+        if selected:
+            programs = [program for program in programs if program["serialNumber"] in selected]
+        params_list = [{"program": program, "records": records} for program in programs for records in ["configs", "entitlements"]]
+        listing = {"time": fetched_at, "tokens": True, "entitlements": {}, "configs": {}}
+        for params, result in zip(params_list, utils.run_items(module, connection, list_program, params_list, workers)):
+            if result["failed"]:
+                msg = "program {0}: {1}".format(params["program"]["serialNumber"], result["msg"])
+                if result.get("response"):
+                    msg = "{0}: {1}".format(msg, result["response"].get("message") or result["response"])
+                raise utils.PluginModuleError(msg)
+            for record in result["records"]:
+                if params["records"] == "configs":
+                    listing["configs"][str(record["id"])] = record
+                else:
+                    listing["entitlements"][record["serialNumber"]] = record
+        return listing
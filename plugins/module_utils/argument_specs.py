@@ -0,0 +1,278 @@
+# Copyright: (c) 2023 Fortinet
+# GNU General Public License v3.0+ (see LICENSE or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This file is generated by tools/generate_argument_specs.py from PRODUCTS in settings.py. Do not edit it.
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+# Product options of fortiflexvm_configs_create and fortiflexvm_configs_update. Read only parameters are excluded.
+CONFIG_PRODUCT_SPECS = {
+    "fortiGateBundle": {"type": "dict", "required": False, "options": {
+        "cpu": dict(type="int", required=True),
+        "service": dict(type="str", required=True),
+        "vdom": dict(type="int", required=False, default=0),
+        "fortiGuardServices": dict(type="list", required=False, default=[], elements="str"),
+        "cloudServices": dict(type="list", required=False, default=[], elements="str"),
+        "supportService": dict(type="str", required=False, default="NONE"),
+    }},
+    "fortiManager": {"type": "dict", "required": False, "options": {
+        "device": dict(type="int", required=True),
+        "adom": dict(type="int", required=True),
+    }},
+    "fortiWeb": {"type": "dict", "required": False, "options": {
+        "cpu": dict(type="str", required=True),
+        "service": dict(type="str", required=True),
+    }},
+    "fortiGateLCS": {"type": "dict", "required": False, "options": {
+        "cpu": dict(type="int", required=True),
+        "fortiGuardServices": dict(type="list", required=False, default=[], elements="str"),
+        "supportService": dict(type="str", required=True),
+        "vdom": dict(type="int", required=True),
+        "cloudServices": dict(type="list", required=False, default=[], elements="str"),
+    }},
+    "fortiClientEMSOP": {"type": "dict", "required": False, "options": {
+        "ZTNA": dict(type="int", required=True),
+        "EPP": dict(type="int", required=True),
+        "chromebook": dict(type="int", required=True),
+        "service": dict(type="str", required=True),
+        "addons": dict(type="list", required=False, default=[], elements="str"),
+    }},
+    "fortiAnalyzer": {"type": "dict", "required": False, "options": {
+        "storage": dict(type="int", required=True),
+        "adom": dict(type="int", required=True),
+        "service": dict(type="str", required=True),
+        "addons": dict(type="list", required=False, default=[], elements="str"),
+    }},
+    "fortiPortal": {"type": "dict", "required": False, "options": {
+        "device": dict(type="int", required=True),
+    }},
+    "fortiADC": {"type": "dict", "required": False, "options": {
+        "cpu": dict(type="str", required=True),
+        "service": dict(type="str", required=True),
+    }},
+    "fortiSOAR": {"type": "dict", "required": False, "options": {
+        "service": dict(type="str", required=True),
+        "licenseNum": dict(type="int", required=False, default=0),
+        "addons": dict(type="list", required=False, default=[], elements="str"),
+    }},
+    "fortiMail": {"type": "dict", "required": False, "options": {
+        "cpu": dict(type="str", required=True),
+        "service": dict(type="str", required=True),
+        "addons": dict(type="list", required=False, default=[], elements="str"),
+    }},
+    "fortiNAC": {"type": "dict", "required": False, "options": {
+        "service": dict(type="str", required=True),
+        "endpoints": dict(type="int", required=True),
+        "supportService": dict(type="str", required=True),
+    }},
+    "fortiGateHardware": {"type": "dict", "required": False, "options": {
+        "model": dict(type="str", required=True),
+        "service": dict(type="str", required=True),
+        "addons": dict(type="list", required=False, default=[], elements="str"),
+    }},
+    "fortiAPHardware": {"type": "dict", "required": False, "options": {
+        "model": dict(type="str", required=True),
+        "service": dict(type="str", required=True),
+        "addons": dict(type="list", required=False, default=[], elements="str"),
+    }},
+    "fortiSwitchHardware": {"type": "dict", "required": False, "options": {
+        "model": dict(type="str", required=True),
+        "service": dict(type="str", required=True),
+    }},
+    "fortiCloudPrivate": {"type": "dict", "required": False, "options": {
+        "throughput": dict(type="int", required=True),
+        "applications": dict(type="int", required=True),
+    }},
+    "fortiCloudPublic": {"type": "dict", "required": False, "options": {
+        "throughput": dict(type="int", required=True),
+        "applications": dict(type="int", required=True),
+    }},
+    "fortiClientEMSCloud": {"type": "dict", "required": False, "options": {
+        "ZTNA": dict(type="int", required=True),
+        "ZTNA_FGF": dict(type="int", required=True),
+        "EPP_ZTNA": dict(type="int", required=True),
+        "EPP_ZTNA_FGF": dict(type="int", required=True),
+        "chromebook": dict(type="int", required=True),
+        "addons": dict(type="list", required=False, default=[], elements="str"),
+    }},
+    "fortiSASE": {"type": "dict", "required": False, "options": {
+        "users": dict(type="int", required=True),
+        "service": dict(type="str", required=True),
+        "bandwidth": dict(type="int", required=False, default=0),
+        "dedicatedIPs": dict(type="int", required=False, default=0),
+        "computeRegion": dict(type="int", required=False, default=0),
+        "onRampLocations": dict(type="int", required=False, default=0),
+    }},
+    "fortiEDR": {"type": "dict", "required": False, "options": {
+        "service": dict(type="str", required=True),
+        "addons": dict(type="list", required=False, default=[], elements="str"),
+        "repoStorage": dict(type="int", required=False, default=0),
+    }},
+    "fortiNDRCloud": {"type": "dict", "required": False, "options": {
+    }},
+    "fortiRecon": {"type": "dict", "required": False, "options": {
+        "service": dict(type="str", required=True),
+        "assets": dict(type="int", required=True),
+        "networks": dict(type="int", required=False),
+        "executives": dict(type="int", required=False),
+        "vendors": dict(type="int", required=False),
+    }},
+    "fortiSIEMCloud": {"type": "dict", "required": False, "options": {
+        "computeUnits": dict(type="int", required=True),
+        "onlineStorage": dict(type="int", required=False),
+        "archiveStorage": dict(type="int", required=False),
+    }},
+}
+
+# Product options of fortiflexvm_tools_calc_info.
+CALC_PRODUCT_SPECS = {
+    "fortiGateBundle": {"type": "dict", "required": False, "options": {
+        "cpu": dict(type="int", required=True),
+        "service": dict(type="str", required=True),
+        "vdom": dict(type="int", required=False, default=0),
+        "fortiGuardServices": dict(type="list", required=False, default=[], elements="str"),
+        "cloudServices": dict(type="list", required=False, default=[], elements="str"),
+        "supportService": dict(type="str", required=False, default="NONE"),
+    }},
+    "fortiManager": {"type": "dict", "required": False, "options": {
+        "device": dict(type="int", required=True),
+        "adom": dict(type="int", required=True),
+    }},
+    "fortiWeb": {"type": "dict", "required": False, "options": {
+        "cpu": dict(type="str", required=True),
+        "service": dict(type="str", required=True),
+    }},
+    "fortiGateLCS": {"type": "dict", "required": False, "options": {
+        "cpu": dict(type="int", required=True),
+        "fortiGuardServices": dict(type="list", required=False, default=[], elements="str"),
+        "supportService": dict(type="str", required=True),
+        "vdom": dict(type="int", required=True),
+        "cloudServices": dict(type="list", required=False, default=[], elements="str"),
+    }},
+    "fortiClientEMSOP": {"type": "dict", "required": False, "options": {
+        "ZTNA": dict(type="int", required=True),
+        "EPP": dict(type="int", required=True),
+        "chromebook": dict(type="int", required=True),
+        "service": dict(type="str", required=True),
+        "addons": dict(type="list", required=False, default=[], elements="str"),
+    }},
+    "fortiAnalyzer": {"type": "dict", "required": False, "options": {
+        "storage": dict(type="int", required=True),
+        "adom": dict(type="int", required=True),
+        "service": dict(type="str", required=True),
+        "addons": dict(type="list", required=False, default=[], elements="str"),
+    }},
+    "fortiPortal": {"type": "dict", "required": False, "options": {
+        "device": dict(type="int", required=True),
+    }},
+    "fortiADC": {"type": "dict", "required": False, "options": {
+        "cpu": dict(type="str", required=True),
+        "service": dict(type="str", required=True),
+    }},
+    "fortiSOAR": {"type": "dict", "required": False, "options": {
+        "service": dict(type="str", required=True),
+        "licenseNum": dict(type="int", required=False, default=0),
+        "addons": dict(type="list", required=False, default=[], elements="str"),
+    }},
+    "fortiMail": {"type": "dict", "required": False, "options": {
+        "cpu": dict(type="str", required=True),
+        "service": dict(type="str", required=True),
+        "addons": dict(type="list", required=False, default=[], elements="str"),
+    }},
+    "fortiNAC": {"type": "dict", "required": False, "options": {
+        "service": dict(type="str", required=True),
+        "endpoints": dict(type="int", required=True),
+        "supportService": dict(type="str", required=True),
+    }},
+    "fortiGateHardware": {"type": "dict", "required": False, "options": {
+        "model": dict(type="str", required=True),
+        "service": dict(type="str", required=True),
+        "addons": dict(type="list", required=False, default=[], elements="str"),
+    }},
+    "fortiAPHardware": {"type": "dict", "required": False, "options": {
+        "model": dict(type="str", required=True),
+        "service": dict(type="str", required=True),
+        "addons": dict(type="list", required=False, default=[], elements="str"),
+    }},
+    "fortiSwitchHardware": {"type": "dict", "required": False, "options": {
+        "model": dict(type="str", required=True),
+        "service": dict(type="str", required=True),
+    }},
+    "fortiCloudPrivate": {"type": "dict", "required": False, "options": {
+        "throughput": dict(type="int", required=True),
+        "applications": dict(type="int", required=True),
+    }},
+    "fortiCloudPublic": {"type": "dict", "required": False, "options": {
+        "throughput": dict(type="int", required=True),
+        "applications": dict(type="int", required=True),
+    }},
+    "fortiClientEMSCloud": {"type": "dict", "required": False, "options": {
+        "ZTNA": dict(type="int", required=True),
+        "ZTNA_FGF": dict(type="int", required=True),
+        "EPP_ZTNA": dict(type="int", required=True),
+        "EPP_ZTNA_FGF": dict(type="int", required=True),
+        "chromebook": dict(type="int", required=True),
+        "addons": dict(type="list", required=False, default=[], elements="str"),
+    }},
+    "fortiSASE": {"type": "dict", "required": False, "options": {
+        "users": dict(type="int", required=True),
+        "service": dict(type="str", required=True),
+        "bandwidth": dict(type="int", required=False, default=0),
+        "dedicatedIPs": dict(type="int", required=False, default=0),
+        "computeRegion": dict(type="int", required=False, default=0),
+        "onRampLocations": dict(type="int", required=False, default=0),
+    }},
+    "fortiEDR": {"type": "dict", "required": False, "options": {
+        "service": dict(type="str", required=True),
+        "endpoints": dict(type="int", required=True),
+        "addons": dict(type="list", required=False, default=[], elements="str"),
+        "repoStorage": dict(type="int", required=False, default=0),
+    }},
+    "fortiNDRCloud": {"type": "dict", "required": False, "options": {
+        "meteredUsage": dict(type="int", required=False),
+    }},
+    "fortiRecon": {"type": "dict", "required": False, "options": {
+        "service": dict(type="str", required=True),
+        "assets": dict(type="int", required=True),
+        "networks": dict(type="int", required=False),
+        "executives": dict(type="int", required=False),
+        "vendors": dict(type="int", required=False),
+    }},
+    "fortiSIEMCloud": {"type": "dict", "required": False, "options": {
+        "computeUnits": dict(type="int", required=True),
+        "onlineStorage": dict(type="int", required=False),
+        "archiveStorage": dict(type="int", required=False),
+    }},
+}
+
+# Product options when bypass_validation is true, the product parameters are not validated.
+BYPASS_PRODUCT_SPECS = {
+    "fortiGateBundle": {"type": "dict", "required": False},
+    "fortiManager": {"type": "dict", "required": False},
+    "fortiWeb": {"type": "dict", "required": False},
+    "fortiGateLCS": {"type": "dict", "required": False},
+    "fortiClientEMSOP": {"type": "dict", "required": False},
+    "fortiAnalyzer": {"type": "dict", "required": False},
+    "fortiPortal": {"type": "dict", "required": False},
+    "fortiADC": {"type": "dict", "required": False},
+    "fortiSOAR": {"type": "dict", "required": False},
+    "fortiMail": {"type": "dict", "required": False},
+    "fortiNAC": {"type": "dict", "required": False},
+    "fortiGateHardware": {"type": "dict", "required": False},
+    "fortiAPHardware": {"type": "dict", "required": False},
+    "fortiSwitchHardware": {"type": "dict", "required": False},
+    "fortiCloudPrivate": {"type": "dict", "required": False},
+    "fortiCloudPublic": {"type": "dict", "required": False},
+    "fortiClientEMSCloud": {"type": "dict", "required": False},
+    "fortiSASE": {"type": "dict", "required": False},
+    "fortiEDR": {"type": "dict", "required": False},
+    "fortiNDRCloud": {"type": "dict", "required": False},
+    "fortiRecon": {"type": "dict", "required": False},
+    "fortiSIEMCloud": {"type": "dict", "required": False},
+}
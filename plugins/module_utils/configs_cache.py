@@ -0,0 +1,135 @@
+# Copyright: (c) 2023 Fortinet
+# GNU General Public License v3.0+ (see LICENSE or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import os
+import json
+import time
+import hashlib
+from ansible_collections.fortinet.fortiflexvm.plugins.module_utils import utils
+from ansible_collections.fortinet.fortiflexvm.plugins.module_utils.token_cache import FileCache
+
+
+DEFAULT_CONFIGS_CACHE_PATH = os.path.join("~", ".ansible", "fortiflex", "configs_cache.json")
+DEFAULT_CONFIGS_CACHE_TTL = 60
+
+
+# configs/list responses (in API format) keyed by credential and program, reused for ttl seconds
+# so that the tasks of a run that look up configurations of the same program share one list call.
+class ConfigsCache(FileCache):
+    def __init__(self, path=None, ttl=None):
+        if not path:
+            path = os.environ.get('FORTIFLEX_CONFIGS_CACHE_PATH') or DEFAULT_CONFIGS_CACHE_PATH
+        super(ConfigsCache, self).__init__(path)
+        if ttl is None:
+            ttl = os.environ.get('FORTIFLEX_CONFIGS_CACHE_TTL', DEFAULT_CONFIGS_CACHE_TTL)
+        try:
+            self.ttl = float(ttl)
+        except (TypeError, ValueError):
+            self.ttl = DEFAULT_CONFIGS_CACHE_TTL
+
+    def fresh(self, entry):
+        return bool(entry) and time.time() - entry.get("time", 0) < self.ttl
+
+
+def _cache_key(cache, connection, program_serial_number, account_id):
+    return cache.credential_key(connection.username or "", connection.password or "", program_serial_number,
+                                str(account_id or ""))
+
+
+def list_configs(connection, program_serial_number, account_id=None, refresh=False):
+    # Return the configs of the program, from the cache unless it is stale or refresh is set.
+    cache = ConfigsCache()
+    if cache.ttl > 0 and not refresh:
+        try:
+            entry = cache.get(_cache_key(cache, connection, program_serial_number, account_id))
+        except (IOError, OSError):
+            entry = None
+        if cache.fresh(entry):
+            return entry["configs"]
+
+    data = {"programSerialNumber": program_serial_number}
+    if account_id:
+        data["accountId"] = account_id
+    response = connection.send_request("fortiflex/v2/configs/list", data, method="POST")
+    configs = response["configs"]
+    if cache.ttl > 0:
+        try:
+            cache.set(_cache_key(cache, connection, program_serial_number, account_id), {"time": time.time(), "configs": configs})
+        except (IOError, OSError):
+            pass
+    return configs
+
+
+def find_config(connection, program_serial_number, account_id, config_id, fresh=False):
+    # A config missing from a cached listing may have been created since, so look again in a fresh listing.
+    # With fresh, only a fresh listing is used: the cache may be up to ttl seconds old, which is
+    # fine for read-only lookups but not to decide whether a config needs to be written.
+    for refresh in ((True,) if fresh else (False, True)):
+        for config in list_configs(connection, program_serial_number, account_id, refresh=refresh):
+            if config["id"] == config_id:
+                return config
+    return None
+
+
+def store_config(connection, program_serial_number, account_id, config):
+    # Keep a fresh cached listing in line with a config that this run created or updated.
+    cache = ConfigsCache()
+    if cache.ttl <= 0:
+        return
+
+    def upsert(entry):
+        if not cache.fresh(entry):
+            return entry
+        entry["configs"] = [item for item in entry["configs"] if item["id"] != config["id"]]
+        entry["configs"].append(config)
+        return entry
+
+    try:
+        cache.update(_cache_key(cache, connection, program_serial_number, account_id), upsert)
+    except (IOError, OSError):
+        pass
+
+
+def config_hash(product_type_id, parameters):
+    # Equal for configurations of the same product type with the same writable parameters, in any order.
+    canonical = [int(product_type_id), utils.canonical_parameters(parameters)]
+    return hashlib.sha256(json.dumps(canonical).encode('utf-8')).hexdigest()
+
+
+class ConfigsIndex():
+    # The configs of a program (in API format) indexed by name and by config_hash().
+    def __init__(self, configs):
+        self.by_name = {}
+        self.by_hash = {}
+        for config in configs:
+            self.by_name.setdefault(config["name"], []).append(config)
+            self.by_hash.setdefault(config_hash(config["productType"]["id"], config["parameters"]), []).append(config)
+
+    def find(self, name=None, product_type_id=None, parameters=None):
+        # Return the config matching every given criterion, ACTIVE ones first, or None.
+        candidates = None
+        if name is not None:
+            candidates = self.by_name.get(name, [])
+        if parameters is not None:
+            same_parameters = self.by_hash.get(config_hash(product_type_id, parameters), [])
+            if candidates is None:
+                candidates = same_parameters
+            else:
+                ids = set(config["id"] for config in same_parameters)
+                candidates = [config for config in candidates if config["id"] in ids]
+        if not candidates:
+            return None
+        return sorted(candidates, key=lambda config: (config.get("status") != "ACTIVE", config["id"]))[0]
+
+
+def index_configs(connection, program_serial_number, account_id=None, refresh=False):
+    # Built from the cached listing, so the creates of a run in the same program share one list call.
+    return ConfigsIndex(list_configs(connection, program_serial_number, account_id, refresh=refresh))
@@ -11,14 +11,24 @@ __metaclass__ = type
 
 import os
 import json
+import time
+import random
 import hashlib
+from email.utils import parsedate_tz, mktime_tz
 from ansible_collections.fortinet.fortiflexvm.plugins.module_utils.settings import API_URL, AUTH_URL
-from ansible_collections.fortinet.fortiflexvm.plugins.module_utils.utils import replace_error_msg
+from ansible_collections.fortinet.fortiflexvm.plugins.module_utils.utils import replace_error_msg, iter_json_list
+from ansible_collections.fortinet.fortiflexvm.plugins.module_utils.token_cache import TokenCache
+import threading
 import traceback
 from ansible.module_utils.basic import missing_required_lib
+from ansible.module_utils.common.text.converters import to_text
+from ansible.module_utils.connection import Connection as PersistentConnection
+from ansible.module_utils.connection import ConnectionError as PersistentConnectionError
+from ansible.module_utils.parsing.convert_bool import boolean
 
 try:
     import requests
+    from requests.adapters import HTTPAdapter
 except ImportError:
     HAS_ANOTHER_LIBRARY = False
     ANOTHER_LIBRARY_IMPORT_ERROR = traceback.format_exc()
@@ -27,19 +37,186 @@ else:
     ANOTHER_LIBRARY_IMPORT_ERROR = None
 
 
+DEFAULT_POOL_SIZE = 10
+DEFAULT_CONNECT_TIMEOUT = 10
+DEFAULT_READ_TIMEOUT = 120
+# Refresh the access token this many seconds before it expires.
+TOKEN_REFRESH_MARGIN = 60
+# Give up waiting for another process to refresh the token after this many seconds.
+TOKEN_REFRESH_LOCK_TIMEOUT = 60
+# The invalid token response is a small JSON object, larger bodies are not decoded to look for it.
+INVALID_TOKEN_MAX_LENGTH = 512
+
+# Read-only endpoints, safe to resend after any transient failure.
+IDEMPOTENT_ENDPOINT_SUFFIXES = ("/list", "/points", "/nexttoken", "/calc")
+# Status codes that indicate a transient server-side condition.
+RETRY_STATUS_CODES = (429, 502, 503, 504)
+
+
+def persistent_error_details(error):
+    # The httpapi plugin sends the arguments of its fail_json() as JSON in the error message.
+    message = to_text(error)
+    try:
+        details = json.loads(message)
+    except ValueError:
+        details = None
+    if not isinstance(details, dict) or "msg" not in details:
+        details = dict(msg=message, code=getattr(error, "code", None))
+    return details
+
+
+class RetryPolicy():
+    # Exponential backoff with full jitter, bounded by max_attempts and a total time budget (seconds).
+    def __init__(self, max_attempts=None, backoff_factor=None, max_backoff=None, total_budget=None):
+        self.max_attempts = max(1, self._setting(max_attempts, 'FORTIFLEX_RETRY_MAX_ATTEMPTS', 5, int))
+        self.backoff_factor = self._setting(backoff_factor, 'FORTIFLEX_RETRY_BACKOFF_FACTOR', 1.0, float)
+        self.max_backoff = self._setting(max_backoff, 'FORTIFLEX_RETRY_MAX_BACKOFF', 30.0, float)
+        self.total_budget = self._setting(total_budget, 'FORTIFLEX_RETRY_TOTAL_BUDGET', 120.0, float)
+
+    def _setting(self, value, env_name, default, value_type):
+        if value is None:
+            value = os.environ.get(env_name, default)
+        try:
+            return value_type(value)
+        except (TypeError, ValueError):
+            return default
+
+    def should_retry(self, idempotent, response=None, error=None):
+        if error is not None:
+            # A connect timeout means the request never reached the server.
+            return idempotent or isinstance(error, requests.exceptions.ConnectTimeout)
+        if response.status_code not in RETRY_STATUS_CODES:
+            return False
+        # 429 means the request was rejected before being processed.
+        return idempotent or response.status_code == 429
+
+    def backoff(self, attempt, response=None):
+        delay = random.uniform(0, min(self.max_backoff, self.backoff_factor * (2 ** attempt)))
+        retry_after = self._retry_after(response)
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay
+
+    def _retry_after(self, response):
+        if response is None:
+            return None
+        value = response.headers.get("Retry-After")
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        parsed = parsedate_tz(value)
+        if parsed is None:
+            return None
+        return max(0.0, mktime_tz(parsed) - time.time())
+
+
+def is_idempotent_endpoint(url):
+    return url.rstrip("/").endswith(IDEMPOTENT_ENDPOINT_SUFFIXES)
+
+
+# One refresh lock per credential, shared by every Connection of this process.
+_refresh_locks = {}
+_refresh_locks_guard = threading.Lock()
+
+
+def _get_refresh_lock(key):
+    with _refresh_locks_guard:
+        if key not in _refresh_locks:
+            _refresh_locks[key] = threading.Lock()
+        return _refresh_locks[key]
+
+
 class Connection():
-    def __init__(self, module, username="", password=""):
+    def __init__(self, module, username="", password="", pool_size=None, session_file=None, retry_policy=None,
+                 connect_timeout=None, read_timeout=None, task_timeout=None):
         self.module = module
+        self.pool_size = pool_size
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.connect_timeout = self._timeout_setting(connect_timeout, "connect_timeout", 'FORTIFLEX_CONNECT_TIMEOUT', DEFAULT_CONNECT_TIMEOUT)
+        self.read_timeout = self._timeout_setting(read_timeout, "read_timeout", 'FORTIFLEX_READ_TIMEOUT', DEFAULT_READ_TIMEOUT)
+        # The task deadline covers everything this Connection does: login, retries and multi-request flows.
+        task_timeout = self._timeout_setting(task_timeout, "task_timeout", 'FORTIFLEX_TASK_TIMEOUT', None)
+        self.deadline = time.time() + task_timeout if task_timeout else None
+        self.http_session = None
         self.access_token = ""
+        self.refresh_token = None
+        self.expires_at = None
         self.validation_hash = None
-        self.session_file = "fortiflex_session.json"
         self.username = username
         self.password = password
-        self.save_session_file = False
+        self.save_session_file = boolean(os.environ.get('FORTIFLEX_TOKEN_CACHE', True), strict=False)
+        self.token_cache = TokenCache(session_file) if self.save_session_file else None
         self.log_path = False
-        self.retry_times = 4
+        self.persistent_connection = None
+        socket_path = getattr(module, "_socket_path", None)
+        if socket_path:
+            # The task runs with the fortiflexvm httpapi plugin, whose persistent connection
+            # owns the login, the token and the connection pool for the whole play.
+            self.persistent_connection = PersistentConnection(socket_path)
+            return
         self.login()
 
+    def _timeout_setting(self, value, param_name, env_name, default):
+        # Explicit argument, then module parameter, then environment variable. 0 disables the limit.
+        if value is None:
+            value = self.module.params.get(param_name)
+        if value is None:
+            value = os.environ.get(env_name)
+        if value is None:
+            return default
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            self.module.fail_json(msg="Invalid value {0} of {1}, it should be a number of seconds.".format(value, param_name))
+        return value if value > 0 else None
+
+    def remaining_time(self):
+        if self.deadline is None:
+            return None
+        return self.deadline - time.time()
+
+    def _check_deadline(self, url):
+        remaining = self.remaining_time()
+        if remaining is not None and remaining <= 0:
+            self.module.fail_json(msg="Task timeout exceeded before sending the request to {0}.".format(url))
+        return remaining
+
+    def _request_timeout(self, remaining):
+        connect_timeout, read_timeout = self.connect_timeout, self.read_timeout
+        if remaining is not None:
+            connect_timeout = min(connect_timeout, remaining) if connect_timeout else remaining
+            read_timeout = min(read_timeout, remaining) if read_timeout else remaining
+        return (connect_timeout, read_timeout)
+
+    def get_http_session(self):
+        # One keep-alive session per Connection, so login, token retries and
+        # multi-step flows reuse the same TCP/TLS connections.
+        if self.http_session is not None:
+            return self.http_session
+        pool_size = self.pool_size
+        if not pool_size:
+            pool_size = os.environ.get('FORTIFLEX_POOL_SIZE', DEFAULT_POOL_SIZE)
+        try:
+            pool_size = max(1, int(pool_size))
+        except (TypeError, ValueError):
+            pool_size = DEFAULT_POOL_SIZE
+        self.pool_size = pool_size
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.headers.update({"Connection": "keep-alive"})
+        self.http_session = session
+        return session
+
+    def close(self):
+        if self.http_session is not None:
+            self.http_session.close()
+            self.http_session = None
+
     def login(self, check_error=True):
         if not self.username:
             self.username = os.environ.get('FORTIFLEX_ACCESS_USERNAME')
@@ -51,85 +228,220 @@ class Connection():
         if not self.password:
             self.module.fail_json(
                 msg="Please specify password in your playbook, or set environment variable: FORTIFLEX_ACCESS_PASSWORD.")
-        self.validation_hash = self._hash_str(self.username + self.password)
+        # Only kept in memory, the caches use credential_key() instead
+        self.validation_hash = self._hash_str(self.username + "\0" + self.password + "\0" + AUTH_URL)
         self.log_path = os.environ.get('FORTIFLEX_LOG_PATH')
-        if self._load_session():
+        if self._load_session() and not self.token_expiring():
             # already login
             return
+        self.refresh_access_token(check_error=check_error)
+
+    def token_expiring(self):
+        # Tokens without a known lifetime are used until the API rejects them.
+        if not self.expires_at:
+            return False
+        return time.time() >= self.expires_at - TOKEN_REFRESH_MARGIN
+
+    def ensure_token(self):
+        if not self.access_token or self.token_expiring():
+            self.refresh_access_token()
+
+    def refresh_access_token(self, check_error=True):
+        # Single-flight: only one thread (in-process lock) and one process (cache refresh lock)
+        # renews the token, the others wait and then pick up the token it obtained.
+        stale_token = self.access_token
+        with _get_refresh_lock(self.validation_hash):
+            if self.access_token != stale_token and self.access_token and not self.token_expiring():
+                return True
+            if not self.token_cache:
+                return self._renew_token(check_error=check_error)
+            try:
+                lock_timeout = TOKEN_REFRESH_LOCK_TIMEOUT
+                remaining = self.remaining_time()
+                if remaining is not None:
+                    lock_timeout = max(0, min(lock_timeout, remaining))
+                with self.token_cache.refresh_lock(timeout=lock_timeout):
+                    if self._load_session() and self.access_token != stale_token and not self.token_expiring():
+                        return True
+                    return self._renew_token(check_error=check_error)
+            except (IOError, OSError) as e:
+                # The cache directory is unusable or another process holds the lock for too long.
+                self.log("Failed to lock FortiFlex token cache: {0}".format(e))
+                return self._renew_token(check_error=check_error)
+
+    def _renew_token(self, check_error=True):
+        # Prefer the refresh_token grant, fall back to the password grant when it is rejected.
+        if self.refresh_token:
+            data = {
+                "refresh_token": self.refresh_token,
+                "client_id": "flexvm",
+                "grant_type": "refresh_token"
+            }
+            if self._grant_token(data, check_error=False):
+                return True
         data = {
             "username": self.username,
             "password": self.password,
             "client_id": "flexvm",
             "grant_type": "password"
         }
+        return self._grant_token(data, check_error=check_error)
+
+    def _grant_token(self, data, check_error=True):
         headers = {
             "Content-Type": "application/json"
         }
         response = self.send(AUTH_URL, data, headers=headers)
-        if check_error and response.status_code >= 400:
-            self.module.fail_json(msg="Request failed with status code {0}".format(
-                response.status_code), response=response.json())
-        self.access_token = response.json()['access_token']
+        response_data = self.response_json(response)
+        if response.status_code >= 400 or "access_token" not in response_data:
+            if check_error:
+                self.module.fail_json(msg="Request failed with status code {0}".format(
+                    response.status_code), response=response_data)
+            return False
+        self.access_token = response_data["access_token"]
+        self.refresh_token = response_data.get("refresh_token")
+        self.expires_at = None
+        try:
+            self.expires_at = time.time() + int(response_data["expires_in"])
+        except (KeyError, TypeError, ValueError):
+            pass
         if self.save_session_file:
             self._save_session()
+        return True
+
+    def send_request(self, url, data, method="post", check_error=True, idempotent=None, before_send=None):
+        status_code, response_data = self.request_status(url, data, method=method, idempotent=idempotent, before_send=before_send)
+        if check_error and status_code >= 400:
+            self._fail_response(status_code, response_data)
+        return response_data
+
+    def request_status(self, url, data, method="post", idempotent=None, before_send=None):
+        # Return the status code and the decoded response, for callers that handle errors themselves.
+        if self.persistent_connection is not None:
+            return self._send_persistent_request(url, data, method, idempotent, before_send)
+        response = self.request(url, data, method=method, idempotent=idempotent, before_send=before_send)
+        return response.status_code, self.response_json(response)
+
+    def iter_response_items(self, url, data, key, method="post", others=None):
+        # Like send_request(), but yield the elements of the list response[key] one at a time. The response
+        # text is received in full, but its elements are only decoded as they are consumed, so the whole
+        # decoded list is never held in memory. The persistent connection returns the decoded response.
+        # The other members of the response are stored in the dict others, if given.
+        if self.persistent_connection is not None:
+            status_code, response_data = self._send_persistent_request(url, data, method, None)
+            if status_code >= 400:
+                self._fail_response(status_code, response_data)
+            if others is not None:
+                others.update((name, value) for name, value in response_data.items() if name != key)
+            for item in response_data.get(key) or []:
+                yield item
+            return
+        response = self.request(url, data, method=method)
+        if response.status_code >= 400:
+            self._fail_response(response.status_code, self.response_json(response))
+        try:
+            for item in iter_json_list(response.text, key, others):
+                yield item
+        except ValueError as e:
+            self.module.fail_json(msg="Invalid response from {0}: {1}".format(url, e))
+
+    def _fail_response(self, status_code, response_data):
+        response_message = response_data.get("message", "")
+        try:
+            if response_message and "parameter id" in response_message.lower():
+                response_data["message"] = replace_error_msg(response_message)
+        except Exception as e:
+            pass
+        self.module.fail_json(msg="Request failed with status code {0}".format(
+            status_code), response=response_data)
 
-    def send_request(self, url, data, method="post", check_error=True):
+    def request(self, url, data, method="post", idempotent=None, before_send=None):
+        # Send an authenticated API request and return the raw response, without checking its status.
+        # before_send() is called right before each attempt puts the request on the wire, see send().
+        if idempotent is None:
+            idempotent = is_idempotent_endpoint(url)
+        self.ensure_token()
         headers = {
             "Authorization": "Bearer " + self.access_token,
             "Content-Type": "application/json"
         }
         query_url = os.path.join(API_URL, url)
-        response = self.send(query_url, data, headers=headers, method=method)
-        retry = 0
-        while retry <= self.retry_times and response.json()["status"] == -1 and response.json()["message"] == "Invalid security token.":
-            if retry == self.retry_times:
-                # token expired, login again
-                self.logout()
-                self.login()
+        response = self.send(query_url, data, headers=headers, method=method, idempotent=idempotent, before_send=before_send)
+        if self._is_invalid_token(response):
+            # The token was revoked or expired earlier than announced, get a new one and resend once.
+            self.refresh_access_token()
             headers["Authorization"] = "Bearer " + self.access_token
             response = self.send(
-                query_url, data, headers=headers, method=method)
-            retry += 1
+                query_url, data, headers=headers, method=method, idempotent=idempotent, before_send=before_send)
+        return response
 
-        if check_error and response.status_code >= 400:
-            response_data = response.json()
-            response_message = response_data.get("message", "")
-            try:
-                if response_message and "parameter id" in response_message.lower():
-                    response_data["message"] = replace_error_msg(response_message)
-            except Exception as e:
-                pass
-            self.module.fail_json(msg="Request failed with status code {0}".format(
-                response.status_code), response=response_data)
-        return response.json()
-
-    def send(self, url, data, headers=None, method="post"):
+    def _send_persistent_request(self, url, data, method, idempotent, before_send=None):
+        # The persistent connection applies the timeouts and the time left to this task.
+        timeouts = dict(connect_timeout=self.connect_timeout, read_timeout=self.read_timeout,
+                        remaining_time=self._check_deadline(url))
+        if before_send is not None:
+            before_send()
+        try:
+            status_code, response_data = self.persistent_connection.send_request(
+                url, data, method=method, idempotent=idempotent, timeouts=timeouts)
+        except PersistentConnectionError as e:
+            self.module.fail_json(**persistent_error_details(e))
+        return status_code, response_data
+
+    def send(self, url, data, headers=None, method="post", idempotent=True, before_send=None):
+        # before_send(), if given, is called right before each attempt. When the request then fails, the
+        # failure tells the caller with request_sent whether it may have reached the server: a connect
+        # timeout, on every attempt, means it didn't.
         if not HAS_ANOTHER_LIBRARY:
             self.module.fail_json(
                 msg=missing_required_lib('requests'),
                 exception=ANOTHER_LIBRARY_IMPORT_ERROR)
-        response = None
         method = method.lower()
+        if method not in ["post", "get"]:
+            self.module.fail_json(
+                msg="An error occurred while sending the {0} request: Invalid method. Only 'post' and 'get' are supported.".format(method))
         if self.log_path:
             log_data = data.copy()
-            for sensitive_key in ["username", "password"]:
+            for sensitive_key in ["username", "password", "refresh_token"]:
                 if sensitive_key in log_data:
                     log_data[sensitive_key] = "******"
             self.log("FortiFlex request to {0}: {1}".format(
                 url, str(log_data)))
-        try:
-            if method == "post":
-                response = requests.post(url, json=data, headers=headers)
-            elif method == "get":
-                response = requests.get(url, params=data, headers=headers)
-            else:
-                raise ValueError(
-                    "Invalid method. Only 'post' and 'get' are supported.")
-        except Exception as e:
+        policy = self.retry_policy
+        deadline = time.time() + policy.total_budget
+        if self.deadline is not None:
+            deadline = min(deadline, self.deadline)
+        attempt = 0
+        request_sent = False
+        while True:
+            response, error = None, None
+            timeout = self._request_timeout(self._check_deadline(url))
+            if before_send is not None:
+                before_send()
+            try:
+                session = self.get_http_session()
+                if method == "post":
+                    response = session.post(url, json=data, headers=headers, timeout=timeout)
+                else:
+                    response = session.get(url, params=data, headers=headers, timeout=timeout)
+            except requests.exceptions.RequestException as e:
+                error = e
+            request_sent = request_sent or not isinstance(error, requests.exceptions.ConnectTimeout)
+            attempt += 1
+            if attempt >= policy.max_attempts or not policy.should_retry(idempotent, response, error):
+                break
+            delay = policy.backoff(attempt - 1, response)
+            if time.time() + delay > deadline:
+                break
+            self.log("FortiFlex request to {0} failed ({1}), retry {2} in {3:.1f}s".format(
+                url, error if error is not None else response.status_code, attempt, delay))
+            time.sleep(delay)
+        if error is not None:
+            details = dict(request_sent=request_sent) if before_send is not None else {}
             self.module.fail_json(
-                msg="An error occurred while sending the {0} request: {1}".format(method, e))
+                msg="An error occurred while sending the {0} request: {1}".format(method, error), **details)
         if self.log_path:
-            log_data = response.json()
+            log_data = self.response_json(response)
             for sensitive_key in ["access_token", "refresh_token"]:
                 if sensitive_key in log_data:
                     log_data[sensitive_key] = "******"
@@ -138,6 +450,22 @@ class Connection():
 
     def logout(self):
         self._remove_session()
+        self.access_token = ""
+        self.refresh_token = None
+        self.expires_at = None
+
+    def response_json(self, response):
+        try:
+            response_data = response.json()
+        except ValueError:
+            return {}
+        return response_data if isinstance(response_data, dict) else {}
+
+    def _is_invalid_token(self, response):
+        if len(response.content) > INVALID_TOKEN_MAX_LENGTH:
+            return False
+        response_data = self.response_json(response)
+        return response_data.get("status") == -1 and response_data.get("message") == "Invalid security token."
 
     def log(self, data):
         try:
@@ -151,30 +479,43 @@ class Connection():
         except (IOError, KeyError):
             pass
 
+    def session_key(self):
+        # The key of the credential in the token cache
+        return self.token_cache.credential_key(self.username or "", self.password or "", AUTH_URL)
+
     def _load_session(self):
+        if not self.token_cache:
+            return False
         try:
-            with open(self.session_file, "r") as f:
-                session_data = json.load(f)
-                if self.validation_hash != session_data["validation_hash"]:
-                    return False
-                self.access_token = session_data["access_token"]
-            return True
-        except (IOError, KeyError):
+            session_data = self.token_cache.get(self.session_key())
+        except (IOError, OSError):
+            return False
+        if not session_data or not session_data.get("access_token"):
             return False
+        self.access_token = session_data["access_token"]
+        self.refresh_token = session_data.get("refresh_token")
+        self.expires_at = session_data.get("expires_at")
+        return True
 
     def _save_session(self):
-        with open(self.session_file, "w") as f:
-            json.dump({"access_token": self.access_token,
-                      "validation_hash": self.validation_hash}, f)
+        # The cache only saves round trips, a failure to write it must not fail the task.
+        try:
+            self.token_cache.set(self.session_key(), {"access_token": self.access_token,
+                                                      "refresh_token": self.refresh_token,
+                                                      "expires_at": self.expires_at})
+        except (IOError, OSError) as e:
+            self.log("Failed to save FortiFlex token cache: {0}".format(e))
 
     def _remove_session(self):
+        if not self.token_cache:
+            return
         try:
-            os.remove(self.session_file)
-        except OSError:
+            self.token_cache.remove(self.session_key())
+        except (IOError, OSError):
             pass
 
     def _hash_str(self, input_str):
-        md5_hash = hashlib.md5()
-        md5_hash.update(input_str.encode('utf-8'))
-        md5_digest = md5_hash.hexdigest()
-        return md5_digest
+        sha256_hash = hashlib.sha256()
+        sha256_hash.update(input_str.encode('utf-8'))
+        sha256_digest = sha256_hash.hexdigest()
+        return sha256_digest
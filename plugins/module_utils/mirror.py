@@ -0,0 +1,228 @@
+# Copyright: (c) 2023 Fortinet
+# GNU General Public License v3.0+ (see LICENSE or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+from ansible.module_utils.six.moves.urllib.parse import quote
+from ansible_collections.fortinet.fortiflexvm.plugins.module_utils.utils import PRODUCTS_BY_NAME
+
+
+DEFAULT_MIRROR_PATH = os.path.join("~", ".ansible", "fortiflex", "mirror.db")
+
+# Every mirrored table keeps the record as returned by the modules in data, the sha256 of data in hash,
+# and the columns that queries filter on. configs hold the output of transform_config_output().
+TABLES = {
+    "programs": dict(key="serialNumber", columns=["accountId", "startDate", "endDate"]),
+    "configs": dict(key="id", columns=["programSerialNumber", "accountId", "name", "status", "productType"]),
+    "entitlements": dict(key="serialNumber", columns=["configId", "programSerialNumber", "accountId", "description",
+                                                      "status", "tokenStatus", "startDate", "endDate"]),
+}
+
+SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS programs (serialNumber TEXT PRIMARY KEY, accountId INTEGER, startDate TEXT, "
+    "endDate TEXT, data TEXT NOT NULL, hash TEXT NOT NULL, synced_at REAL NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS configs (id INTEGER PRIMARY KEY, programSerialNumber TEXT, accountId INTEGER, "
+    "name TEXT, status TEXT, productType TEXT, data TEXT NOT NULL, hash TEXT NOT NULL, synced_at REAL NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS config_parameters (configId INTEGER NOT NULL, name TEXT NOT NULL, value TEXT)",
+    "CREATE TABLE IF NOT EXISTS entitlements (serialNumber TEXT PRIMARY KEY, configId INTEGER, programSerialNumber TEXT, "
+    "accountId INTEGER, description TEXT, status TEXT, tokenStatus TEXT, startDate TEXT, endDate TEXT, "
+    "data TEXT NOT NULL, hash TEXT NOT NULL, synced_at REAL NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS sync_state (programSerialNumber TEXT PRIMARY KEY, synced_at REAL NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS configs_program ON configs (programSerialNumber)",
+    "CREATE INDEX IF NOT EXISTS configs_product_type ON configs (productType)",
+    "CREATE INDEX IF NOT EXISTS config_parameters_config ON config_parameters (configId)",
+    "CREATE INDEX IF NOT EXISTS config_parameters_value ON config_parameters (name, value)",
+    "CREATE INDEX IF NOT EXISTS entitlements_config ON entitlements (configId)",
+    "CREATE INDEX IF NOT EXISTS entitlements_program ON entitlements (programSerialNumber)",
+    "CREATE INDEX IF NOT EXISTS entitlements_status ON entitlements (status, tokenStatus)",
+]
+
+# Longer lists of accepted values are checked in Python instead of with SQL parameters,
+# old SQLite versions accept at most 999 parameters per statement.
+MAX_SQL_VALUES = 500
+
+
+def mirror_path(path=None):
+    return os.path.abspath(os.path.expanduser(path or os.environ.get('FORTIFLEX_MIRROR_PATH') or DEFAULT_MIRROR_PATH))
+
+
+def record_hash(record):
+    return hashlib.sha256(json.dumps(record, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def config_product_type(config):
+    # A transformed config holds its parameters under the name of its product type.
+    for name in config:
+        if name in PRODUCTS_BY_NAME:
+            return name
+    return None
+
+
+class MirrorStore():
+    def __init__(self, path=None, readonly=False, in_memory=False):
+        # in_memory works on a copy of the mirror, an empty one if it doesn't exist, and never touches the file.
+        self.path = mirror_path(path)
+        if readonly or in_memory:
+            if not os.path.exists(self.path):
+                if readonly:
+                    raise IOError("The FortiFlex mirror {0} doesn't exist, run fortiflexvm_sync first.".format(self.path))
+                source = None
+            else:
+                source = sqlite3.connect("file:{0}?mode=ro".format(quote(self.path)), uri=True, timeout=60)
+            if readonly:
+                self.db = source
+                self.db.row_factory = sqlite3.Row
+                return
+            self.db = sqlite3.connect(":memory:")
+            if source is not None:
+                try:
+                    source.backup(self.db)
+                finally:
+                    source.close()
+            self.db.row_factory = sqlite3.Row
+            for statement in SCHEMA:
+                self.db.execute(statement)
+            self.db.commit()
+            return
+        directory = os.path.dirname(self.path)
+        if not os.path.isdir(directory):
+            os.makedirs(directory, 0o700)
+        if not os.path.exists(self.path):
+            # The mirror holds tokens, only the owner may read it.
+            os.close(os.open(self.path, os.O_WRONLY | os.O_CREAT, 0o600))
+        self.db = sqlite3.connect(self.path, timeout=60)
+        self.db.row_factory = sqlite3.Row
+        for statement in SCHEMA:
+            self.db.execute(statement)
+        self.db.commit()
+
+    def close(self):
+        self.db.close()
+
+    def sync_table(self, table, records, scope=None, now=None):
+        # Make the rows of table that match scope (column -> value) equal to records. Only rows whose hash
+        # changed are written. Return the counts of inserted, updated, unchanged and deleted rows.
+        # The caller commits or rolls back.
+        key, columns = TABLES[table]["key"], TABLES[table]["columns"]
+        scope = scope or {}
+        now = now or time.time()
+        where = " AND ".join("{0} = ?".format(column) for column in scope) or "1"
+        existing = dict((row[0], row[1]) for row in self.db.execute(
+            "SELECT {0}, hash FROM {1} WHERE {2}".format(key, table, where), list(scope.values())))
+        counts = dict(inserted=0, updated=0, unchanged=0, deleted=0)
+        seen = set()
+        for record in records:
+            record_key = record[key]
+            seen.add(record_key)
+            digest = record_hash(record)
+            if existing.get(record_key) == digest:
+                counts["unchanged"] += 1
+                continue
+            counts["updated" if record_key in existing else "inserted"] += 1
+            values = [record_key] + [self._column_value(table, column, record, scope) for column in columns]
+            values += [json.dumps(record), digest, now]
+            names = [key] + columns + ["data", "hash", "synced_at"]
+            self.db.execute("INSERT OR REPLACE INTO {0} ({1}) VALUES ({2})".format(
+                table, ", ".join(names), ", ".join("?" * len(names))), values)
+            if table == "configs":
+                self._write_config_parameters(record)
+        for record_key in set(existing) - seen:
+            counts["deleted"] += 1
+            self.db.execute("DELETE FROM {0} WHERE {1} = ?".format(table, key), [record_key])
+            if table == "configs":
+                self.db.execute("DELETE FROM config_parameters WHERE configId = ?", [record_key])
+        return counts
+
+    def remove_program(self, program_serial_number):
+        # Remove the configs and entitlements of a program, return the number of rows deleted per table.
+        deleted = {}
+        for table in ["configs", "entitlements", "sync_state"]:
+            deleted[table] = self.db.execute("DELETE FROM {0} WHERE programSerialNumber = ?".format(table),
+                                             [program_serial_number]).rowcount
+        self.db.execute("DELETE FROM config_parameters WHERE configId NOT IN (SELECT id FROM configs)")
+        return deleted
+
+    def set_synced(self, program_serial_number, now=None):
+        self.db.execute("INSERT OR REPLACE INTO sync_state (programSerialNumber, synced_at) VALUES (?, ?)",
+                        [program_serial_number, now or time.time()])
+
+    def query(self, table, filters=None, description_pattern=None, product_types=None, parameters=None):
+        # Yield the records of table that match every filter, ordered by key. filters maps a column to its accepted values.
+        # description_pattern is a GLOB pattern on the description of entitlements.
+        # product_types and parameters select configs, and the entitlements of those configs.
+        key, columns = TABLES[table]["key"], TABLES[table]["columns"]
+        clauses, values, checks = [], [], []
+        for column, accepted in (filters or {}).items():
+            if column != key and column not in columns:
+                raise ValueError("Can't filter {0} by {1}.".format(table, column))
+            if len(accepted) > MAX_SQL_VALUES:
+                checks.append((column, set(accepted)))
+                continue
+            clauses.append("{0} IN ({1})".format(column, ", ".join("?" * len(accepted))))
+            values.extend(accepted)
+        if description_pattern is not None:
+            if table != "entitlements":
+                raise ValueError("Only entitlements have a description.")
+            clauses.append("description GLOB ?")
+            values.append(description_pattern)
+
+        config_clauses, config_values = [], []
+        if product_types:
+            config_clauses.append("productType IN ({0})".format(", ".join("?" * len(product_types))))
+            config_values.extend(product_types)
+        for name, value in (parameters or {}).items():
+            for item in (value if isinstance(value, list) else [value]):
+                config_clauses.append("id IN (SELECT configId FROM config_parameters WHERE name = ? AND value = ?)")
+                config_values.extend([name, str(item)])
+        if config_clauses:
+            if table == "configs":
+                clauses.extend(config_clauses)
+            elif table == "entitlements":
+                clauses.append("configId IN (SELECT id FROM configs WHERE {0})".format(" AND ".join(config_clauses)))
+            else:
+                raise ValueError("Only configs and entitlements can be filtered by product type or parameters.")
+            values.extend(config_values)
+
+        statement = "SELECT * FROM {0} WHERE {1} ORDER BY {2}".format(table, " AND ".join(clauses) or "1", key)
+        for row in self.db.execute(statement, values):
+            if all(row[column] in accepted for column, accepted in checks):
+                yield json.loads(row["data"])
+
+    def synced_at(self, program_serial_numbers=None):
+        # The time of the oldest sync of the programs, None if one of them was never synced.
+        if program_serial_numbers:
+            rows = [row[0] for row in self.db.execute("SELECT synced_at FROM sync_state WHERE programSerialNumber IN ({0})".format(
+                ", ".join("?" * len(program_serial_numbers))), list(program_serial_numbers))]
+            if len(rows) < len(set(program_serial_numbers)):
+                return None
+        else:
+            rows = [row[0] for row in self.db.execute("SELECT synced_at FROM sync_state")]
+        return min(rows) if rows else None
+
+    def _column_value(self, table, column, record, scope):
+        if table == "configs" and column == "productType":
+            return config_product_type(record)
+        value = record.get(column)
+        return scope.get(column) if value is None else value
+
+    def _write_config_parameters(self, config):
+        self.db.execute("DELETE FROM config_parameters WHERE configId = ?", [config["id"]])
+        product_type = config_product_type(config)
+        if product_type is None:
+            return
+        rows = []
+        for name, value in config[product_type].items():
+            for item in (value if isinstance(value, list) else [value]):
+                rows.append((config["id"], name, str(item)))
+        self.db.executemany("INSERT INTO config_parameters (configId, name, value) VALUES (?, ?, ?)", rows)
@@ -0,0 +1,174 @@
+# Copyright: (c) 2023 Fortinet
+# GNU General Public License v3.0+ (see LICENSE or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import os
+import hmac
+import json
+import time
+import hashlib
+import binascii
+import tempfile
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:
+    HAS_FCNTL = False
+else:
+    HAS_FCNTL = True
+
+
+DEFAULT_TOKEN_CACHE_PATH = os.path.join("~", ".ansible", "fortiflex", "token_cache.json")
+
+
+class LockTimeout(IOError):
+    pass
+
+
+# A JSON file of entries, shared by every process of a run.
+# Reads take a shared lock, writes take an exclusive lock and replace the file atomically.
+class FileCache():
+    def __init__(self, path):
+        self.path = os.path.abspath(os.path.expanduser(path))
+        self.lock_path = self.path + ".lock"
+        self.secret_path = self.path + ".key"
+        self._secret = None
+
+    @contextmanager
+    def lock(self, shared=False, timeout=None, lock_path=None):
+        # Raise LockTimeout if the lock can't be acquired within timeout seconds.
+        self._ensure_dir()
+        fd = os.open(lock_path or self.lock_path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            if HAS_FCNTL:
+                self._flock(fd, fcntl.LOCK_SH if shared else fcntl.LOCK_EX, timeout)
+            yield
+        finally:
+            if HAS_FCNTL:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+
+    def _flock(self, fd, operation, timeout):
+        if timeout is None:
+            fcntl.flock(fd, operation)
+            return
+        deadline = time.time() + timeout
+        while True:
+            try:
+                fcntl.flock(fd, operation | fcntl.LOCK_NB)
+                return
+            except (IOError, OSError):
+                if time.time() >= deadline:
+                    raise LockTimeout("Timed out waiting for lock on {0}".format(self.path))
+                time.sleep(0.1)
+
+    def get(self, key):
+        with self.lock(shared=True):
+            return self._read().get(key)
+
+    def set(self, key, value):
+        with self.lock():
+            entries = self._read()
+            entries[key] = value
+            self._write(entries)
+
+    def update(self, key, update_func):
+        # Atomically replace the entry with update_func(current entry), None removes it.
+        with self.lock():
+            entries = self._read()
+            value = update_func(entries.get(key))
+            if value is None:
+                entries.pop(key, None)
+            else:
+                entries[key] = value
+            self._write(entries)
+
+    def remove(self, key):
+        with self.lock():
+            entries = self._read()
+            if key in entries:
+                del entries[key]
+                self._write(entries)
+
+    def credential_key(self, *parts):
+        # The key of the entries of a credential: an HMAC of the parts with a random secret kept next to the cache,
+        # so that the cache never holds a plain hash of a password that could be brute forced.
+        message = "\0".join(parts).encode('utf-8')
+        return hmac.new(self._get_secret(), message, hashlib.sha256).hexdigest()
+
+    def _get_secret(self):
+        if self._secret is None:
+            with self.lock():
+                try:
+                    with open(self.secret_path, "r") as f:
+                        self._secret = binascii.unhexlify(f.read().strip())
+                except (IOError, OSError, TypeError, ValueError):
+                    self._secret = None
+                if not self._secret:
+                    secret = os.urandom(32)
+                    self._write_file(self.secret_path, lambda f: f.write(binascii.hexlify(secret).decode('ascii')))
+                    self._secret = secret
+        return self._secret
+
+    def _ensure_dir(self):
+        directory = os.path.dirname(self.path)
+        if not os.path.isdir(directory):
+            try:
+                os.makedirs(directory, 0o700)
+            except OSError:
+                # Another process may have created it in the meantime.
+                if not os.path.isdir(directory):
+                    raise
+
+    def _read(self):
+        try:
+            with open(self.path, "r") as f:
+                entries = json.load(f)
+        except (IOError, OSError, ValueError):
+            return {}
+        if not isinstance(entries, dict):
+            return {}
+        return entries
+
+    def _write(self, entries):
+        self._write_file(self.path, lambda f: json.dump(entries, f))
+
+    def _write_file(self, path, write):
+        # Write to a temporary file in the same directory, then rename it over the
+        # file, so readers never see a partially written file.
+        fd, tmp_path = tempfile.mkstemp(prefix="." + os.path.basename(path), dir=os.path.dirname(path))
+        try:
+            with os.fdopen(fd, "w") as f:
+                write(f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.chmod(tmp_path, 0o600)
+            os.rename(tmp_path, path)
+        except Exception:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+
+
+# Access tokens keyed by credential hash.
+class TokenCache(FileCache):
+    def __init__(self, path=None):
+        if not path:
+            path = os.environ.get('FORTIFLEX_TOKEN_CACHE_PATH') or DEFAULT_TOKEN_CACHE_PATH
+        super(TokenCache, self).__init__(path)
+        self.refresh_lock_path = self.path + ".refresh.lock"
+
+    def refresh_lock(self, timeout=None):
+        # Held by the single process that renews the token for everyone.
+        # It is a separate file so that get() and set() still work while it is held.
+        return self.lock(timeout=timeout, lock_path=self.refresh_lock_path)
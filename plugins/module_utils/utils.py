@@ -10,10 +10,40 @@ from __future__ import absolute_import, division, print_function
 __metaclass__ = type
 
 import os
+import re
+import json
+import threading
+from ansible.module_utils.basic import _load_params
+from ansible.module_utils.parsing.convert_bool import boolean
+from ansible_collections.fortinet.fortiflexvm.plugins.module_utils.argument_specs import BYPASS_PRODUCT_SPECS
 from ansible_collections.fortinet.fortiflexvm.plugins.module_utils.settings import PRODUCTS
 
+# concurrent.futures is missing on Python 2 targets, the items then run one at a time.
+try:
+    from concurrent.futures import ThreadPoolExecutor
+except ImportError:
+    HAS_THREAD_POOL = False
+else:
+    HAS_THREAD_POOL = True
+
+
+# Indexes over PRODUCTS, built once at import time. They are shared, do not modify them.
+PRODUCT_NAMES = tuple(item["name"] for item in PRODUCTS)
+PRODUCTS_BY_NAME = dict((item["name"], item) for item in PRODUCTS)
+PRODUCTS_BY_ID = dict((item["id"], item) for item in PRODUCTS)
+# (product name, parameter name) -> parameter
+PARAMS_BY_NAME = dict(((item["name"], param["name"]), param) for item in PRODUCTS for param in item["parameters"])
+# parameter id -> parameter, parameter ids are unique across products
+PARAMS_BY_ID = dict((param["id"], param) for item in PRODUCTS for param in item["parameters"])
+# ids of the parameters that always have a list value
+LIST_PARAM_IDS = frozenset(param["id"] for param in PARAMS_BY_ID.values() if param["type"] == "list")
+
 
 def get_products(key="name"):
+    if key == "name":
+        return PRODUCTS_BY_NAME
+    if key == "id":
+        return PRODUCTS_BY_ID
     products = {}
     for item in PRODUCTS:
         products[item[key]] = item
@@ -21,47 +51,39 @@ def get_products(key="name"):
 
 
 def get_product_names():
-    names = []
-    for item in PRODUCTS:
-        names.append(item["name"])
-    return names
+    return PRODUCT_NAMES
 
 
 def get_param_id(product_name, param_name):
-    for item in PRODUCTS:
-        if product_name == item["name"]:
-            for param in item["parameters"]:
-                if param["name"] == param_name:
-                    return param["id"]
-    return -1
+    param = PARAMS_BY_NAME.get((product_name, param_name))
+    if param is None:
+        return -1
+    return param["id"]
 
 
 def get_param_name_by_id(id):
-    if not hasattr(get_param_name_by_id, 'param_id2name'):
-        # Initialize the static dictionary only once
-        get_param_name_by_id.param_id2name = {}
-        for item in PRODUCTS:
-            params = item["parameters"]
-            for param in params:
-                get_param_name_by_id.param_id2name[param["id"]] = param["name"]
     param_id = int(id)
-    return_name = str(param_id)
-    if param_id in get_param_name_by_id.param_id2name:
-        return_name = get_param_name_by_id.param_id2name[param_id]
-    return return_name
+    param = PARAMS_BY_ID.get(param_id)
+    if param is None:
+        return str(param_id)
+    return param["name"]
 
 
 def get_product_name_by_id(id):
-    if not hasattr(get_product_name_by_id, 'product_id2name'):
-        # Initialize the static dictionary only once
-        get_product_name_by_id.product_id2name = {}
-        for item in PRODUCTS:
-            get_product_name_by_id.product_id2name[item["id"]] = item["name"]
     product_id = int(id)
-    return_name = str(product_id)
-    if product_id in get_product_name_by_id.product_id2name:
-        return_name = get_product_name_by_id.product_id2name[product_id]
-    return return_name
+    product = PRODUCTS_BY_ID.get(product_id)
+    if product is None:
+        return str(product_id)
+    return product["name"]
+
+
+def get_product_specs(strict_specs):
+    # The argument spec of the product options: strict_specs, or BYPASS_PRODUCT_SPECS of argument_specs.py
+    # when bypass_validation is set. The choice is needed to parse the arguments, so it is read from the raw ones.
+    params = _load_params()
+    if params and boolean(params.get("bypass_validation", False), strict=False):
+        return BYPASS_PRODUCT_SPECS
+    return strict_specs
 
 
 def infer_product_type(module):
@@ -79,57 +101,104 @@ def infer_product_type(module):
     return specified_products[0]
 
 
-def transform_parameters(module, check_param=False):
-    # Get products information.
-    products = get_products(key="name")
-    product_type = infer_product_type(module)
-
-    # Tranform parameters & sanity check
-    parameters = []
-    configs = module.params[product_type]
-    param_requirements = products[product_type]["parameters"]
-
-    # Consider normal params
-    for item in param_requirements:
-        param_id = item["id"]
-        param_name = item["name"]
-        if param_name not in configs:
-            continue
-        param_value = configs[param_name]
-        if param_value is not None:
+class ProductValidator():
+    # The parameter schema of one product, compiled once: choices are frozensets, bounds are
+    # precomputed and every parameter has a fixed check for its type.
+    def __init__(self, product):
+        self.product_id = product["id"]
+        self.params = []
+        for item in product["parameters"]:
+            choices = frozenset(item["choices"]) if "choices" in item else None
             if item["type"] == "list":
+                check = self._check_list
+            elif item["type"] == "int" and ("min" in item or "max" in item):
+                check = self._check_range
+            elif item["type"] == "str" and choices is not None:
+                check = self._check_choices
+            else:
+                check = None
+            self.params.append(dict(
+                id=item["id"],
+                name=item["name"],
+                is_list=item["type"] == "list",
+                check=check,
+                choices=choices,
+                choices_text=str(item.get("choices")),
+                min=item.get("min", float("-inf")),
+                max=item.get("max", float("inf")),
+            ))
+
+    def transform(self, configs, check_param=False):
+        # Return the API parameters and every violation found, instead of stopping at the first one.
+        parameters = []
+        errors = []
+        for param in self.params:
+            param_id = param["id"]
+            param_value = configs.get(param["name"])
+            if param_value is None:
+                continue
+            if check_param and param["check"] is not None:
+                param["check"](param, param_value, errors)
+            if param["is_list"]:
                 if len(param_value) == 0:
                     parameters.append({
                         "id": param_id,
                         "value": "NONE"
                     })
                 for param_item in param_value:
-                    # Check the validation of the input "list"
-                    if check_param and "choices" in item and param_item not in item["choices"]:
-                        module.fail_json(msg="Invalid value {0} of parameter {1}. Support values: {2}".format(
-                            param_item, param_name, item["choices"]))
                     parameters.append({
                         "id": param_id,
                         "value": param_item
                     })
             else:
-                if check_param:
-                    # Check "choices" for "str".
-                    if item["type"] == "str" and "choices" in item:
-                        if param_value not in item["choices"]:
-                            module.fail_json(msg="Invalid value {0} of parameter {1}. Support values: {2}".format(
-                                param_value, param_name, item["choices"]))
-                    # Check the validation of the input "int"
-                    if item["type"] == "int" and ("min" in item or "max" in item):
-                        min_value = item["min"] if "min" in item else float("-inf")
-                        max_value = item["max"] if "max" in item else float("inf")
-                        if param_value < min_value or param_value > max_value:
-                            module.fail_json(msg="Invalid value {0} of parameter {1}. Support range: {2} ~ {3} (inclusive)".format(
-                                param_value, param_name, min_value, max_value))
                 parameters.append({
                     "id": param_id,
                     "value": param_value
                 })
+        return parameters, errors
+
+    def _check_list(self, param, param_value, errors):
+        if param["choices"] is None:
+            return
+        for param_item in param_value:
+            if param_item not in param["choices"]:
+                errors.append("Invalid value {0} of parameter {1}. Support values: {2}".format(
+                    param_item, param["name"], param["choices_text"]))
+
+    def _check_choices(self, param, param_value, errors):
+        if param_value not in param["choices"]:
+            errors.append("Invalid value {0} of parameter {1}. Support values: {2}".format(
+                param_value, param["name"], param["choices_text"]))
+
+    def _check_range(self, param, param_value, errors):
+        try:
+            in_range = param["min"] <= param_value <= param["max"]
+        except TypeError:
+            in_range = False
+        if not in_range:
+            errors.append("Invalid value {0} of parameter {1}. Support range: {2} ~ {3} (inclusive)".format(
+                param_value, param["name"], param["min"], param["max"]))
+
+
+_product_validators = {}
+
+
+def get_product_validator(product_name):
+    # Compiled on first use, then shared by every call of this process.
+    if product_name not in _product_validators:
+        _product_validators[product_name] = ProductValidator(PRODUCTS_BY_NAME[product_name])
+    return _product_validators[product_name]
+
+
+def transform_parameters(module, check_param=False):
+    product_type = infer_product_type(module)
+    validator = get_product_validator(product_type)
+
+    # Tranform parameters & sanity check
+    configs = module.params[product_type]
+    parameters, errors = validator.transform(configs, check_param)
+    if errors:
+        module.fail_json(msg=" ".join(errors))
 
     # Consider digital params
     for user_define_name in configs:
@@ -147,27 +216,28 @@ def transform_parameters(module, check_param=False):
                     "id": param_id,
                     "value": param_value
                 })
-    return parameters, products[product_type]["id"]
+    return parameters, validator.product_id
 
 
 def transform_config_output(item):
     # Trasform the format of output
     configs_response = {}
     product_type = get_product_name_by_id(item["productType"]["id"])
-    configs_response[product_type] = {}
+    product_params = configs_response[product_type] = {}
     for param in item["parameters"]:
-        param_name = get_param_name_by_id(param["id"])
-        if param_name not in configs_response[product_type]:
-            if param["id"] in [7, 12, 29, 36, 42, 43, 44, 52, 57, 58, 71, 75]:
-                configs_response[product_type][param_name] = []
-                if param["value"] != "NONE":
-                    configs_response[product_type][param_name].append(param["value"])
+        param_id = int(param["id"])
+        param_value = param["value"]
+        param_info = PARAMS_BY_ID.get(param_id)
+        param_name = param_info["name"] if param_info is not None else str(param_id)
+        if param_name not in product_params:
+            if param_id in LIST_PARAM_IDS:
+                product_params[param_name] = [] if param_value == "NONE" else [param_value]
             else:
-                configs_response[product_type][param_name] = param["value"]
-        elif isinstance(configs_response[product_type][param_name], list):
-            configs_response[product_type][param_name].append(param["value"])
+                product_params[param_name] = param_value
+        elif isinstance(product_params[param_name], list):
+            product_params[param_name].append(param_value)
         else:  # Change the format of output to list
-            configs_response[product_type][param_name] = [configs_response[product_type][param_name], param["value"]]
+            product_params[param_name] = [product_params[param_name], param_value]
     for param_name in item:
         if param_name == "productType" or param_name == "parameters":
             continue
@@ -175,6 +245,76 @@ def transform_config_output(item):
     return configs_response
 
 
+def canonical_parameters(parameters):
+    # Order-independent form of a parameters list, to compare the desired parameters with the server state.
+    # Read only parameters are ignored and values are compared as strings.
+    canonical = []
+    for param in parameters:
+        param_id = int(param["id"])
+        if PARAMS_BY_ID.get(param_id, {}).get("readonly", False):
+            continue
+        canonical.append((param_id, str(param["value"])))
+    return sorted(canonical)
+
+
+_json_decoder = json.JSONDecoder()
+_json_whitespace = re.compile(r"[ \t\n\r]*")
+
+
+def _skip_whitespace(text, index):
+    return _json_whitespace.match(text, index).end()
+
+
+def iter_json_list(text, key, others=None):
+    # Yield the elements of the list document[key] of a JSON object document one at a time,
+    # without decoding the rest of the list first. Raise ValueError if the document is invalid.
+    # The other members of the document are stored in the dict others, if given.
+    index = _skip_whitespace(text, 0)
+    if text[index:index + 1] != "{":
+        raise ValueError("Expecting a JSON object")
+    index = _skip_whitespace(text, index + 1)
+    while text[index:index + 1] != "}":
+        name, index = _json_decoder.raw_decode(text, index)
+        index = _skip_whitespace(text, index)
+        if text[index:index + 1] != ":":
+            raise ValueError("Expecting ':' at position {0}".format(index))
+        index = _skip_whitespace(text, index + 1)
+        if name == key and text[index:index + 1] == "[":
+            index = _skip_whitespace(text, index + 1)
+            while text[index:index + 1] != "]":
+                item, index = _json_decoder.raw_decode(text, index)
+                yield item
+                index = _skip_whitespace(text, index)
+                if text[index:index + 1] == ",":
+                    index = _skip_whitespace(text, index + 1)
+                elif text[index:index + 1] != "]":
+                    raise ValueError("Expecting ',' or ']' at position {0}".format(index))
+            index += 1
+        else:
+            value, index = _json_decoder.raw_decode(text, index)
+            if others is not None:
+                others[name] = value
+        index = _skip_whitespace(text, index)
+        if text[index:index + 1] == ",":
+            index = _skip_whitespace(text, index + 1)
+        elif text[index:index + 1] != "}":
+            raise ValueError("Expecting ',' or '}}' at position {0}".format(index))
+
+
+def select_fields(record, fields):
+    # Keep only the declared fields of a record, every field if fields is empty.
+    if not fields:
+        return record
+    return dict((field, record[field]) for field in fields if field in record)
+
+
+def filter_records(records, fields=None, match=None):
+    # Yield the records for which match(record) is true, reduced to fields.
+    for record in records:
+        if match is None or match(record):
+            yield select_fields(record, fields)
+
+
 def fill_auth(module):
     if not module.params["username"]:
         username = os.environ.get('FORTIFLEX_ACCESS_USERNAME')
@@ -197,3 +337,136 @@ def replace_error_msg(msg):
     import re
     pattern = r"id (\d+)"
     return re.sub(pattern, replace_id, msg)
+
+
+class BatchItemExit(Exception):
+    def __init__(self, result):
+        super(BatchItemExit, self).__init__(result.get("msg", ""))
+        self.result = result
+
+
+class BatchItemModule():
+    # Stands in for AnsibleModule while the single-item logic of a module runs for one batch item.
+    # exit_json() and fail_json() end the item instead of the whole task.
+    def __init__(self, module, params):
+        self.module = module
+        self.params = params
+        self.check_mode = module.check_mode
+
+    def exit_json(self, **kwargs):
+        raise BatchItemExit(kwargs)
+
+    def fail_json(self, msg, **kwargs):
+        kwargs["failed"] = True
+        kwargs["msg"] = msg
+        raise BatchItemExit(kwargs)
+
+    def warn(self, warning):
+        self.module.warn(warning)
+
+
+class ThreadItemModule():
+    # Stands in for the module of a Connection shared by worker threads.
+    # fail_json() ends the batch item that the calling thread runs.
+    def __init__(self, module):
+        self.module = module
+        self.params = module.params
+        self.check_mode = module.check_mode
+        self.local = threading.local()
+
+    def fail_json(self, msg, **kwargs):
+        item_module = getattr(self.local, "item_module", None)
+        if item_module is None:
+            self.module.fail_json(msg=msg, **kwargs)
+        item_module.fail_json(msg, **kwargs)
+
+    def warn(self, warning):
+        self.module.warn(warning)
+
+
+class PluginModuleError(Exception):
+    pass
+
+
+class PluginModule():
+    # Stands in for AnsibleModule when a controller plugin (inventory, lookup) uses a Connection.
+    # fail_json() raises PluginModuleError, which the plugin reports as an AnsibleError.
+    def __init__(self, params, warn=None):
+        self.params = params
+        self.check_mode = False
+        self._warn = warn
+
+    def fail_json(self, msg, **kwargs):
+        response = kwargs.get("response")
+        if response:
+            msg = "{0}: {1}".format(msg, response.get("message") or response)
+        raise PluginModuleError(msg)
+
+    def warn(self, warning):
+        if self._warn is not None:
+            self._warn(warning)
+
+
+def _run_item(module, connection, run_item, params):
+    item_module = BatchItemModule(module, params)
+    if isinstance(connection.module, ThreadItemModule):
+        connection.module.local.item_module = item_module
+    else:
+        connection.module = item_module
+    try:
+        run_item(item_module, connection)
+        result = {}
+    except BatchItemExit as e:
+        result = e.result
+    finally:
+        if isinstance(connection.module, ThreadItemModule):
+            connection.module.local.item_module = None
+        else:
+            connection.module = module
+    result.setdefault("changed", False)
+    result.setdefault("failed", False)
+    return result
+
+
+def run_items(module, connection, run_item, params_list, workers=1):
+    # Run run_item(item_module, connection) for every params dict of params_list on one connection
+    # and return the results in the same order. Requests that fail inside Connection only fail their item.
+    # With workers > 1 the items run on a pool of that many threads sharing the connection.
+    if workers <= 1 or len(params_list) <= 1 or not HAS_THREAD_POOL:
+        return [_run_item(module, connection, run_item, params) for params in params_list]
+    if connection.persistent_connection is None:
+        # Create the keep-alive session before the threads race to do it.
+        connection.get_http_session()
+    connection.module = ThreadItemModule(module)
+    try:
+        with ThreadPoolExecutor(max_workers=min(workers, len(params_list))) as executor:
+            return list(executor.map(lambda params: _run_item(module, connection, run_item, params), params_list))
+    finally:
+        connection.module = module
+
+
+def exit_batch(module, results):
+    changed = any(result["changed"] for result in results)
+    failed_count = len([result for result in results if result["failed"]])
+    if failed_count:
+        module.fail_json(msg="{0} of {1} items failed.".format(failed_count, len(results)),
+                         changed=changed, results=results)
+    module.exit_json(changed=changed, results=results)
+
+
+def run_batch(module, connection, run_item, batch_key="batch", workers=1):
+    # Run run_item(item_module, connection) for every element of module.params[batch_key] on one
+    # connection, and exit with per-item results shaped like the results of an Ansible loop.
+    params_list = []
+    for item in module.params[batch_key]:
+        params = dict(module.params)
+        del params[batch_key]
+        for key in item:
+            if item[key] is not None:
+                params[key] = item[key]
+        params_list.append(params)
+    results = run_items(module, connection, run_item, params_list, workers)
+    for item, result in zip(module.params[batch_key], results):
+        result["item"] = item
+        result["ansible_loop_var"] = "item"
+    exit_batch(module, results)
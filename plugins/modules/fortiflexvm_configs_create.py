@@ -30,6 +30,24 @@ options:
         description:
             - The password to authenticate. If not declared, the code will read the environment variable FORTIFLEX_ACCESS_PASSWORD.
         type: str
+    connect_timeout:
+        description:
+            - Seconds to wait for a connection to FortiFlex to be established.
+            - If not declared, the code will read the environment variable FORTIFLEX_CONNECT_TIMEOUT. The default is 10.
+        type: float
+        version_added: 2.4.0
+    read_timeout:
+        description:
+            - Seconds to wait for FortiFlex to send a response.
+            - If not declared, the code will read the environment variable FORTIFLEX_READ_TIMEOUT. The default is 120.
+        type: float
+        version_added: 2.4.0
+    task_timeout:
+        description:
+            - Overall time limit of the task in seconds, including login, retries and every request the task sends.
+            - If not declared, the code will read the environment variable FORTIFLEX_TASK_TIMEOUT. No limit by default.
+        type: float
+        version_added: 2.4.0
     accountId:
         description: Account ID.
         type: int
@@ -57,6 +75,24 @@ options:
         type: bool
         default: false
         version_added: 2.0.0
+    reuse_existing:
+        description:
+            - Look for an equivalent configuration in the program before creating one.
+            - C(never) always creates a new configuration.
+            - C(name) reuses a configuration with the same name.
+            - C(parameters) reuses a configuration with the same product type and parameters, whatever its name.
+            - C(name_and_parameters) reuses a configuration with the same name, product type and parameters.
+            - When an equivalent configuration exists, it is returned with changed=false and nothing is created.
+              ACTIVE configurations are preferred.
+            - Parameters are compared in any order, read only parameters are ignored. Parameters you don't declare
+              are compared with the values returned by FortiFlex, so declare every parameter of the configuration.
+            - The configurations of a program are listed once and cached for all tasks of the run,
+              see the environment variables FORTIFLEX_CONFIGS_CACHE_TTL and FORTIFLEX_CONFIGS_CACHE_PATH.
+              A configuration found in the cache is confirmed in a fresh listing before it is reused.
+        type: str
+        choices: ["never", "name", "parameters", "name_and_parameters"]
+        default: never
+        version_added: 2.4.0
     fortiGateBundle:
         description:
             - FortiGate Virtual Machine - Service Bundle.
@@ -663,6 +699,10 @@ EXAMPLES = """
         # It is only for debugging purposes, not recommended to set it as true since the rules in FortiFlexVM Ansible may be outdated.
         check_parameters: false
 
+        # Return an existing configuration with the same name and parameters instead of creating a new one.
+        # "never" (default), "name", "parameters" or "name_and_parameters".
+        reuse_existing: "name_and_parameters"
+
         # Please only use one of the following.
         fortiGateBundle:
           cpu: 2                              # 1 ~ 96
@@ -1371,8 +1411,9 @@ configs:
 """
 
 from ansible.module_utils.basic import AnsibleModule
-from ansible.module_utils.basic import _load_params
 from ansible_collections.fortinet.fortiflexvm.plugins.module_utils import utils
+from ansible_collections.fortinet.fortiflexvm.plugins.module_utils import configs_cache
+from ansible_collections.fortinet.fortiflexvm.plugins.module_utils.argument_specs import CONFIG_PRODUCT_SPECS
 from ansible_collections.fortinet.fortiflexvm.plugins.module_utils.connection import Connection
 
 
@@ -1380,37 +1421,39 @@ def get_module_args():
     module_args = dict(
         username=dict(type="str", required=False),
         password=dict(type="str", required=False, no_log=True),
+        connect_timeout=dict(type="float"),
+        read_timeout=dict(type="float"),
+        task_timeout=dict(type="float"),
         accountId=dict(type='int', required=False),
         programSerialNumber=dict(type="str", required=True),
         name=dict(type="str", required=True),
         bypass_validation=dict(type="bool", required=False, default=False),
         check_parameters=dict(type="bool", required=False, default=False),
+        reuse_existing=dict(type="str", required=False, default="never",
+                            choices=["never", "name", "parameters", "name_and_parameters"]),
     )
 
-    # Get product-specific parameters
-    products = utils.get_products(key="name")
-    ignore_validation = False
-    params = _load_params()
-    if params and 'bypass_validation' in params and params['bypass_validation'] is True:
-        ignore_validation = True
-    for product_name in products:
-        if ignore_validation:
-            module_args[product_name] = {"type": "dict", "required": False}
-        else:
-            product_dict = {"type": "dict", "required": False, "options": {}}
-            for param in products[product_name]["parameters"]:
-                if param.get("readonly", False):
-                    continue
-                param_details = dict(type=param["type"], required=param["required"])
-                if "default" in param:
-                    param_details["default"] = param["default"]
-                if "elements" in param:
-                    param_details["elements"] = param["elements"]
-                product_dict["options"][param["name"]] = param_details
-            module_args[product_name] = product_dict
+    # Product-specific parameters, checked by AnsibleModule unless bypass_validation is set
+    module_args.update(utils.get_product_specs(CONFIG_PRODUCT_SPECS))
     return module_args
 
 
+def find_existing_config(connection, data, reuse_existing):
+    # A miss in the cached listing creates the config, which is safe. A match skips the create,
+    # so it is confirmed in a fresh listing.
+    for refresh in (False, True):
+        index = configs_cache.index_configs(connection, data["programSerialNumber"], data.get("accountId"), refresh=refresh)
+        if reuse_existing == "name":
+            existing = index.find(name=data["name"])
+        elif reuse_existing == "parameters":
+            existing = index.find(product_type_id=data["productTypeId"], parameters=data["parameters"])
+        else:
+            existing = index.find(name=data["name"], product_type_id=data["productTypeId"], parameters=data["parameters"])
+        if existing is None:
+            return None
+    return existing
+
+
 def main():
     # Define module arguments
     module_args = get_module_args()
@@ -1432,8 +1475,10 @@ def main():
     if module.params["accountId"]:
         data["accountId"] = module.params["accountId"]
 
+    reuse_existing = module.params["reuse_existing"]
+
     # Check mode
-    if module.check_mode:
+    if module.check_mode and reuse_existing == "never":
         module.exit_json(changed=True,
                          input_params=module.params,
                          send_data=data)
@@ -1441,8 +1486,19 @@ def main():
     # Create connection
     connection = Connection(module, module.params["username"], module.params["password"])
 
+    # Return an equivalent configuration instead of creating a new one
+    if reuse_existing != "never":
+        existing = find_existing_config(connection, data, reuse_existing)
+        if existing is not None:
+            module.exit_json(changed=False, configs=utils.transform_config_output(existing))
+        if module.check_mode:
+            module.exit_json(changed=True,
+                             input_params=module.params,
+                             send_data=data)
+
     # Send request to create a VM configuration
     response = connection.send_request("fortiflex/v2/configs/create", data, method="POST")
+    configs_cache.store_config(connection, data["programSerialNumber"], data.get("accountId"), response["configs"])
 
     # Trasform the format of output data
     response["configs"] = utils.transform_config_output(response["configs"])
@@ -30,6 +30,24 @@ options:
         description:
             - The password to authenticate. If not declared, the code will read the environment variable FORTIFLEX_ACCESS_PASSWORD.
         type: str
+    connect_timeout:
+        description:
+            - Seconds to wait for a connection to FortiFlex to be established.
+            - If not declared, the code will read the environment variable FORTIFLEX_CONNECT_TIMEOUT. The default is 10.
+        type: float
+        version_added: 2.4.0
+    read_timeout:
+        description:
+            - Seconds to wait for FortiFlex to send a response.
+            - If not declared, the code will read the environment variable FORTIFLEX_READ_TIMEOUT. The default is 120.
+        type: float
+        version_added: 2.4.0
+    task_timeout:
+        description:
+            - Overall time limit of the task in seconds, including login, retries and every request the task sends.
+            - If not declared, the code will read the environment variable FORTIFLEX_TASK_TIMEOUT. No limit by default.
+        type: float
+        version_added: 2.4.0
     accountId:
         description: Account ID.
         type: int
@@ -38,6 +56,19 @@ options:
             - The serial number of the program to get configs for.
         type: str
         required: true
+    status:
+        description: Filter option. Only return the configurations with one of these statuses, "ACTIVE" or "DISABLED".
+        type: list
+        elements: str
+        version_added: 2.4.0
+    fields:
+        description:
+            - Only return these fields of every configuration, for example C(id), C(name) and C(status).
+            - The configurations are reduced while the response is decoded, only the selected data is kept.
+            - If not declared, every field is returned.
+        type: list
+        elements: str
+        version_added: 2.4.0
 """
 
 EXAMPLES = """
@@ -610,8 +641,13 @@ def main():
     module_args = dict(
         username=dict(type="str"),
         password=dict(type="str", no_log=True),
+        connect_timeout=dict(type="float"),
+        read_timeout=dict(type="float"),
+        task_timeout=dict(type="float"),
         accountId=dict(type="int"),
         programSerialNumber=dict(type="str", required=True),
+        status=dict(type="list", elements="str"),
+        fields=dict(type="list", elements="str"),
     )
 
     # Initialize AnsibleModule object
@@ -627,11 +663,13 @@ def main():
     data = {"programSerialNumber": module.params["programSerialNumber"]}
     if module.params["accountId"]:
         data["accountId"] = module.params["accountId"]
-    response = connection.send_request("fortiflex/v2/configs/list", data, method="POST")
+    response = {}
+    configs = connection.iter_response_items("fortiflex/v2/configs/list", data, "configs", method="POST", others=response)
 
     # Trasform the format of output data
-    for i in range(len(response["configs"])):
-        response["configs"][i] = utils.transform_config_output(response["configs"][i])
+    status = module.params["status"]
+    configs = (utils.transform_config_output(config) for config in configs if not status or config.get("status") in status)
+    response["configs"] = list(utils.filter_records(configs, module.params["fields"]))
 
     # Exit with response data
     module.exit_json(changed=False, **response)
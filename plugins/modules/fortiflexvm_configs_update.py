@@ -30,6 +30,24 @@ options:
         description:
             - The password to authenticate. If not declared, the code will read the environment variable FORTIFLEX_ACCESS_PASSWORD.
         type: str
+    connect_timeout:
+        description:
+            - Seconds to wait for a connection to FortiFlex to be established.
+            - If not declared, the code will read the environment variable FORTIFLEX_CONNECT_TIMEOUT. The default is 10.
+        type: float
+        version_added: 2.4.0
+    read_timeout:
+        description:
+            - Seconds to wait for FortiFlex to send a response.
+            - If not declared, the code will read the environment variable FORTIFLEX_READ_TIMEOUT. The default is 120.
+        type: float
+        version_added: 2.4.0
+    task_timeout:
+        description:
+            - Overall time limit of the task in seconds, including login, retries and every request the task sends.
+            - If not declared, the code will read the environment variable FORTIFLEX_TASK_TIMEOUT. No limit by default.
+        type: float
+        version_added: 2.4.0
     id:
         description:
             - The ID of the configuration you want to update.
@@ -44,6 +62,21 @@ options:
             - Active of disable the configuration.
         type: str
         choices: ["ACTIVE", "DISABLED"]
+    programSerialNumber:
+        description:
+            - The serial number of the program the configuration belongs to.
+            - If declared, the module compares the current configuration with the declared name, status and parameters,
+              and only sends the requests that change something. Otherwise the configuration is always updated.
+            - The configurations of the program are listed before every comparison, a cached listing is never used
+              to decide whether to update. The listing refreshes the cache used by the other modules,
+              see the environment variables FORTIFLEX_CONFIGS_CACHE_TTL and FORTIFLEX_CONFIGS_CACHE_PATH.
+        type: str
+        version_added: 2.4.0
+    accountId:
+        description:
+            - Account ID, used with programSerialNumber to list the configurations of the program.
+        type: int
+        version_added: 2.4.0
     bypass_validation:
         description:
             - Only set to True when module schema diffs with FortiFlex API structure, module continues to execute without validating parameters.
@@ -655,6 +688,9 @@ EXAMPLES = """
         name: "ansible_modify"
         status: "DISABLED" # ACTIVE or DISABLED
 
+        # Optional. Declare it to only update the configuration when something differs.
+        # programSerialNumber: "ELAVMS00XXXXX"
+
         # If FortiFlex API supports new params while FortiFlex Ansible does not support them yet,
         # you can set bypass_validation: true. The FortiFlex Ansible will allow you to use new param
         # without perforam any sanity check. The default value is false.
@@ -835,6 +871,19 @@ EXAMPLES = """
 """
 
 RETURN = """
+diff:
+    description: The configuration before and after the update. Only when programSerialNumber is declared.
+    type: dict
+    returned: when programSerialNumber is declared
+    contains:
+        before:
+            description: The current configuration.
+            type: dict
+            returned: always
+        after:
+            description: The configuration after the update.
+            type: dict
+            returned: always
 configs:
     description: The configuration you update.
     type: dict
@@ -1375,8 +1424,9 @@ configs:
 """
 
 from ansible.module_utils.basic import AnsibleModule
-from ansible.module_utils.basic import _load_params
 from ansible_collections.fortinet.fortiflexvm.plugins.module_utils import utils
+from ansible_collections.fortinet.fortiflexvm.plugins.module_utils import configs_cache
+from ansible_collections.fortinet.fortiflexvm.plugins.module_utils.argument_specs import CONFIG_PRODUCT_SPECS
 from ansible_collections.fortinet.fortiflexvm.plugins.module_utils.connection import Connection
 
 
@@ -1385,37 +1435,66 @@ def get_module_args():
     module_args = dict(
         username=dict(type="str"),
         password=dict(type="str", no_log=True),
+        connect_timeout=dict(type="float"),
+        read_timeout=dict(type="float"),
+        task_timeout=dict(type="float"),
         id=dict(type="int", required=True),
         status=dict(type="str", choices=["ACTIVE", "DISABLED"]),
         name=dict(type="str"),
+        programSerialNumber=dict(type="str"),
+        accountId=dict(type="int"),
         bypass_validation=dict(type="bool", default=False),
         check_parameters=dict(type="bool", default=False),
     )
 
-    # Get product-specific parameters
-    products = utils.get_products(key="name")
-    ignore_validation = False
-    params = _load_params()
-    if params and "bypass_validation" in params and params["bypass_validation"] is True:
-        ignore_validation = True
-    for product_name in products:
-        if ignore_validation:
-            module_args[product_name] = {"type": "dict", "required": False}
-        else:
-            product_dict = {"type": "dict", "required": False, "options": {}}
-            for param in products[product_name]["parameters"]:
-                if param.get("readonly", False):
-                    continue
-                param_details = dict(type=param["type"], required=param["required"])
-                if "default" in param:
-                    param_details["default"] = param["default"]
-                if "elements" in param:
-                    param_details["elements"] = param["elements"]
-                product_dict["options"][param["name"]] = param_details
-            module_args[product_name] = product_dict
+    # Product-specific parameters, checked by AnsibleModule unless bypass_validation is set
+    module_args.update(utils.get_product_specs(CONFIG_PRODUCT_SPECS))
     return module_args
 
 
+def get_target_config(module, current_config, parameters, product_id):
+    # The configuration as it will be after the update, in API format.
+    target_config = dict(current_config)
+    if parameters is not None:
+        target_config["productType"] = {"id": product_id}
+        target_config["parameters"] = parameters
+        if module.params["name"] is not None:
+            target_config["name"] = module.params["name"]
+    if module.params["status"]:
+        target_config["status"] = module.params["status"]
+    return target_config
+
+
+def config_params_differ(current_config, target_config):
+    if current_config["name"] != target_config["name"]:
+        return True
+    if current_config["productType"]["id"] != target_config["productType"]["id"]:
+        return True
+    return utils.canonical_parameters(current_config["parameters"]) != utils.canonical_parameters(target_config["parameters"])
+
+
+def update_config(module, connection, data, current_status, transform_output=True):
+    response = {}
+
+    # update the configuration
+    if data:
+        response = connection.send_request("fortiflex/v2/configs/update", data, method="POST")
+        current_status = response["configs"]["status"]
+
+    # active or stop the configuration
+    if module.params["status"] and module.params["status"] != current_status:
+        data = {"id": module.params["id"]}
+        if module.params["status"] == "ACTIVE":
+            response = connection.send_request("fortiflex/v2/configs/enable", data, method="POST")
+        elif module.params["status"] == "DISABLED":
+            response = connection.send_request("fortiflex/v2/configs/disable", data, method="POST")
+
+    # Trasform the format of output data
+    if transform_output:
+        response["configs"] = utils.transform_config_output(response["configs"])
+    return response
+
+
 def main():
     # Define module arguments
     module_args = get_module_args()
@@ -1427,7 +1506,7 @@ def main():
     )
 
     # Prepare data to send
-    parameters, data = None, None
+    parameters, data, product_id = None, None, None
     for product_name in utils.get_product_names():
         if module.params[product_name] is not None:
             parameters, product_id = utils.transform_parameters(module)
@@ -1437,36 +1516,41 @@ def main():
                 "parameters": parameters
             }
 
-    # Check mode
-    if module.check_mode:
-        module.exit_json(changed=True,
-                         input_params=module.params,
-                         send_data=data)
+    # Without the program, the current configuration is unknown: always update.
+    if not module.params["programSerialNumber"]:
+        # Check mode
+        if module.check_mode:
+            module.exit_json(changed=True,
+                             input_params=module.params,
+                             send_data=data)
+        connection = Connection(module, module.params["username"], module.params["password"])
+        response = update_config(module, connection, data, "UNKNOWN")
+        module.exit_json(changed=True, **response)
 
-    # Create connection
+    # Compare the declared configuration with the current one, from a fresh listing since it decides the write.
     connection = Connection(module, module.params["username"], module.params["password"])
+    current_config = configs_cache.find_config(connection, module.params["programSerialNumber"],
+                                               module.params["accountId"], module.params["id"], fresh=True)
+    if current_config is None:
+        module.fail_json(msg="Can't find configuration {0} in program {1}.".format(
+            module.params["id"], module.params["programSerialNumber"]))
+    target_config = get_target_config(module, current_config, parameters, product_id)
+    if data and not config_params_differ(current_config, target_config):
+        data = None
+    diff = dict(before=utils.transform_config_output(current_config),
+                after=utils.transform_config_output(target_config))
+    if not data and target_config["status"] == current_config["status"]:
+        module.exit_json(changed=False, configs=diff["before"], diff=diff)
 
-    response = {}
-    current_status = "UNKNOWN"
-
-    # update the configuration
-    if data:
-        response = connection.send_request("fortiflex/v2/configs/update", data, method="POST")
-        current_status = response["configs"]["status"]
-
-    # active or stop the configuration
-    if module.params["status"] and module.params["status"] != current_status:
-        data = {"id": module.params["id"]}
-        if module.params["status"] == "ACTIVE":
-            response = connection.send_request("fortiflex/v2/configs/enable", data, method="POST")
-        elif module.params["status"] == "DISABLED":
-            response = connection.send_request("fortiflex/v2/configs/disable", data, method="POST")
+    # Check mode
+    if module.check_mode:
+        module.exit_json(changed=True, input_params=module.params, send_data=data, diff=diff)
 
-    # Trasform the format of output data
+    response = update_config(module, connection, data, current_config["status"], transform_output=False)
+    configs_cache.store_config(connection, module.params["programSerialNumber"], module.params["accountId"],
+                               response["configs"])
     response["configs"] = utils.transform_config_output(response["configs"])
-
-    # Exit with response data
-    module.exit_json(changed=True, **response)
+    module.exit_json(changed=True, diff=diff, **response)
 
 
 if __name__ == "__main__":
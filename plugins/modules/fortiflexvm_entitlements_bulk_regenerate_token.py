@@ -0,0 +1,265 @@
+#!/usr/bin/python
+
+# Copyright: (c) 2023 Fortinet
+# GNU General Public License v3.0+ (see LICENSE or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+DOCUMENTATION = """
+---
+module: fortiflexvm_entitlements_bulk_regenerate_token
+short_description: Regenerate the tokens of many VM entitlements concurrently.
+description:
+    - This module regenerates the tokens of a large number of VM entitlements in one task.
+    - The requests run on a bounded pool of workers that share a single login and connection pool.
+    - Every new token is appended to output_file as soon as it is received, as one JSON object per line
+      with the keys serialNumber and token. The tokens are not returned by the module.
+    - An interrupted task can be run again with the same output_file and resume set to true, the serial numbers
+      already in the file are then skipped.
+version_added: "2.4.0"
+author:
+    - Xinwei Du (@dux-fortinet)
+options:
+    username:
+        description:
+            - The username to authenticate. If not declared, the code will read the environment variable FORTIFLEX_ACCESS_USERNAME.
+        type: str
+    password:
+        description:
+            - The password to authenticate. If not declared, the code will read the environment variable FORTIFLEX_ACCESS_PASSWORD.
+        type: str
+    connect_timeout:
+        description:
+            - Seconds to wait for a connection to FortiFlex to be established.
+            - If not declared, the code will read the environment variable FORTIFLEX_CONNECT_TIMEOUT. The default is 10.
+        type: float
+    read_timeout:
+        description:
+            - Seconds to wait for FortiFlex to send a response.
+            - If not declared, the code will read the environment variable FORTIFLEX_READ_TIMEOUT. The default is 120.
+        type: float
+    task_timeout:
+        description:
+            - Overall time limit of the task in seconds, including login, retries and every request the task sends.
+            - If not declared, the code will read the environment variable FORTIFLEX_TASK_TIMEOUT. No limit by default.
+        type: float
+    serialNumbers:
+        description:
+            - The serial numbers of the entitlements.
+            - At least one of serialNumbers or serial_numbers_file should be provided.
+        type: list
+        elements: str
+    serial_numbers_file:
+        description:
+            - A file with one serial number per line. Empty lines and lines starting with C(#) are ignored.
+        type: path
+    output_file:
+        description:
+            - The file the new tokens are written to, in JSON Lines format. It is created with mode 0600.
+        type: path
+        required: true
+    resume:
+        description:
+            - Keep the tokens already in output_file and skip their serial numbers. Only set it to continue an
+              interrupted task, since the tokens of an earlier run would be kept and not regenerated.
+            - If set to false, output_file is emptied first and every token is regenerated.
+        type: bool
+        default: false
+    workers:
+        description:
+            - The maximum number of requests sent at the same time.
+        type: int
+        default: 10
+"""
+
+EXAMPLES = """
+- name: Regenerate tokens in bulk
+  hosts: localhost
+  vars:
+    username: "<your_own_value>"
+    password: "<your_own_value>"
+  tasks:
+    - name: Regenerate the tokens of every serial number of a file
+      fortinet.fortiflexvm.fortiflexvm_entitlements_bulk_regenerate_token:
+        username: "{{ username }}"
+        password: "{{ password }}"
+        serial_numbers_file: "serial_numbers.txt"
+        output_file: "tokens.jsonl"
+        workers: 10
+      register: result
+
+    - name: Display response
+      ansible.builtin.debug:
+        var: result
+"""
+
+RETURN = """
+output_file:
+    description: The file the tokens are written to.
+    type: str
+    returned: always
+regenerated:
+    description: The number of tokens regenerated by this task.
+    type: int
+    returned: always
+skipped:
+    description: The number of serial numbers skipped because output_file already has their token.
+    type: int
+    returned: always
+failed_serial_numbers:
+    description: The serial numbers whose token could not be regenerated, and why.
+    type: list
+    elements: dict
+    returned: always
+    contains:
+        serialNumber:
+            description: The serial number.
+            type: str
+            returned: always
+        msg:
+            description: The error message.
+            type: str
+            returned: always
+"""
+
+import os
+import json
+import threading
+from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.fortinet.fortiflexvm.plugins.module_utils import utils
+from ansible_collections.fortinet.fortiflexvm.plugins.module_utils.connection import Connection
+
+
+def read_serial_numbers(module):
+    serial_numbers = list(module.params["serialNumbers"] or [])
+    if module.params["serial_numbers_file"]:
+        try:
+            with open(module.params["serial_numbers_file"], "r") as f:
+                for line in f:
+                    line = line.strip()
+                    if line and not line.startswith("#"):
+                        serial_numbers.append(line)
+        except (IOError, OSError) as e:
+            module.fail_json(msg="Failed to read {0}: {1}".format(module.params["serial_numbers_file"], e))
+    # Keep the first occurrence of every serial number
+    seen = set()
+    return [serial_number for serial_number in serial_numbers if not (serial_number in seen or seen.add(serial_number))]
+
+
+def read_completed(path):
+    # The serial numbers already in the output file. A line cut by an interruption is ignored.
+    completed = set()
+    try:
+        with open(path, "r") as f:
+            for line in f:
+                try:
+                    completed.add(json.loads(line)["serialNumber"])
+                except (ValueError, TypeError, KeyError):
+                    continue
+    except (IOError, OSError):
+        pass
+    return completed
+
+
+class TokenWriter():
+    # Appends one line per token and flushes it, so the tokens received survive an interruption.
+    def __init__(self, path, truncate=False):
+        flags = os.O_WRONLY | os.O_CREAT | (os.O_TRUNC if truncate else os.O_APPEND)
+        self.file = os.fdopen(os.open(path, flags, 0o600), "a")
+        self.lock = threading.Lock()
+        # Start on a new line after a line cut by an interruption
+        if not truncate and os.path.getsize(path) > 0:
+            with open(path, "rb") as f:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    self.file.write("\n")
+
+    def write(self, serial_number, token):
+        line = json.dumps({"serialNumber": serial_number, "token": token}) + "\n"
+        with self.lock:
+            self.file.write(line)
+            self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+def regenerate_token(module, connection, writer):
+    serial_number = module.params["serialNumber"]
+    response = connection.send_request("fortiflex/v2/entitlements/vm/token", {"serialNumber": serial_number}, method="POST")
+    entitlements = response.get("entitlements") or []
+    if not entitlements or "token" not in entitlements[0]:
+        module.fail_json(msg="FortiFlex didn't return a token.")
+    writer.write(serial_number, entitlements[0]["token"])
+    module.exit_json(changed=True)
+
+
+def main():
+    # Define module arguments
+    module_args = dict(
+        username=dict(type="str"),
+        password=dict(type="str", no_log=True),
+        connect_timeout=dict(type="float"),
+        read_timeout=dict(type="float"),
+        task_timeout=dict(type="float"),
+        serialNumbers=dict(type="list", elements="str"),
+        serial_numbers_file=dict(type="path"),
+        output_file=dict(type="path", required=True),
+        resume=dict(type="bool", default=False),
+        workers=dict(type="int", default=10),
+    )
+
+    # Initialize AnsibleModule object
+    module = AnsibleModule(
+        argument_spec=module_args,
+        required_one_of=[["serialNumbers", "serial_numbers_file"]],
+        supports_check_mode=True
+    )
+    if module.params["workers"] < 1:
+        module.fail_json(msg="workers should be at least 1.")
+
+    # Skip the serial numbers whose token is already in the output file
+    output_file = module.params["output_file"]
+    serial_numbers = read_serial_numbers(module)
+    completed = read_completed(output_file) if module.params["resume"] else set()
+    pending = [serial_number for serial_number in serial_numbers if serial_number not in completed]
+    skipped = len(serial_numbers) - len(pending)
+
+    # Check mode
+    if module.check_mode or not pending:
+        module.exit_json(changed=bool(pending), output_file=output_file, regenerated=0, skipped=skipped,
+                         failed_serial_numbers=[])
+
+    # Create connection, with one pooled HTTP connection per worker
+    connection = Connection(module, module.params["username"], module.params["password"],
+                            pool_size=module.params["workers"])
+
+    try:
+        writer = TokenWriter(output_file, truncate=not module.params["resume"])
+    except (IOError, OSError) as e:
+        module.fail_json(msg="Failed to open {0}: {1}".format(output_file, e))
+    try:
+        results = utils.run_items(module, connection, lambda item_module, item_connection: regenerate_token(
+            item_module, item_connection, writer), [{"serialNumber": serial_number} for serial_number in pending],
+            module.params["workers"])
+    finally:
+        writer.close()
+
+    failed = [dict(serialNumber=serial_number, msg=result["msg"])
+              for serial_number, result in zip(pending, results) if result["failed"]]
+    response = dict(changed=len(failed) < len(pending), output_file=output_file, regenerated=len(pending) - len(failed),
+                    skipped=skipped, failed_serial_numbers=failed)
+    if failed:
+        module.fail_json(msg="{0} of {1} tokens failed.".format(len(failed), len(pending)), **response)
+    module.exit_json(**response)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,313 @@
+#!/usr/bin/python
+
+# Copyright: (c) 2023 Fortinet
+# GNU General Public License v3.0+ (see LICENSE or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+DOCUMENTATION = """
+---
+module: fortiflexvm_entitlements_bulk_update
+short_description: Update many existing entitlements concurrently.
+description:
+    - This module updates a large number of existing entitlements in one task.
+    - The current state of the entitlements is fetched with one entitlements/list request per configId.
+      Only the requests that change something are sent.
+    - The requests run on a bounded pool of workers that share a single login and connection pool.
+    - Each item is reported separately, a failed item doesn't stop the others.
+version_added: "2.4.0"
+author:
+    - Xinwei Du (@dux-fortinet)
+options:
+    username:
+        description:
+            - The username to authenticate. If not declared, the code will read the environment variable FORTIFLEX_ACCESS_USERNAME.
+        type: str
+    password:
+        description:
+            - The password to authenticate. If not declared, the code will read the environment variable FORTIFLEX_ACCESS_PASSWORD.
+        type: str
+    connect_timeout:
+        description:
+            - Seconds to wait for a connection to FortiFlex to be established.
+            - If not declared, the code will read the environment variable FORTIFLEX_CONNECT_TIMEOUT. The default is 10.
+        type: float
+    read_timeout:
+        description:
+            - Seconds to wait for FortiFlex to send a response.
+            - If not declared, the code will read the environment variable FORTIFLEX_READ_TIMEOUT. The default is 120.
+        type: float
+    task_timeout:
+        description:
+            - Overall time limit of the task in seconds, including login, retries and every request the task sends.
+            - If not declared, the code will read the environment variable FORTIFLEX_TASK_TIMEOUT. No limit by default.
+        type: float
+    workers:
+        description:
+            - The maximum number of requests sent at the same time.
+        type: int
+        default: 10
+    configId:
+        description:
+            - The ID of the configuration of the entitlements, used for the items that don't declare it.
+        type: int
+    description:
+        description:
+            - The description of the entitlements, used for the items that don't declare it.
+        type: str
+    endDate:
+        description:
+            - The end date of the entitlements' validity, used for the items that don't declare it.
+            - Any format that satisfies [ISO 8601](https://www.w3.org/TR/NOTE-datetime-970915.html) is accepted.
+        type: str
+    status:
+        description:
+            - The status of the entitlements, used for the items that don't declare it.
+        type: str
+        choices: ["ACTIVE", "STOPPED"]
+    items:
+        description:
+            - The entitlements to update, each serialNumber can only be declared once.
+            - configId is needed to update description or endDate, and to find out whether the entitlement needs to change.
+              Without configId, only the status is changed and the item is always reported as changed.
+        type: list
+        elements: dict
+        required: true
+        suboptions:
+            serialNumber:
+                description:
+                    - The serial number of the entitlement to update.
+                type: str
+                required: true
+            configId:
+                description:
+                    - The ID of the configuration of the entitlement.
+                type: int
+            description:
+                description:
+                    - The description of the entitlement.
+                type: str
+            endDate:
+                description:
+                    - The end date of the entitlement's validity.
+                type: str
+            status:
+                description:
+                    - The status of the entitlement.
+                type: str
+                choices: ["ACTIVE", "STOPPED"]
+"""
+
+EXAMPLES = """
+- name: Update entitlements in bulk
+  hosts: localhost
+  vars:
+    username: "<your_own_value>"
+    password: "<your_own_value>"
+  tasks:
+    - name: Set the end date of many entitlements.
+      fortinet.fortiflexvm.fortiflexvm_entitlements_bulk_update:
+        username: "{{ username }}"
+        password: "{{ password }}"
+        workers: 10
+        configId: 12345
+        endDate: "2024-12-12T00:00:00"
+        items:
+          - serialNumber: "FGVMXXXX00000000"
+            description: "Modify through Ansible"
+          - serialNumber: "FGVMXXXX00000001"
+            status: "STOPPED"
+          - serialNumber: "FGVMXXXX00000002"
+            configId: 12346
+      register: result
+
+    - name: Display response
+      ansible.builtin.debug:
+        var: result.results
+"""
+
+RETURN = """
+results:
+    description: One result per element of items, in the same order and in the same shape as the results of a loop.
+    type: list
+    elements: dict
+    returned: always
+    contains:
+        item:
+            description: The element of items.
+            type: dict
+            returned: always
+        changed:
+            description: Whether this entitlement was changed.
+            type: bool
+            returned: always
+        failed:
+            description: Whether updating this entitlement failed.
+            type: bool
+            returned: always
+        msg:
+            description: The error message.
+            type: str
+            returned: when failed
+        operations:
+            description: The requests needed to update the entitlement, "stop", "reactivate" and "update".
+            type: list
+            elements: str
+            returned: when not failed
+            sample: ["update"]
+        entitlements:
+            description: The entitlement after the update. This list only contains one entitlement.
+            type: list
+            returned: when not failed
+"""
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.fortinet.fortiflexvm.plugins.module_utils import utils
+from ansible_collections.fortinet.fortiflexvm.plugins.module_utils.connection import Connection
+
+ITEM_KEYS = ["serialNumber", "configId", "description", "endDate", "status"]
+
+
+def list_entitlements(module, connection):
+    data = {"configId": module.params["configId"]}
+    response = connection.send_request("fortiflex/v2/entitlements/list", data, method="POST")
+    module.exit_json(entitlements=response["entitlements"])
+
+
+def fetch_entitlements(module, connection, config_ids):
+    # One entitlements/list per configId, on the worker pool. A failed list only fails the items of that configId.
+    config_ids = sorted(config_ids)
+    results = utils.run_items(module, connection, list_entitlements,
+                              [{"configId": config_id} for config_id in config_ids], module.params["workers"])
+    entitlements, errors = {}, {}
+    for config_id, result in zip(config_ids, results):
+        if result["failed"]:
+            errors[config_id] = result
+            continue
+        # Keyed by configId too, an item only matches the entitlements of the configId it declares
+        for entitlement in result["entitlements"]:
+            entitlements[(config_id, entitlement["serialNumber"])] = entitlement
+    return entitlements, errors
+
+
+def plan_operations(params, entitlement):
+    # The requests that bring the entitlement to the declared state, in the order they are sent.
+    operations = []
+    if params["status"] is not None and (entitlement is None or entitlement["status"] != params["status"]):
+        operations.append("reactivate" if params["status"] == "ACTIVE" else "stop")
+    if entitlement is not None:
+        for key in ["description", "endDate"]:
+            if params[key] is not None and entitlement[key] != params[key]:
+                operations.append("update")
+                break
+    return operations
+
+
+def make_update_item(entitlements, errors):
+    def update_item(module, connection):
+        params = module.params
+        if params["configId"] is None:
+            if params["description"] is not None or params["endDate"] is not None:
+                module.fail_json(msg="Please specify configId if you want to update description or endDate")
+            entitlement = None
+        elif params["configId"] in errors:
+            module.fail_json(msg="Failed to list the entitlements of configId {0}: {1}".format(
+                params["configId"], errors[params["configId"]]["msg"]), response=errors[params["configId"]].get("response"))
+        else:
+            entitlement = entitlements.get((params["configId"], params["serialNumber"]))
+            if entitlement is None:
+                module.fail_json(msg="Can't find target entitlement. Please check serialNumber {0} and configId {1}.".format(
+                    params["serialNumber"], params["configId"]))
+
+        operations = plan_operations(params, entitlement)
+        if not operations or module.check_mode:
+            module.exit_json(changed=bool(operations), operations=operations,
+                             entitlements=[entitlement] if entitlement is not None else [])
+
+        response = {}
+        for operation in operations:
+            data = {"serialNumber": params["serialNumber"]}
+            if operation == "update":
+                for key in ["configId", "description", "endDate"]:
+                    if params[key] is not None:
+                        data[key] = params[key]
+            # Without the current state, the status may already be the declared one, which FortiFlex reports as an error.
+            response = connection.send_request("fortiflex/v2/entitlements/" + operation, data, method="POST",
+                                               check_error=entitlement is not None)
+            if entitlement is None and response.get("error", None) and "errorCode" in response["error"]:
+                module.warn("Entitlement {0} is probably already {1}. You can provide configId to bypass this error.".format(
+                    params["serialNumber"], params["status"]))
+                module.exit_json(changed=False, operations=operations, response=response, entitlements=[])
+        if "vms" in response:
+            response["entitlements"] = response.pop("vms")
+        module.exit_json(changed=True, operations=operations, entitlements=response.get("entitlements", []))
+    return update_item
+
+
+def main():
+    # Define module arguments
+    module_args = dict(
+        username=dict(type="str"),
+        password=dict(type="str", no_log=True),
+        connect_timeout=dict(type="float"),
+        read_timeout=dict(type="float"),
+        task_timeout=dict(type="float"),
+        workers=dict(type="int", default=10),
+        configId=dict(type="int"),
+        description=dict(type="str"),
+        endDate=dict(type="str"),
+        status=dict(type="str", choices=["ACTIVE", "STOPPED"]),
+        items=dict(type="list", elements="dict", required=True, options=dict(
+            serialNumber=dict(type="str", required=True),
+            configId=dict(type="int"),
+            description=dict(type="str"),
+            endDate=dict(type="str"),
+            status=dict(type="str", choices=["ACTIVE", "STOPPED"]),
+        )),
+    )
+
+    # Initialize AnsibleModule object
+    module = AnsibleModule(
+        argument_spec=module_args,
+        supports_check_mode=True
+    )
+    if module.params["workers"] < 1:
+        module.fail_json(msg="workers should be at least 1.")
+
+    # Items inherit the top-level values they don't declare
+    params_list = []
+    serial_numbers = set()
+    for item in module.params["items"]:
+        if item["serialNumber"] in serial_numbers:
+            module.fail_json(msg="serialNumber {0} is declared more than once.".format(item["serialNumber"]))
+        serial_numbers.add(item["serialNumber"])
+        params = dict((key, module.params[key]) for key in ITEM_KEYS if key != "serialNumber")
+        for key in ITEM_KEYS:
+            if item[key] is not None:
+                params[key] = item[key]
+        params_list.append(params)
+
+    # Create connection, with one pooled HTTP connection per worker
+    connection = Connection(module, module.params["username"], module.params["password"],
+                            pool_size=module.params["workers"])
+
+    # Fetch the current state, then update the entitlements that need it
+    config_ids = set(params["configId"] for params in params_list if params["configId"] is not None)
+    entitlements, errors = fetch_entitlements(module, connection, config_ids)
+    results = utils.run_items(module, connection, make_update_item(entitlements, errors),
+                              params_list, module.params["workers"])
+    for item, result in zip(module.params["items"], results):
+        result["item"] = item
+        result["ansible_loop_var"] = "item"
+    utils.exit_batch(module, results)
+
+
+if __name__ == "__main__":
+    main()
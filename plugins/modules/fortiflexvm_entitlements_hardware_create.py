@@ -32,6 +32,24 @@ options:
         description:
             - The password to authenticate. If not declared, the code will read the environment variable FORTIFLEX_ACCESS_PASSWORD.
         type: str
+    connect_timeout:
+        description:
+            - Seconds to wait for a connection to FortiFlex to be established.
+            - If not declared, the code will read the environment variable FORTIFLEX_CONNECT_TIMEOUT. The default is 10.
+        type: float
+        version_added: 2.4.0
+    read_timeout:
+        description:
+            - Seconds to wait for FortiFlex to send a response.
+            - If not declared, the code will read the environment variable FORTIFLEX_READ_TIMEOUT. The default is 120.
+        type: float
+        version_added: 2.4.0
+    task_timeout:
+        description:
+            - Overall time limit of the task in seconds, including login, retries and every request the task sends.
+            - If not declared, the code will read the environment variable FORTIFLEX_TASK_TIMEOUT. No limit by default.
+        type: float
+        version_added: 2.4.0
     configId:
         description:
             - The ID of a FortiFlex Configuration.
@@ -50,6 +68,30 @@ options:
             - Recommended format is "YYYY-MM-DDThh:mm:ss".
             - If not specify, it will use the program's end date automatically.
         type: str
+    chunk_size:
+        description:
+            - Split serialNumbers into chunks of this many serial numbers, each created by its own request.
+            - If not declared, all serial numbers are sent in one request that succeeds or fails as a unit.
+            - In chunked mode, the entitlements of all chunks are merged, and the result lists which serial numbers
+              succeeded and which failed. The task fails if any serial number failed.
+        type: int
+        version_added: 2.4.0
+    workers:
+        description:
+            - In chunked mode, the maximum number of chunks sent at the same time.
+        type: int
+        default: 10
+        version_added: 2.4.0
+    split_failed_chunks:
+        description:
+            - In chunked mode, when FortiFlex rejects a chunk because of its serial numbers, retry it without the serial
+              numbers named in the error, or as two halves down to single serial numbers if none is named,
+              so that only the serial numbers FortiFlex rejects fail.
+            - Other errors fail the whole chunk at once, for example authentication errors, throttling, server errors,
+              an invalid configId or the task timeout. See the FORTIFLEX_RETRY_* environment variables for transient errors.
+        type: bool
+        default: true
+        version_added: 2.4.0
 """
 
 EXAMPLES = """
@@ -73,6 +115,21 @@ EXAMPLES = """
     - name: Display response
       ansible.builtin.debug:
         var: result.entitlements
+
+    - name: Create hardware entitlements for a large list of serial numbers
+      fortinet.fortiflexvm.fortiflexvm_entitlements_hardware_create:
+        username: "{{ username }}"
+        password: "{{ password }}"
+        configId: 42
+        serialNumbers: "{{ lookup('ansible.builtin.file', 'serial_numbers.txt').splitlines() }}"
+        chunk_size: 500
+        workers: 10
+      register: result
+      ignore_errors: true
+
+    - name: Display the serial numbers that failed
+      ansible.builtin.debug:
+        var: result.failed_serial_numbers
 """
 
 RETURN = """
@@ -126,20 +183,128 @@ entitlements:
             type: str
             returned: always
             sample: ""
+succeeded_serial_numbers:
+    description: The serial numbers whose entitlement was created.
+    type: list
+    elements: str
+    returned: when chunk_size is declared
+failed_serial_numbers:
+    description: The serial numbers whose entitlement could not be created, and why.
+    type: list
+    elements: dict
+    returned: when chunk_size is declared
+    contains:
+        serialNumber:
+            description: The serial number.
+            type: str
+            returned: always
+        msg:
+            description: The error message.
+            type: str
+            returned: always
+        response:
+            description: The response of FortiFlex, if any.
+            type: dict
+            returned: when FortiFlex answered
 """
 
 from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.fortinet.fortiflexvm.plugins.module_utils import utils
 from ansible_collections.fortinet.fortiflexvm.plugins.module_utils.connection import Connection
 
 
+# Chunk errors that are not about the serial numbers: authentication, throttling and server errors.
+NOT_SPLIT_STATUS_CODES = (401, 403, 404, 408, 429)
+
+
+def rejected_serial_numbers(status_code, response, serial_numbers):
+    # The serial numbers that a rejected chunk should be retried without, None if the error isn't about
+    # serial numbers. An error that doesn't name them returns [] and the chunk is retried in halves.
+    if status_code >= 500 or status_code in NOT_SPLIT_STATUS_CODES:
+        return None
+    text = "{0} {1}".format(response.get("message") or "", response.get("error") or "")
+    named = [serial_number for serial_number in serial_numbers if serial_number in text]
+    if named:
+        return named
+    return [] if "serial" in text.lower() else None
+
+
+def create_serial_numbers(module, connection, serial_numbers):
+    # Return the created entitlements and the failed serial numbers of one chunk.
+    data = {"configId": module.params["configId"], "serialNumbers": serial_numbers}
+    if module.params["endDate"]:
+        data["endDate"] = module.params["endDate"]
+    try:
+        status_code, response = connection.request_status("fortiflex/v2/entitlements/hardware/create", data, method="POST")
+    except utils.BatchItemExit as e:
+        # FortiFlex could not be reached, the connection already retried what it safely could.
+        return [], [dict(serialNumber=serial_number, msg=e.result["msg"]) for serial_number in serial_numbers]
+    if status_code < 400 and not response.get("error") and "entitlements" in response:
+        return response["entitlements"], []
+
+    msg = utils.replace_error_msg(str(response.get("message") or response.get("error") or
+                                      "Request failed with status code {0}".format(status_code)))
+    rejected = rejected_serial_numbers(status_code, response, serial_numbers) if module.params["split_failed_chunks"] else None
+    if rejected and len(rejected) < len(serial_numbers):
+        # FortiFlex named the invalid serial numbers, send the others again without them.
+        entitlements, failed = create_serial_numbers(module, connection, [serial_number for serial_number in serial_numbers
+                                                                          if serial_number not in rejected])
+        return entitlements, [dict(serialNumber=serial_number, msg=msg, response=response) for serial_number in rejected] + failed
+    if rejected == [] and len(serial_numbers) > 1:
+        # FortiFlex rejects the whole chunk when one serial number is invalid, isolate it.
+        middle = len(serial_numbers) // 2
+        entitlements, failed = create_serial_numbers(module, connection, serial_numbers[:middle])
+        more_entitlements, more_failed = create_serial_numbers(module, connection, serial_numbers[middle:])
+        return entitlements + more_entitlements, failed + more_failed
+    return [], [dict(serialNumber=serial_number, msg=msg, response=response) for serial_number in serial_numbers]
+
+
+def create_chunk(module, connection):
+    entitlements, failed = create_serial_numbers(module, connection, module.params["serialNumbers"])
+    module.exit_json(changed=bool(entitlements), entitlements=entitlements, failed_serial_numbers=failed)
+
+
+def create_in_chunks(module, connection):
+    serial_numbers = module.params["serialNumbers"]
+    chunk_size = module.params["chunk_size"]
+    params_list = []
+    for i in range(0, len(serial_numbers), chunk_size):
+        params = dict(module.params)
+        params["serialNumbers"] = serial_numbers[i:i + chunk_size]
+        params_list.append(params)
+    results = utils.run_items(module, connection, create_chunk, params_list, module.params["workers"])
+
+    # Merge the chunks, in the order of serialNumbers
+    entitlements, failed = [], []
+    for params, result in zip(params_list, results):
+        if result["failed"]:
+            failed.extend(dict(serialNumber=serial_number, msg=result["msg"]) for serial_number in params["serialNumbers"])
+            continue
+        entitlements.extend(result["entitlements"])
+        failed.extend(result["failed_serial_numbers"])
+    failed_set = set(item["serialNumber"] for item in failed)
+    succeeded = [serial_number for serial_number in serial_numbers if serial_number not in failed_set]
+    response = dict(changed=bool(entitlements), entitlements=entitlements,
+                    succeeded_serial_numbers=succeeded, failed_serial_numbers=failed)
+    if failed:
+        module.fail_json(msg="{0} of {1} serial numbers failed.".format(len(failed), len(serial_numbers)), **response)
+    module.exit_json(**response)
+
+
 def main():
     # Define module arguments
     module_args = dict(
         username=dict(type="str"),
         password=dict(type="str", no_log=True),
+        connect_timeout=dict(type="float"),
+        read_timeout=dict(type="float"),
+        task_timeout=dict(type="float"),
         configId=dict(type="int", required=True),
         serialNumbers=dict(type="list", required=True, elements="str"),
         endDate=dict(type="str"),
+        chunk_size=dict(type="int"),
+        workers=dict(type="int", default=10),
+        split_failed_chunks=dict(type="bool", default=True),
     )
 
     # Initialize AnsibleModule object
@@ -147,6 +312,10 @@ def main():
         argument_spec=module_args,
         supports_check_mode=True
     )
+    if module.params["chunk_size"] is not None and module.params["chunk_size"] < 1:
+        module.fail_json(msg="chunk_size should be at least 1.")
+    if module.params["workers"] < 1:
+        module.fail_json(msg="workers should be at least 1.")
 
     # Prepare data to send
     data = {}
@@ -161,6 +330,10 @@ def main():
                          send_data=data)
 
     # Create connection
+    if module.params["chunk_size"]:
+        connection = Connection(module, module.params["username"], module.params["password"],
+                                pool_size=module.params["workers"])
+        create_in_chunks(module, connection)
     connection = Connection(module, module.params["username"], module.params["password"])
 
     # Send request
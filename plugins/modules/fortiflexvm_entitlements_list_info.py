@@ -31,6 +31,24 @@ options:
         description:
             - The password to authenticate. If not declared, the code will read the environment variable FORTIFLEX_ACCESS_PASSWORD.
         type: str
+    connect_timeout:
+        description:
+            - Seconds to wait for a connection to FortiFlex to be established.
+            - If not declared, the code will read the environment variable FORTIFLEX_CONNECT_TIMEOUT. The default is 10.
+        type: float
+        version_added: 2.4.0
+    read_timeout:
+        description:
+            - Seconds to wait for FortiFlex to send a response.
+            - If not declared, the code will read the environment variable FORTIFLEX_READ_TIMEOUT. The default is 120.
+        type: float
+        version_added: 2.4.0
+    task_timeout:
+        description:
+            - Overall time limit of the task in seconds, including login, retries and every request the task sends.
+            - If not declared, the code will read the environment variable FORTIFLEX_TASK_TIMEOUT. No limit by default.
+        type: float
+        version_added: 2.4.0
     accountId:
         description: Filter option. Account ID.
         type: int
@@ -45,14 +63,44 @@ options:
         description: Filter option. Serial number.
         type: str
     status:
-        description: Filter option. "ACTIVE", "STOPPED", "PENDDING" or "EXPIRED".
-        type: str
+        description:
+            - Filter option. "ACTIVE", "STOPPED", "PENDDING" or "EXPIRED".
+            - Several statuses can be declared since 2.4.0, the entitlements with any of them are returned.
+        type: list
+        elements: str
     tokenStatus:
-        description: Filter option. Token status. "NOTUSED" or "USED".
+        description:
+            - Filter option. Token status. "NOTUSED" or "USED".
+            - Several token statuses can be declared since 2.4.0, the entitlements with any of them are returned.
+        type: list
+        elements: str
+    description_prefix:
+        description: Filter option. Only return the entitlements whose description starts with this text.
         type: str
+        version_added: 2.4.0
+    fields:
+        description:
+            - Only return these fields of every entitlement, for example C(serialNumber), C(status) and C(token).
+            - The entitlements are filtered and reduced while the response is decoded, only the selected data is kept.
+            - If not declared, every field is returned.
+        type: list
+        elements: str
+        version_added: 2.4.0
     programSerialNumber:
         description: Filter option. The serial number of your FortiFlex Program.
         type: str
+    output_file:
+        description:
+            - Write the entitlements to this file instead of returning them, as one JSON object per line.
+            - The response is received in full, then its entitlements are decoded and written one by one, so the
+              decoded list is never held in memory, unless the task runs through the httpapi connection plugin.
+              The module only returns their number and the path.
+              Use it for large programs to keep the task result small.
+            - The file is replaced atomically and created with mode 0600, since it contains the tokens.
+              It is only replaced when the whole response was received without error and its content changed,
+              which is reported as changed. In check mode the file is not written.
+        type: path
+        version_added: 2.4.0
 """
 
 EXAMPLES = """
@@ -81,13 +129,45 @@ EXAMPLES = """
     - name: Display response
       ansible.builtin.debug:
         var: result.entitlements
+
+    - name: Get the tokens of the unused entitlements of a site
+      fortinet.fortiflexvm.fortiflexvm_entitlements_list_info:
+        username: "{{ username }}"
+        password: "{{ password }}"
+        configId: 22
+        status: ["ACTIVE", "PENDING"]
+        tokenStatus: "NOTUSED"
+        description_prefix: "site-a"
+        fields: ["serialNumber", "status", "token"]
+      register: result
+
+    - name: Export the entitlements of a large program to a JSON Lines file
+      fortinet.fortiflexvm.fortiflexvm_entitlements_list_info:
+        username: "{{ username }}"
+        password: "{{ password }}"
+        accountId: 12345
+        programSerialNumber: "ELAVMS00XXXXX"
+        output_file: "entitlements.jsonl"
+      register: result
+
+    - name: Display the number of entitlements
+      ansible.builtin.debug:
+        var: result.count
 """
 
 RETURN = """
+count:
+    description: The number of entitlements written to output_file.
+    type: int
+    returned: when output_file is declared
+output_file:
+    description: The file the entitlements are written to.
+    type: str
+    returned: when output_file is declared
 entitlements:
     description: List of entitlements associated with the specified config ID.
     type: list
-    returned: always
+    returned: when output_file is not declared
     contains:
         accountId:
             description: Account ID.
@@ -135,22 +215,101 @@ entitlements:
             sample: "USED"
 """
 
+import os
+import json
+import hashlib
+import tempfile
 from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.fortinet.fortiflexvm.plugins.module_utils import utils
 from ansible_collections.fortinet.fortiflexvm.plugins.module_utils.connection import Connection
 
 
+def entitlement_matches(module):
+    # The filters FortiFlex can't apply, see main()
+    status = module.params["status"] or []
+    token_status = module.params["tokenStatus"] or []
+    description_prefix = module.params["description_prefix"]
+
+    def match(entitlement):
+        if len(status) > 1 and entitlement.get("status") not in status:
+            return False
+        if len(token_status) > 1 and entitlement.get("tokenStatus") not in token_status:
+            return False
+        if description_prefix and not (entitlement.get("description") or "").startswith(description_prefix):
+            return False
+        return True
+    return match
+
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    try:
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(65536), b""):
+                digest.update(block)
+    except (IOError, OSError):
+        return None
+    return digest.hexdigest()
+
+
+def write_entitlements(module, connection, data):
+    # Write the entitlements, as they are decoded, to a temporary file next to output_file, then rename it over output_file
+    # once the whole response was checked. The file is only replaced when its content changes.
+    # In check mode nothing is written.
+    output_file = module.params["output_file"]
+    count = 0
+    digest = hashlib.sha256()
+    others = {}
+    tmp_path = None
+    try:
+        if not module.check_mode:
+            fd, tmp_path = tempfile.mkstemp(prefix="." + os.path.basename(output_file), dir=os.path.dirname(output_file) or ".")
+            f = os.fdopen(fd, "w")
+        try:
+            entitlements = connection.iter_response_items("fortiflex/v2/entitlements/list", data, "entitlements",
+                                                          method="POST", others=others)
+            for entitlement in utils.filter_records(entitlements, module.params["fields"], entitlement_matches(module)):
+                line = json.dumps(entitlement) + "\n"
+                digest.update(line.encode("utf-8"))
+                if tmp_path:
+                    f.write(line)
+                count += 1
+        finally:
+            if tmp_path:
+                f.close()
+        # FortiFlex may report an error with status 200, the export would then be incomplete.
+        if others.get("error"):
+            module.fail_json(msg="Failed to list the entitlements, {0} was not written.".format(output_file), response=others)
+        changed = digest.hexdigest() != file_hash(output_file)
+        if changed and tmp_path:
+            os.chmod(tmp_path, 0o600)
+            os.rename(tmp_path, output_file)
+    except (IOError, OSError) as e:
+        module.fail_json(msg="Failed to write {0}: {1}".format(output_file, e))
+    finally:
+        if tmp_path and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    module.exit_json(changed=changed, count=count, output_file=output_file)
+
+
 def main():
     # Define module arguments
     module_args = dict(
         username=dict(type="str"),
         password=dict(type="str", no_log=True),
+        connect_timeout=dict(type="float"),
+        read_timeout=dict(type="float"),
+        task_timeout=dict(type="float"),
         accountId=dict(type="int"),
         configId=dict(type="int"),
         description=dict(type="str"),
         serialNumber=dict(type="str"),
-        status=dict(type="str"),
-        tokenStatus=dict(type="str", no_log=False),
+        status=dict(type="list", elements="str"),
+        tokenStatus=dict(type="list", elements="str", no_log=False),
         programSerialNumber=dict(type="str"),
+        output_file=dict(type="path"),
+        description_prefix=dict(type="str"),
+        fields=dict(type="list", elements="str"),
     )
 
     # Initialize AnsibleModule object
@@ -167,11 +326,21 @@ def main():
     if not module.params["configId"] and not (module.params["accountId"] and module.params["programSerialNumber"]):
         module.fail_json(
             msg="Please declare configId or declare accountId + programSerialNumber.")
-    for key in ["accountId", "configId", "description", "programSerialNumber", "serialNumber", "status", "tokenStatus"]:
+    for key in ["accountId", "configId", "description", "programSerialNumber", "serialNumber"]:
         if module.params[key]:
             data[key] = module.params[key]
+    # FortiFlex filters by one status only, several statuses are filtered in entitlement_matches()
+    for key in ["status", "tokenStatus"]:
+        if module.params[key] and len(module.params[key]) == 1:
+            data[key] = module.params[key][0]
+
+    if module.params["output_file"]:
+        write_entitlements(module, connection, data)
 
-    response = connection.send_request("fortiflex/v2/entitlements/list", data, method="POST")
+    response = {}
+    entitlements = connection.iter_response_items("fortiflex/v2/entitlements/list", data, "entitlements",
+                                                  method="POST", others=response)
+    response["entitlements"] = list(utils.filter_records(entitlements, module.params["fields"], entitlement_matches(module)))
 
     # Exit with response data
     module.exit_json(changed=False, **response)
@@ -30,11 +30,29 @@ options:
         description:
             - The password to authenticate. If not declared, the code will read the environment variable FORTIFLEX_ACCESS_PASSWORD.
         type: str
+    connect_timeout:
+        description:
+            - Seconds to wait for a connection to FortiFlex to be established.
+            - If not declared, the code will read the environment variable FORTIFLEX_CONNECT_TIMEOUT. The default is 10.
+        type: float
+        version_added: 2.4.0
+    read_timeout:
+        description:
+            - Seconds to wait for FortiFlex to send a response.
+            - If not declared, the code will read the environment variable FORTIFLEX_READ_TIMEOUT. The default is 120.
+        type: float
+        version_added: 2.4.0
+    task_timeout:
+        description:
+            - Overall time limit of the task in seconds, including login, retries and every request the task sends.
+            - If not declared, the code will read the environment variable FORTIFLEX_TASK_TIMEOUT. No limit by default.
+        type: float
+        version_added: 2.4.0
     serialNumber:
         description:
             - The serial number of the entitlement to update.
+            - Either serialNumber or batch should be provided.
         type: str
-        required: true
     configId:
         description:
             - The ID of the configuration.
@@ -54,6 +72,38 @@ options:
             - The status of the entitlement.
         type: str
         choices: ["ACTIVE", "STOPPED"]
+    batch:
+        description:
+            - Update several entitlements in one task, sharing a single login and connection pool.
+            - Each element updates one entitlement. configId, description, endDate and status declared at the top level are used
+              for the elements that don't declare them.
+            - The result contains one entry per element in C(results), in the same shape as the results of a loop.
+        type: list
+        elements: dict
+        version_added: 2.4.0
+        suboptions:
+            serialNumber:
+                description:
+                    - The serial number of the entitlement to update.
+                type: str
+                required: true
+            configId:
+                description:
+                    - The ID of the configuration.
+                type: int
+            description:
+                description:
+                    - The description of the entitlement.
+                type: str
+            endDate:
+                description:
+                    - The end date of the entitlement's validity.
+                type: str
+            status:
+                description:
+                    - The status of the entitlement.
+                type: str
+                choices: ["ACTIVE", "STOPPED"]
 """
 
 EXAMPLES = """
@@ -79,6 +129,22 @@ EXAMPLES = """
     - name: Display response
       ansible.builtin.debug:
         var: result.entitlements
+
+    - name: Update several entitlements in one task.
+      fortinet.fortiflexvm.fortiflexvm_entitlements_update:
+        username: "{{ username }}"
+        password: "{{ password }}"
+        configId: "{{ config_id }}"
+        batch:
+          - serialNumber: "FGVMXXXX00000000"
+            description: "Modify through Ansible"
+          - serialNumber: "FGVMXXXX00000001"
+            status: "STOPPED"
+      register: result
+
+    - name: Display response
+      ansible.builtin.debug:
+        var: result.results
 """
 
 RETURN = """
@@ -131,9 +197,36 @@ entitlements:
             type: str
             returned: always
             sample: "NOTUSED"
+results:
+    description: One result per element of batch, in the same shape as the results of a loop.
+    type: list
+    elements: dict
+    returned: when batch is declared
+    contains:
+        item:
+            description: The element of batch.
+            type: dict
+            returned: always
+        changed:
+            description: Whether this entitlement was changed.
+            type: bool
+            returned: always
+        failed:
+            description: Whether updating this entitlement failed.
+            type: bool
+            returned: always
+        msg:
+            description: The error message.
+            type: str
+            returned: when failed
+        entitlements:
+            description: The entitlement you update.
+            type: list
+            returned: when not failed
 """
 
 from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.fortinet.fortiflexvm.plugins.module_utils import utils
 from ansible_collections.fortinet.fortiflexvm.plugins.module_utils.connection import Connection
 
 
@@ -158,27 +251,7 @@ def update_entitlement(module, connection, check_error=True):
     return response
 
 
-def main():
-    # Define module arguments
-    module_args = dict(
-        username=dict(type="str"),
-        password=dict(type="str", no_log=True),
-        serialNumber=dict(type="str", required=True),
-        configId=dict(type="int"),
-        description=dict(type="str"),
-        endDate=dict(type="str"),
-        status=dict(type="str", choices=["ACTIVE", "STOPPED"])
-    )
-
-    # Initialize AnsibleModule object
-    module = AnsibleModule(
-        argument_spec=module_args,
-        supports_check_mode=True
-    )
-
-    # Create connection
-    connection = Connection(module, module.params["username"], module.params["password"])
-
+def update(module, connection):
     # The following part is extremely complicated because of the indecent design of FlexVM API.
     response = {}
     current_status = "UNKNOWN"
@@ -236,5 +309,43 @@ def main():
     module.exit_json(changed=True, **response)
 
 
+def main():
+    # Define module arguments
+    module_args = dict(
+        username=dict(type="str"),
+        password=dict(type="str", no_log=True),
+        connect_timeout=dict(type="float"),
+        read_timeout=dict(type="float"),
+        task_timeout=dict(type="float"),
+        serialNumber=dict(type="str"),
+        configId=dict(type="int"),
+        description=dict(type="str"),
+        endDate=dict(type="str"),
+        status=dict(type="str", choices=["ACTIVE", "STOPPED"]),
+        batch=dict(type="list", elements="dict", options=dict(
+            serialNumber=dict(type="str", required=True),
+            configId=dict(type="int"),
+            description=dict(type="str"),
+            endDate=dict(type="str"),
+            status=dict(type="str", choices=["ACTIVE", "STOPPED"]),
+        )),
+    )
+
+    # Initialize AnsibleModule object
+    module = AnsibleModule(
+        argument_spec=module_args,
+        required_one_of=[["serialNumber", "batch"]],
+        mutually_exclusive=[["serialNumber", "batch"]],
+        supports_check_mode=True
+    )
+
+    # Create connection
+    connection = Connection(module, module.params["username"], module.params["password"])
+
+    if module.params["batch"]:
+        utils.run_batch(module, connection, update)
+    update(module, connection)
+
+
 if __name__ == "__main__":
     main()
@@ -31,6 +31,24 @@ options:
         description:
             - The password to authenticate. If not declared, the code will read the environment variable FORTIFLEX_ACCESS_PASSWORD.
         type: str
+    connect_timeout:
+        description:
+            - Seconds to wait for a connection to FortiFlex to be established.
+            - If not declared, the code will read the environment variable FORTIFLEX_CONNECT_TIMEOUT. The default is 10.
+        type: float
+        version_added: 2.4.0
+    read_timeout:
+        description:
+            - Seconds to wait for FortiFlex to send a response.
+            - If not declared, the code will read the environment variable FORTIFLEX_READ_TIMEOUT. The default is 120.
+        type: float
+        version_added: 2.4.0
+    task_timeout:
+        description:
+            - Overall time limit of the task in seconds, including login, retries and every request the task sends.
+            - If not declared, the code will read the environment variable FORTIFLEX_TASK_TIMEOUT. No limit by default.
+        type: float
+        version_added: 2.4.0
     configId:
         description:
             - The ID of a FortiFlex Configuration.
@@ -61,6 +79,35 @@ options:
         description:
             - Set it to true will activate the entitlement right away and charges start to incur even without downloading the license by token.
         type: bool
+    batch_size:
+        description:
+            - Split count into batches of at most this many VMs, each created by its own request.
+            - If not declared, all VMs are created by one request.
+        type: int
+        version_added: 2.4.0
+    workers:
+        description:
+            - When batch_size is declared, the maximum number of batches sent at the same time.
+        type: int
+        default: 10
+        version_added: 2.4.0
+    journal:
+        description:
+            - When batch_size is declared, the path of a file that records the entitlements created by every batch.
+            - A task that runs again with the same journal and the same parameters only sends the batches that were not
+              created yet, and returns the entitlements of all batches. Once every batch is created, it doesn't create anything.
+            - A batch whose request failed after it was sent, for example because of a read timeout, may have been created.
+              It is reported as uncertain and is not sent again, check the entitlements of the configuration and set
+              resend_uncertain to true to create it anyway.
+            - Remove the file, or use another one, to create a new set of VMs.
+        type: path
+        version_added: 2.4.0
+    resend_uncertain:
+        description:
+            - Send again the batches that the journal records as uncertain.
+        type: bool
+        default: false
+        version_added: 2.4.0
 """
 
 EXAMPLES = """
@@ -85,6 +132,17 @@ EXAMPLES = """
     - name: Display response
       ansible.builtin.debug:
         var: result.entitlements
+
+    - name: Create many Virtual Machines, in batches of 100 sent concurrently, resumable.
+      fortinet.fortiflexvm.fortiflexvm_entitlements_vm_create:
+        username: "{{ username }}"
+        password: "{{ password }}"
+        configId: 42
+        count: 5000
+        batch_size: 100
+        workers: 10
+        journal: "{{ playbook_dir }}/vm_create_42.journal"
+      register: result
 """
 
 RETURN = """
@@ -137,10 +195,164 @@ entitlements:
             type: str
             returned: always
             sample: "NOTUSED"
+batches:
+    description: The state of every batch, when batch_size is declared.
+    type: list
+    elements: dict
+    returned: when batch_size is declared
+    contains:
+        index:
+            description: The index of the batch.
+            type: int
+            returned: always
+        count:
+            description: The number of VMs of the batch.
+            type: int
+            returned: always
+        state:
+            description:
+                - C(created) by this task, C(journaled) when a previous task created it,
+                  C(failed) when FortiFlex rejected it or C(uncertain) when it may have been created.
+                - C(planned) in check mode.
+            type: str
+            returned: always
+        msg:
+            description: The error message.
+            type: str
+            returned: when failed or uncertain
 """
 
+import json
+import hashlib
 from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.fortinet.fortiflexvm.plugins.module_utils import utils
 from ansible_collections.fortinet.fortiflexvm.plugins.module_utils.connection import Connection
+from ansible_collections.fortinet.fortiflexvm.plugins.module_utils.token_cache import FileCache
+
+
+class Journal():
+    # The state of the batches of one bulk create, in an entry of the journal file keyed by the request.
+    # A batch is "pending" from the moment its request is sent and "created" with its entitlements once it succeeded.
+    def __init__(self, path, request):
+        self.cache = FileCache(path) if path else None
+        self.key = hashlib.sha256(json.dumps(request, sort_keys=True).encode('utf-8')).hexdigest()
+        self.request = request
+        self.batches = {}
+        if self.cache is not None:
+            entry = self.cache.get(self.key) or {}
+            self.batches = entry.get("batches", {})
+
+    def record(self, index, state, entitlements=None):
+        # state None forgets the batch
+        if self.cache is None:
+            return
+
+        def update(entry):
+            entry = entry or {"request": self.request, "batches": {}}
+            if state is None:
+                entry["batches"].pop(str(index), None)
+            else:
+                entry["batches"][str(index)] = {"state": state, "entitlements": entitlements or []}
+            return entry
+        self.cache.update(self.key, update)
+
+
+def forget_batch(module, journal, index):
+    try:
+        journal.record(index, None)
+    except (IOError, OSError) as e:
+        module.warn("Batch {0} was not created but the journal could not be updated: {1}".format(index, e))
+
+
+def create_batch(module, connection, journal):
+    index = module.params["batch_index"]
+    data = dict(module.params["send_data"], count=module.params["batch_count"])
+    pending = []
+
+    def before_send():
+        # Journal the batch before its request is on the wire. Failures before that point
+        # (login, task timeout, ...) leave no entry, the batch is simply sent again.
+        if pending:
+            return
+        try:
+            journal.record(index, "pending")
+        except (IOError, OSError) as e:
+            module.fail_json(msg="Failed to write the journal, the batch was not sent: {0}".format(e))
+        pending.append(index)
+
+    try:
+        response = connection.send_request("fortiflex/v2/entitlements/vm/create", data, method="POST", check_error=False,
+                                           before_send=before_send)
+    except utils.BatchItemExit as e:
+        if pending and not e.result.get("request_sent", True):
+            # Every attempt timed out while connecting, FortiFlex never received the request.
+            forget_batch(module, journal, index)
+        elif pending:
+            # The batch stays pending in the journal: it may have been created before the request failed.
+            e.result["uncertain"] = True
+        raise
+    if "entitlements" not in response or response.get("error"):
+        forget_batch(module, journal, index)
+        module.fail_json(msg=utils.replace_error_msg(str(response.get("message") or response.get("error") or "Request failed")),
+                         response=response)
+    try:
+        journal.record(index, "created", response["entitlements"])
+    except (IOError, OSError) as e:
+        module.warn("Batch {0} was created but the journal could not be updated: {1}".format(index, e))
+    module.exit_json(changed=True, entitlements=response["entitlements"])
+
+
+def create_in_batches(module, data):
+    batch_size = module.params["batch_size"]
+    counts = [min(batch_size, data["count"] - start) for start in range(0, data["count"], batch_size)]
+    try:
+        journal = Journal(module.params["journal"], dict(data, batch_size=batch_size))
+    except (IOError, OSError) as e:
+        module.fail_json(msg="Failed to read the journal {0}: {1}".format(module.params["journal"], e))
+
+    # Batches recorded in the journal are not sent again
+    batches = []
+    params_list = []
+    for index, count in enumerate(counts):
+        batch = dict(index=index, count=count)
+        recorded = journal.batches.get(str(index))
+        if recorded and recorded["state"] == "created":
+            batch.update(state="journaled", entitlements=recorded["entitlements"])
+        elif recorded and recorded["state"] == "pending" and not module.params["resend_uncertain"]:
+            batch.update(state="uncertain", entitlements=[],
+                         msg="A previous request for this batch failed after it was sent, it may have been created.")
+        else:
+            batch.update(state="planned", entitlements=[])
+            params_list.append(dict(module.params, send_data=data, batch_index=index, batch_count=count))
+        batches.append(batch)
+
+    if module.check_mode:
+        module.exit_json(changed=bool(params_list), input_params=module.params,
+                         send_data=[dict(data, count=params["batch_count"]) for params in params_list],
+                         batches=[dict((key, batch[key]) for key in batch if key != "entitlements") for batch in batches])
+
+    if params_list:
+        connection = Connection(module, module.params["username"], module.params["password"],
+                                pool_size=module.params["workers"])
+        results = utils.run_items(module, connection, lambda item_module, item_connection: create_batch(
+            item_module, item_connection, journal), params_list, module.params["workers"])
+        for params, result in zip(params_list, results):
+            batch = batches[params["batch_index"]]
+            if not result["failed"]:
+                batch.update(state="created", entitlements=result["entitlements"])
+            else:
+                batch.update(state="uncertain" if result.get("uncertain") else "failed", msg=result["msg"])
+
+    # Merge the batches, in batch order
+    entitlements = []
+    for batch in batches:
+        entitlements.extend(batch.pop("entitlements"))
+    changed = any(batch["state"] == "created" for batch in batches)
+    failed = [batch for batch in batches if batch["state"] in ("failed", "uncertain")]
+    if failed:
+        module.fail_json(msg="{0} of {1} batches failed.".format(len(failed), len(batches)),
+                         changed=changed, entitlements=entitlements, batches=batches)
+    module.exit_json(changed=changed, entitlements=entitlements, batches=batches)
 
 
 def main():
@@ -148,12 +360,19 @@ def main():
     module_args = dict(
         username=dict(type="str"),
         password=dict(type="str", no_log=True),
+        connect_timeout=dict(type="float"),
+        read_timeout=dict(type="float"),
+        task_timeout=dict(type="float"),
         configId=dict(type="int", required=True),
         count=dict(type="int", default=1),
         description=dict(type="str", default=""),
         endDate=dict(type="str"),
         folderPath=dict(type="str"),
         skipPending=dict(type="bool"),
+        batch_size=dict(type="int"),
+        workers=dict(type="int", default=10),
+        journal=dict(type="path"),
+        resend_uncertain=dict(type="bool", default=False),
     )
 
     # Initialize AnsibleModule object
@@ -161,6 +380,10 @@ def main():
         argument_spec=module_args,
         supports_check_mode=True
     )
+    if module.params["batch_size"] is not None and module.params["batch_size"] < 1:
+        module.fail_json(msg="batch_size should be at least 1.")
+    if module.params["workers"] < 1:
+        module.fail_json(msg="workers should be at least 1.")
 
     # Prepare data to send
     data = {}
@@ -168,6 +391,10 @@ def main():
         if module.params[param] is not None:
             data[param] = module.params[param]
 
+    # Create the VMs in batches
+    if module.params["batch_size"] and data["count"] > 0:
+        create_in_batches(module, data)
+
     # Check mode
     if module.check_mode:
         changed = (data["count"] != 0)
@@ -31,6 +31,24 @@ options:
         description:
             - The password to authenticate. If not declared, the code will read the environment variable FORTIFLEX_ACCESS_PASSWORD.
         type: str
+    connect_timeout:
+        description:
+            - Seconds to wait for a connection to FortiFlex to be established.
+            - If not declared, the code will read the environment variable FORTIFLEX_CONNECT_TIMEOUT. The default is 10.
+        type: float
+        version_added: 2.4.0
+    read_timeout:
+        description:
+            - Seconds to wait for FortiFlex to send a response.
+            - If not declared, the code will read the environment variable FORTIFLEX_READ_TIMEOUT. The default is 120.
+        type: float
+        version_added: 2.4.0
+    task_timeout:
+        description:
+            - Overall time limit of the task in seconds, including login, retries and every request the task sends.
+            - If not declared, the code will read the environment variable FORTIFLEX_TASK_TIMEOUT. No limit by default.
+        type: float
+        version_added: 2.4.0
     regenerate:
         description:
             - Whether regenerate a new token.
@@ -39,8 +57,21 @@ options:
     serialNumber:
         description:
             - The serial number of the entitlement to update.
+            - Either serialNumber or batch should be provided.
         type: str
-        required: true
+    batch:
+        description:
+            - Regenerate the tokens of several entitlements in one task, sharing a single login and connection pool.
+            - The result contains one entry per element in C(results), in the same shape as the results of a loop.
+        type: list
+        elements: dict
+        version_added: 2.4.0
+        suboptions:
+            serialNumber:
+                description:
+                    - The serial number of the entitlement to update.
+                type: str
+                required: true
 """
 
 EXAMPLES = """
@@ -61,6 +92,20 @@ EXAMPLES = """
     - name: Display response
       ansible.builtin.debug:
         var: result.entitlements
+
+    - name: Regenerate several tokens in one task
+      fortinet.fortiflexvm.fortiflexvm_entitlements_vm_regenerate_token:
+        username: "{{ username }}"
+        password: "{{ password }}"
+        batch:
+          - serialNumber: "FGVMMLTM00000000"
+          - serialNumber: "FGVMMLTM00000001"
+        regenerate: true
+      register: result
+
+    - name: Display response
+      ansible.builtin.debug:
+        var: result.results
 """
 
 RETURN = """
@@ -113,24 +158,72 @@ entitlements:
             type: str
             returned: always
             sample: "NOTUSED"
+results:
+    description: One result per element of batch, in the same shape as the results of a loop.
+    type: list
+    elements: dict
+    returned: when batch is declared and regenerate is true
+    contains:
+        item:
+            description: The element of batch.
+            type: dict
+            returned: always
+        changed:
+            description: Whether the token was regenerated.
+            type: bool
+            returned: always
+        failed:
+            description: Whether regenerating the token failed.
+            type: bool
+            returned: always
+        msg:
+            description: The error message.
+            type: str
+            returned: when failed
+        entitlements:
+            description: The entitlement you update.
+            type: list
+            returned: when not failed
 """
 
 from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.fortinet.fortiflexvm.plugins.module_utils import utils
 from ansible_collections.fortinet.fortiflexvm.plugins.module_utils.connection import Connection
 
 
+def regenerate_token(module, connection):
+    data = {
+        "serialNumber": module.params["serialNumber"]
+    }
+
+    # Send request
+    # If something goes wrong (e.g., incorrect input, 404), the program will report an error and exist.
+    response = connection.send_request("fortiflex/v2/entitlements/vm/token", data, method="POST")
+
+    # Exit with response data
+    module.exit_json(changed=True, **response)
+
+
 def main():
     # Define module arguments
     module_args = dict(
         username=dict(type="str"),
         password=dict(type="str", no_log=True),
-        serialNumber=dict(type="str", required=True),
+        connect_timeout=dict(type="float"),
+        read_timeout=dict(type="float"),
+        task_timeout=dict(type="float"),
+        serialNumber=dict(type="str"),
         regenerate=dict(type="bool", required=True),
+        batch=dict(type="list", elements="dict", options=dict(
+            serialNumber=dict(type="str", required=True),
+        )),
     )
 
     # Initialize AnsibleModule object
     module = AnsibleModule(
         argument_spec=module_args,
+        required_one_of=[["serialNumber", "batch"]],
+        mutually_exclusive=[["serialNumber", "batch"]],
         supports_check_mode=True
     )
 
@@ -145,16 +238,10 @@ def main():
 
     # Create connection
     connection = Connection(module, module.params["username"], module.params["password"])
-    data = {
-        "serialNumber": module.params["serialNumber"]
-    }
-
-    # Send request
-    # If something goes wrong (e.g., incorrect input, 404), the program will report an error and exist.
-    response = connection.send_request("fortiflex/v2/entitlements/vm/token", data, method="POST")
 
-    # Exit with response data
-    module.exit_json(changed=True, **response)
+    if module.params["batch"]:
+        utils.run_batch(module, connection, regenerate_token)
+    regenerate_token(module, connection)
 
 
 if __name__ == "__main__":
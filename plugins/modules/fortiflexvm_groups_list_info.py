@@ -30,9 +30,35 @@ options:
         description:
             - The password to authenticate. If not declared, the code will read the environment variable FORTIFLEX_ACCESS_PASSWORD.
         type: str
+    connect_timeout:
+        description:
+            - Seconds to wait for a connection to FortiFlex to be established.
+            - If not declared, the code will read the environment variable FORTIFLEX_CONNECT_TIMEOUT. The default is 10.
+        type: float
+        version_added: 2.4.0
+    read_timeout:
+        description:
+            - Seconds to wait for FortiFlex to send a response.
+            - If not declared, the code will read the environment variable FORTIFLEX_READ_TIMEOUT. The default is 120.
+        type: float
+        version_added: 2.4.0
+    task_timeout:
+        description:
+            - Overall time limit of the task in seconds, including login, retries and every request the task sends.
+            - If not declared, the code will read the environment variable FORTIFLEX_TASK_TIMEOUT. No limit by default.
+        type: float
+        version_added: 2.4.0
     accountId:
         description: Account ID.
         type: str
+    fields:
+        description:
+            - Only return these fields of every group, for example C(folderPath) and C(availableTokens).
+            - The groups are reduced while the response is decoded, only the selected data is kept.
+            - If not declared, every field is returned.
+        type: list
+        elements: str
+        version_added: 2.4.0
 """
 
 EXAMPLES = """
@@ -83,6 +109,7 @@ groups:
 """
 
 from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.fortinet.fortiflexvm.plugins.module_utils import utils
 from ansible_collections.fortinet.fortiflexvm.plugins.module_utils.connection import Connection
 
 
@@ -91,7 +118,11 @@ def main():
     module_args = dict(
         username=dict(type="str"),
         password=dict(type="str", no_log=True),
+        connect_timeout=dict(type="float"),
+        read_timeout=dict(type="float"),
+        task_timeout=dict(type="float"),
         accountId=dict(type="str"),
+        fields=dict(type="list", elements="str"),
     )
 
     # Initialize AnsibleModule object
@@ -109,7 +140,9 @@ def main():
     if module.params["accountId"]:
         request_url = "fortiflex/v2/groups/list"
         data["accountId"] = module.params["accountId"]
-    response = connection.send_request(request_url, data, method="POST")
+    response = {}
+    groups = connection.iter_response_items(request_url, data, "groups", method="POST", others=response)
+    response["groups"] = list(utils.filter_records(groups, module.params["fields"]))
 
     # Exit with response data
     module.exit_json(changed=False, **response)
@@ -30,6 +30,32 @@ options:
         description:
             - The password to authenticate. If not declared, the code will read the environment variable FORTIFLEX_ACCESS_PASSWORD.
         type: str
+    connect_timeout:
+        description:
+            - Seconds to wait for a connection to FortiFlex to be established.
+            - If not declared, the code will read the environment variable FORTIFLEX_CONNECT_TIMEOUT. The default is 10.
+        type: float
+        version_added: 2.4.0
+    read_timeout:
+        description:
+            - Seconds to wait for FortiFlex to send a response.
+            - If not declared, the code will read the environment variable FORTIFLEX_READ_TIMEOUT. The default is 120.
+        type: float
+        version_added: 2.4.0
+    task_timeout:
+        description:
+            - Overall time limit of the task in seconds, including login, retries and every request the task sends.
+            - If not declared, the code will read the environment variable FORTIFLEX_TASK_TIMEOUT. No limit by default.
+        type: float
+        version_added: 2.4.0
+    fields:
+        description:
+            - Only return these fields of every program, for example C(serialNumber) and C(endDate).
+            - The programs are reduced while the response is decoded, only the selected data is kept.
+            - If not declared, every field is returned.
+        type: list
+        elements: str
+        version_added: 2.4.0
 """
 
 EXAMPLES = """
@@ -84,6 +110,7 @@ programs:
 """
 
 from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.fortinet.fortiflexvm.plugins.module_utils import utils
 from ansible_collections.fortinet.fortiflexvm.plugins.module_utils.connection import Connection
 
 
@@ -92,6 +119,10 @@ def main():
     module_args = dict(
         username=dict(type="str"),
         password=dict(type="str", no_log=True),
+        connect_timeout=dict(type="float"),
+        read_timeout=dict(type="float"),
+        task_timeout=dict(type="float"),
+        fields=dict(type="list", elements="str"),
     )
 
     # Initialize AnsibleModule object
@@ -104,7 +135,9 @@ def main():
     connection = Connection(module, module.params["username"], module.params["password"])
 
     # Send request to get programs list
-    response = connection.send_request("fortiflex/v2/programs/list", {}, method="POST")
+    response = {}
+    programs = connection.iter_response_items("fortiflex/v2/programs/list", {}, "programs", method="POST", others=response)
+    response["programs"] = list(utils.filter_records(programs, module.params["fields"]))
 
     # Exit with response data
     module.exit_json(changed=False, **response)
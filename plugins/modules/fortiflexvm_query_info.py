@@ -0,0 +1,272 @@
+#!/usr/bin/python
+
+# Copyright: (c) 2023 Fortinet
+# GNU General Public License v3.0+ (see LICENSE or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+DOCUMENTATION = """
+---
+module: fortiflexvm_query_info
+short_description: Query the local FortiFlex mirror without calling the API.
+description:
+    - This module reads the programs, configurations and entitlements from the SQLite database written by
+      M(fortinet.fortiflexvm.fortiflexvm_sync). It doesn't send any request to FortiFlex.
+    - The filters use the indexes of the mirror on serialNumber, configId, programSerialNumber, status, tokenStatus,
+      product type and configuration parameters.
+    - Every filter narrows the result. Filters that take a list accept any of the listed values.
+version_added: "2.4.0"
+author:
+    - Xinwei Du (@dux-fortinet)
+options:
+    database:
+        description:
+            - The path of the SQLite database.
+            - If not declared, the code will read the environment variable FORTIFLEX_MIRROR_PATH.
+              The default is ~/.ansible/fortiflex/mirror.db.
+        type: path
+    query:
+        description:
+            - The kind of records to return.
+        type: str
+        choices: ["entitlements", "configs", "programs"]
+        default: entitlements
+    serialNumbers:
+        description:
+            - The serial numbers of the entitlements, or of the programs when query is programs.
+        type: list
+        elements: str
+    configIds:
+        description:
+            - The IDs of the configurations. Not supported when query is programs.
+        type: list
+        elements: int
+    programSerialNumbers:
+        description:
+            - The serial numbers of the programs. Use serialNumbers when query is programs.
+        type: list
+        elements: str
+    accountIds:
+        description:
+            - The IDs of the accounts.
+        type: list
+        elements: int
+    status:
+        description:
+            - The status of the entitlements or configurations.
+        type: list
+        elements: str
+    tokenStatus:
+        description:
+            - The token status of the entitlements.
+        type: list
+        elements: str
+    description_pattern:
+        description:
+            - A GLOB pattern the description of the entitlements should match, for example C(web-*).
+            - The match is case sensitive.
+        type: str
+    productTypes:
+        description:
+            - The product types of the configurations, for example C(fortiGateBundle).
+            - When query is entitlements, the entitlements of the configurations of these product types.
+        type: list
+        elements: str
+    parameters:
+        description:
+            - Configuration parameters and the value they should have, for example C({"cpu": 4}).
+              A list value requires every listed element, for example C({"fortiGuardServices": ["FGTAVDB"]}).
+            - When query is entitlements, the entitlements of the configurations that have these parameters.
+        type: dict
+    group_by:
+        description:
+            - Also return the keys of the records grouped by this field, for example the serial numbers per configId.
+        type: str
+        choices: ["configId", "programSerialNumber", "accountId", "status", "tokenStatus", "productType"]
+    fields:
+        description:
+            - Only return these fields of every record. Every field is returned if not declared.
+        type: list
+        elements: str
+    max_age:
+        description:
+            - Fail if the queried programs were synced more than max_age seconds ago, or were never synced.
+        type: float
+"""
+
+EXAMPLES = """
+- name: Query the local FortiFlex mirror
+  hosts: localhost
+  tasks:
+    - name: Active entitlements whose token was not used yet
+      fortinet.fortiflexvm.fortiflexvm_query_info:
+        status: ["ACTIVE"]
+        tokenStatus: ["NOTUSED"]
+        fields: ["serialNumber", "configId", "description"]
+      register: result
+
+    - name: Serial numbers of the entitlements per configuration
+      fortinet.fortiflexvm.fortiflexvm_query_info:
+        programSerialNumbers: ["ELAVMS000000XXXX"]
+        group_by: configId
+        fields: ["serialNumber"]
+      register: result
+
+    - name: FortiGate bundle configurations with 4 CPUs
+      fortinet.fortiflexvm.fortiflexvm_query_info:
+        query: configs
+        productTypes: ["fortiGateBundle"]
+        parameters:
+          cpu: 4
+      register: result
+
+    - name: Entitlements whose description starts with web-, from a mirror synced in the last hour
+      fortinet.fortiflexvm.fortiflexvm_query_info:
+        description_pattern: "web-*"
+        max_age: 3600
+      register: result
+"""
+
+RETURN = """
+database:
+    description: The path of the SQLite database.
+    type: str
+    returned: always
+synced_at:
+    description: The UNIX time of the oldest sync of the queried programs. None if one of them was never synced.
+    type: float
+    returned: always
+count:
+    description: The number of records found.
+    type: int
+    returned: always
+entitlements:
+    description: The entitlements found, as returned by M(fortinet.fortiflexvm.fortiflexvm_entitlements_list_info).
+    type: list
+    elements: dict
+    returned: when query is entitlements
+configs:
+    description: The configurations found, as returned by M(fortinet.fortiflexvm.fortiflexvm_configs_list_info).
+    type: list
+    elements: dict
+    returned: when query is configs
+programs:
+    description: The programs found, as returned by M(fortinet.fortiflexvm.fortiflexvm_programs_list_info).
+    type: list
+    elements: dict
+    returned: when query is programs
+groups:
+    description: The keys of the records found, serialNumber for entitlements and programs and id for configs, per value of group_by.
+    type: dict
+    returned: when group_by is declared
+    sample: {"42": ["FGVMMLTM00000001", "FGVMMLTM00000002"], "43": ["FGVMMLTM00000003"]}
+"""
+
+import time
+import sqlite3
+from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.fortinet.fortiflexvm.plugins.module_utils import utils
+from ansible_collections.fortinet.fortiflexvm.plugins.module_utils.mirror import MirrorStore, TABLES, config_product_type
+
+# module option -> column of the mirror
+FILTERS = [
+    ("serialNumbers", "serialNumber"),
+    ("configIds", "configId"),
+    ("programSerialNumbers", "programSerialNumber"),
+    ("accountIds", "accountId"),
+    ("status", "status"),
+    ("tokenStatus", "tokenStatus"),
+]
+
+
+def build_filters(module):
+    table = module.params["query"]
+    filters = {}
+    for option, column in FILTERS:
+        values = module.params[option]
+        if values is None:
+            continue
+        # configs are keyed by id, and their programs by serialNumber
+        if table == "configs" and column == "configId":
+            column = "id"
+        if column != TABLES[table]["key"] and column not in TABLES[table]["columns"]:
+            module.fail_json(msg="{0} is not supported when query is {1}.".format(option, table))
+        filters[column] = values
+    if table != "entitlements" and module.params["description_pattern"] is not None:
+        module.fail_json(msg="description_pattern is only supported when query is entitlements.")
+    if table == "programs" and (module.params["productTypes"] or module.params["parameters"]):
+        module.fail_json(msg="productTypes and parameters are not supported when query is programs.")
+    return filters
+
+
+def group_value(table, record, field):
+    if table == "configs" and field == "productType":
+        return config_product_type(record)
+    return record.get(field)
+
+
+def main():
+    # Define module arguments
+    module_args = dict(
+        database=dict(type="path"),
+        query=dict(type="str", choices=["entitlements", "configs", "programs"], default="entitlements"),
+        serialNumbers=dict(type="list", elements="str"),
+        configIds=dict(type="list", elements="int"),
+        programSerialNumbers=dict(type="list", elements="str"),
+        accountIds=dict(type="list", elements="int"),
+        status=dict(type="list", elements="str"),
+        tokenStatus=dict(type="list", elements="str"),
+        description_pattern=dict(type="str"),
+        productTypes=dict(type="list", elements="str"),
+        parameters=dict(type="dict"),
+        group_by=dict(type="str", choices=["configId", "programSerialNumber", "accountId", "status", "tokenStatus", "productType"]),
+        fields=dict(type="list", elements="str"),
+        max_age=dict(type="float"),
+    )
+
+    # Initialize AnsibleModule object
+    module = AnsibleModule(
+        argument_spec=module_args,
+        supports_check_mode=True
+    )
+    table = module.params["query"]
+    filters = build_filters(module)
+    try:
+        store = MirrorStore(module.params["database"], readonly=True)
+    except (IOError, OSError, sqlite3.Error) as e:
+        module.fail_json(msg="Failed to open the FortiFlex mirror: {0}".format(e))
+
+    try:
+        programs = filters.get("serialNumber") if table == "programs" else filters.get("programSerialNumber")
+        synced_at = store.synced_at(programs)
+        if module.params["max_age"] is not None and (synced_at is None or time.time() - synced_at > module.params["max_age"]):
+            module.fail_json(msg="The FortiFlex mirror is older than {0} seconds, run fortiflexvm_sync first.".format(
+                module.params["max_age"]), database=store.path, synced_at=synced_at)
+        records = list(store.query(table, filters, module.params["description_pattern"],
+                                   module.params["productTypes"], module.params["parameters"]))
+    except sqlite3.Error as e:
+        module.fail_json(msg="Failed to query the FortiFlex mirror: {0}".format(e))
+    finally:
+        store.close()
+
+    response = dict(changed=False, database=store.path, synced_at=synced_at, count=len(records))
+    group_by = module.params["group_by"]
+    if group_by:
+        key = "id" if table == "configs" else "serialNumber"
+        groups = {}
+        for record in records:
+            groups.setdefault(str(group_value(table, record, group_by)), []).append(record[key])
+        response["groups"] = groups
+    response[table] = [utils.select_fields(record, module.params["fields"]) for record in records]
+    module.exit_json(**response)
+
+
+if __name__ == "__main__":
+    main()
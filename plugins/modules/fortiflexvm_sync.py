@@ -0,0 +1,254 @@
+#!/usr/bin/python
+
+# Copyright: (c) 2023 Fortinet
+# GNU General Public License v3.0+ (see LICENSE or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+DOCUMENTATION = """
+---
+module: fortiflexvm_sync
+short_description: Mirror FortiFlex programs, configurations and entitlements into a local SQLite database.
+description:
+    - This module copies the programs, the configurations and the entitlements of the account into a local SQLite database,
+      so that reporting and lookup tasks can read them locally instead of calling the API,
+      for example with M(fortinet.fortiflexvm.fortiflexvm_query_info).
+    - The configurations and entitlements of the programs are fetched concurrently on a shared connection pool.
+    - Only the rows whose content changed are written. Records that disappeared from FortiFlex are removed from the mirror.
+    - The programs that fail to sync keep their previous rows.
+    - In check mode the changes are computed on an in-memory copy of the database, the file is neither created nor changed.
+version_added: "2.4.0"
+author:
+    - Xinwei Du (@dux-fortinet)
+options:
+    username:
+        description:
+            - The username to authenticate. If not declared, the code will read the environment variable FORTIFLEX_ACCESS_USERNAME.
+        type: str
+    password:
+        description:
+            - The password to authenticate. If not declared, the code will read the environment variable FORTIFLEX_ACCESS_PASSWORD.
+        type: str
+    connect_timeout:
+        description:
+            - Seconds to wait for a connection to FortiFlex to be established.
+            - If not declared, the code will read the environment variable FORTIFLEX_CONNECT_TIMEOUT. The default is 10.
+        type: float
+    read_timeout:
+        description:
+            - Seconds to wait for FortiFlex to send a response.
+            - If not declared, the code will read the environment variable FORTIFLEX_READ_TIMEOUT. The default is 120.
+        type: float
+    task_timeout:
+        description:
+            - Overall time limit of the task in seconds, including login, retries and every request the task sends.
+            - If not declared, the code will read the environment variable FORTIFLEX_TASK_TIMEOUT. No limit by default.
+        type: float
+    database:
+        description:
+            - The path of the SQLite database. It is created with mode 0600, since it contains the tokens of the entitlements.
+            - If not declared, the code will read the environment variable FORTIFLEX_MIRROR_PATH.
+              The default is ~/.ansible/fortiflex/mirror.db.
+        type: path
+    programSerialNumbers:
+        description:
+            - Only sync these programs. If not declared, every program of the account is synced.
+        type: list
+        elements: str
+    entitlements:
+        description:
+            - Whether to sync the entitlements of the programs.
+        type: bool
+        default: true
+    workers:
+        description:
+            - The maximum number of requests sent at the same time.
+        type: int
+        default: 4
+"""
+
+EXAMPLES = """
+- name: Mirror FortiFlex
+  hosts: localhost
+  vars:
+    username: "<your_own_value>"
+    password: "<your_own_value>"
+  tasks:
+    - name: Sync every program into the local mirror
+      fortinet.fortiflexvm.fortiflexvm_sync:
+        username: "{{ username }}"
+        password: "{{ password }}"
+        # database: "~/.ansible/fortiflex/mirror.db"
+        # programSerialNumbers: ["ELAVMS000000XXXX"]
+      register: result
+
+    - name: Display the changes
+      ansible.builtin.debug:
+        var: result.changes
+"""
+
+RETURN = """
+database:
+    description: The path of the SQLite database.
+    type: str
+    returned: always
+changes:
+    description: The number of rows inserted, updated, unchanged and deleted in every table.
+    type: dict
+    returned: always
+    sample: {"programs": {"inserted": 0, "updated": 0, "unchanged": 1, "deleted": 0},
+             "configs": {"inserted": 1, "updated": 0, "unchanged": 3, "deleted": 0},
+             "entitlements": {"inserted": 10, "updated": 2, "unchanged": 120, "deleted": 1}}
+failed_programs:
+    description: The programs that could not be synced, and why.
+    type: list
+    elements: dict
+    returned: always
+    contains:
+        serialNumber:
+            description: The serial number of the program.
+            type: str
+            returned: always
+        msg:
+            description: The error message.
+            type: str
+            returned: always
+"""
+
+import sqlite3
+from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.fortinet.fortiflexvm.plugins.module_utils import utils
+from ansible_collections.fortinet.fortiflexvm.plugins.module_utils.connection import Connection
+from ansible_collections.fortinet.fortiflexvm.plugins.module_utils.mirror import MirrorStore
+
+
+def check_listing(module, name, others):
+    # FortiFlex may report an error with status 200. The listing is then incomplete, and syncing it
+    # would delete the missing rows, so the program fails and its rows are kept.
+    if others.get("status") == -1 or others.get("error"):
+        module.fail_json(msg="Failed to list the {0}: {1}".format(name, others.get("message") or others.get("error")),
+                         response=others)
+
+
+def fetch_program(module, connection):
+    program = module.params["program"]
+    data = {"programSerialNumber": program["serialNumber"]}
+    if program.get("accountId"):
+        data["accountId"] = program["accountId"]
+    configs = []
+    others = {}
+    for config in connection.iter_response_items("fortiflex/v2/configs/list", data, "configs", method="POST", others=others):
+        config = utils.transform_config_output(config)
+        config.setdefault("programSerialNumber", program["serialNumber"])
+        configs.append(config)
+    check_listing(module, "configurations", others)
+    entitlements = None
+    if module.params["entitlements"]:
+        entitlements = []
+        # entitlements/list needs accountId to list a whole program
+        if not data.get("accountId"):
+            module.fail_json(msg="FortiFlex didn't return the accountId of the program, can't list its entitlements.")
+        others = {}
+        for entitlement in connection.iter_response_items("fortiflex/v2/entitlements/list", data, "entitlements",
+                                                          method="POST", others=others):
+            entitlement.setdefault("programSerialNumber", program["serialNumber"])
+            entitlements.append(entitlement)
+        check_listing(module, "entitlements", others)
+    module.exit_json(configs=configs, entitlements=entitlements)
+
+
+def main():
+    # Define module arguments
+    module_args = dict(
+        username=dict(type="str"),
+        password=dict(type="str", no_log=True),
+        connect_timeout=dict(type="float"),
+        read_timeout=dict(type="float"),
+        task_timeout=dict(type="float"),
+        database=dict(type="path"),
+        programSerialNumbers=dict(type="list", elements="str"),
+        entitlements=dict(type="bool", default=True),
+        workers=dict(type="int", default=4),
+    )
+
+    # Initialize AnsibleModule object
+    module = AnsibleModule(
+        argument_spec=module_args,
+        supports_check_mode=True
+    )
+    if module.params["workers"] < 1:
+        module.fail_json(msg="workers should be at least 1.")
+
+    # Create connection, with one pooled HTTP connection per worker
+    connection = Connection(module, module.params["username"], module.params["password"],
+                            pool_size=module.params["workers"])
+
+    # Fetch the programs, then their configurations and entitlements concurrently
+    programs = connection.send_request("fortiflex/v2/programs/list", {}, method="POST")["programs"]
+    selected = module.params["programSerialNumbers"]
+    failed = []
+    if selected:
+        known = set(program["serialNumber"] for program in programs)
+        failed = [dict(serialNumber=serial_number, msg="The program doesn't exist.")
+                  for serial_number in selected if serial_number not in known]
+        programs = [program for program in programs if program["serialNumber"] in selected]
+    params_list = [{"program": program, "entitlements": module.params["entitlements"]} for program in programs]
+    results = utils.run_items(module, connection, fetch_program, params_list, module.params["workers"])
+
+    # Write everything in one transaction. Check mode works on an in-memory copy and leaves the file as is.
+    try:
+        store = MirrorStore(module.params["database"], in_memory=module.check_mode)
+    except (IOError, OSError, sqlite3.Error) as e:
+        module.fail_json(msg="Failed to open the FortiFlex mirror: {0}".format(e))
+    changes = dict((table, dict(inserted=0, updated=0, unchanged=0, deleted=0)) for table in ["programs", "configs", "entitlements"])
+
+    def add_changes(table, counts):
+        for key in counts:
+            changes[table][key] += counts[key]
+
+    try:
+        if selected:
+            for program in programs:
+                add_changes("programs", store.sync_table("programs", [program], {"serialNumber": program["serialNumber"]}))
+        else:
+            existing = set(row[0] for row in store.db.execute("SELECT serialNumber FROM programs"))
+            add_changes("programs", store.sync_table("programs", programs))
+            for serial_number in existing - set(program["serialNumber"] for program in programs):
+                deleted = store.remove_program(serial_number)
+                for table in ["configs", "entitlements"]:
+                    changes[table]["deleted"] += deleted[table]
+        for program, result in zip(programs, results):
+            if result["failed"]:
+                failed.append(dict(serialNumber=program["serialNumber"], msg=result["msg"]))
+                continue
+            scope = {"programSerialNumber": program["serialNumber"]}
+            add_changes("configs", store.sync_table("configs", result["configs"], scope))
+            if result["entitlements"] is not None:
+                add_changes("entitlements", store.sync_table("entitlements", result["entitlements"], scope))
+            store.set_synced(program["serialNumber"])
+        if module.check_mode:
+            store.db.rollback()
+        else:
+            store.db.commit()
+    except sqlite3.Error as e:
+        store.db.rollback()
+        module.fail_json(msg="Failed to update the FortiFlex mirror: {0}".format(e))
+    finally:
+        store.close()
+
+    changed = any(counts[key] for counts in changes.values() for key in ["inserted", "updated", "deleted"])
+    response = dict(changed=changed, database=store.path, changes=changes, failed_programs=failed)
+    if failed:
+        module.fail_json(msg="{0} programs failed to sync.".format(len(failed)), **response)
+    module.exit_json(**response)
+
+
+if __name__ == "__main__":
+    main()
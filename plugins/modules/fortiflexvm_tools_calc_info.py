@@ -32,6 +32,24 @@ options:
         description:
             - The password to authenticate. If not declared, the code will read the environment variable FORTIFLEX_ACCESS_PASSWORD.
         type: str
+    connect_timeout:
+        description:
+            - Seconds to wait for a connection to FortiFlex to be established.
+            - If not declared, the code will read the environment variable FORTIFLEX_CONNECT_TIMEOUT. The default is 10.
+        type: float
+        version_added: 2.4.0
+    read_timeout:
+        description:
+            - Seconds to wait for FortiFlex to send a response.
+            - If not declared, the code will read the environment variable FORTIFLEX_READ_TIMEOUT. The default is 120.
+        type: float
+        version_added: 2.4.0
+    task_timeout:
+        description:
+            - Overall time limit of the task in seconds, including login, retries and every request the task sends.
+            - If not declared, the code will read the environment variable FORTIFLEX_TASK_TIMEOUT. No limit by default.
+        type: float
+        version_added: 2.4.0
     bypass_validation:
         description:
             - Only set to True when module schema diffs with FortiFlex API structure, module continues to execute without validating parameters.
@@ -849,8 +867,8 @@ status:
 """
 
 from ansible.module_utils.basic import AnsibleModule
-from ansible.module_utils.basic import _load_params
 from ansible_collections.fortinet.fortiflexvm.plugins.module_utils import utils
+from ansible_collections.fortinet.fortiflexvm.plugins.module_utils.argument_specs import CALC_PRODUCT_SPECS
 from ansible_collections.fortinet.fortiflexvm.plugins.module_utils.connection import Connection
 
 
@@ -858,32 +876,16 @@ def get_module_args():
     module_args = dict(
         username=dict(type='str'),
         password=dict(type='str', no_log=True),
+        connect_timeout=dict(type='float'),
+        read_timeout=dict(type='float'),
+        task_timeout=dict(type='float'),
         bypass_validation=dict(type="bool", default=False),
         programSerialNumber=dict(type="str", required=True),
         count=dict(type="int", default=1),
     )
 
-    # Get product-specific parameters
-    products = utils.get_products(key="name")
-    ignore_validation = False
-    params = _load_params()
-    if params and "bypass_validation" in params and params["bypass_validation"] is True:
-        ignore_validation = True
-    for product_name in products:
-        if ignore_validation:
-            module_args[product_name] = {"type": "dict", "required": False}
-        else:
-            product_dict = {"type": "dict", "required": False, "options": {}}
-            for param in products[product_name]["parameters"]:
-                param_details = dict(type=param["type"], required=param["required"])
-                if param["id"] == 47:  # fortiEDR -> endpoints
-                    param_details["required"] = True
-                if "default" in param:
-                    param_details["default"] = param["default"]
-                if "elements" in param:
-                    param_details["elements"] = param["elements"]
-                product_dict["options"][param["name"]] = param_details
-            module_args[product_name] = product_dict
+    # Product-specific parameters, checked by AnsibleModule unless bypass_validation is set
+    module_args.update(utils.get_product_specs(CALC_PRODUCT_SPECS))
     return module_args
 
 
@@ -0,0 +1,110 @@
+# Copyright: (c) 2023 Fortinet
+# GNU General Public License v3.0+ (see LICENSE or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import os
+import json
+import sys
+
+import pytest
+
+from ansible.module_utils import basic
+from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.fortinet.fortiflexvm.plugins.action import fortiflexvm as action
+
+
+class FakeTask():
+    def __init__(self, async_val=0):
+        self.async_val = async_val
+        self.args = {"name": "web"}
+
+
+class FakePlayContext():
+    def __init__(self, connection):
+        self.connection = connection
+
+
+def make_action(async_val=0, connection="local"):
+    # Only the attributes used to choose and run the in-process execution are set.
+    plugin = action.ActionModule.__new__(action.ActionModule)
+    plugin._task = FakeTask(async_val)
+    plugin._play_context = FakePlayContext(connection)
+    plugin._update_module_args = lambda module_name, args, task_vars: args.update(_ansible_check_mode=True)
+    plugin._compute_environment_string = lambda environment: environment.update(FORTIFLEX_TEST="from task")
+    return plugin
+
+
+class EchoModule():
+    # A module that returns its arguments and the environment it was run with.
+    @staticmethod
+    def main():
+        module = AnsibleModule(argument_spec=dict(name=dict(type="str")), supports_check_mode=True)
+        module.exit_json(name=module.params["name"], check_mode=module.check_mode, environment=os.environ.get("FORTIFLEX_TEST"))
+
+
+class BrokenModule():
+    @staticmethod
+    def main():
+        raise RuntimeError("broken")
+
+
+@pytest.fixture
+def controller_execution(monkeypatch):
+    monkeypatch.setenv("FORTIFLEX_CONTROLLER_EXECUTION", "true")
+    monkeypatch.setattr(action, "ansible_version", "2.16.0")
+
+
+def test_parse_module_output():
+    assert action.parse_module_output('warning\n{"changed": true}\n') == {"changed": True}
+    result = action.parse_module_output("Traceback (most recent call last):\n")
+    assert result["failed"] is True and "valid result" in result["msg"]
+
+
+def test_module_arguments_are_restored():
+    saved_args = basic._ANSIBLE_ARGS
+    with action.module_arguments({"name": "web"}):
+        assert json.loads(basic._ANSIBLE_ARGS)["ANSIBLE_MODULE_ARGS"] == {"name": "web"}
+    assert basic._ANSIBLE_ARGS is saved_args
+
+
+def test_task_environment_is_restored(monkeypatch):
+    monkeypatch.setenv("FORTIFLEX_TEST", "before")
+    monkeypatch.delenv("FORTIFLEX_OTHER", raising=False)
+    with action.task_environment({"FORTIFLEX_TEST": "task", "FORTIFLEX_OTHER": 1}):
+        assert (os.environ["FORTIFLEX_TEST"], os.environ["FORTIFLEX_OTHER"]) == ("task", "1")
+    assert os.environ["FORTIFLEX_TEST"] == "before"
+    assert "FORTIFLEX_OTHER" not in os.environ
+
+
+def test_run_on_controller(controller_execution):
+    assert make_action()._run_on_controller() is True
+    # Async tasks and tasks of the httpapi plugin run as usual
+    assert make_action(async_val=60)._run_on_controller() is False
+    assert make_action(connection="ansible.netcommon.httpapi")._run_on_controller() is False
+
+
+def test_run_on_controller_is_opt_in(monkeypatch):
+    monkeypatch.delenv("FORTIFLEX_CONTROLLER_EXECUTION", raising=False)
+    assert make_action()._run_on_controller() is False
+
+
+def test_run_on_controller_needs_tested_version(controller_execution, monkeypatch):
+    monkeypatch.setattr(action, "ansible_version", "2.19.0")
+    assert make_action()._run_on_controller() is False
+
+
+def test_run_module(monkeypatch):
+    monkeypatch.delenv("FORTIFLEX_TEST", raising=False)
+    stdout = sys.stdout
+    result = make_action()._run_module(EchoModule, "fortiflexvm_echo", {})
+    assert (result["name"], result["check_mode"], result["environment"]) == ("web", True, "from task")
+    assert sys.stdout is stdout
+    assert "FORTIFLEX_TEST" not in os.environ
+
+
+def test_run_module_exception():
+    result = make_action()._run_module(BrokenModule, "fortiflexvm_broken", {})
+    assert result["failed"] is True
+    assert "raised an exception: broken" in result["msg"] and "RuntimeError" in result["exception"]
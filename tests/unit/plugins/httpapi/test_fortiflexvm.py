@@ -0,0 +1,124 @@
+# Copyright: (c) 2023 Fortinet
+# GNU General Public License v3.0+ (see LICENSE or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import time
+
+import pytest
+
+from ansible.module_utils.connection import ConnectionError
+from ansible_collections.fortinet.fortiflexvm.plugins.httpapi.fortiflexvm import HttpApi, PersistentModule
+from ansible_collections.fortinet.fortiflexvm.plugins.module_utils.connection import Connection, persistent_error_details
+from ansible_collections.fortinet.fortiflexvm.tests.unit.plugins.utils import FailJson, FakeModule, make_response
+
+
+class SocketModule(FakeModule):
+    # A module of a task that runs through the httpapi connection plugin
+    def __init__(self, params=None, socket_path=None):
+        super(SocketModule, self).__init__(params)
+        self._socket_path = socket_path
+
+
+class FakePluginConnection():
+    def get_option(self, name):
+        return {"remote_user": "user", "password": "password"}[name]
+
+
+class FakePersistentConnection():
+    # Stands in for the JSON-RPC client of the module side, calls the plugin directly.
+    def __init__(self, plugin):
+        self.plugin = plugin
+        self.calls = []
+
+    def send_request(self, url, data, **kwargs):
+        self.calls.append(kwargs)
+        return self.plugin.send_request(url, data, **kwargs)
+
+
+@pytest.fixture
+def plugin(monkeypatch):
+    for name in ["FORTIFLEX_CONNECT_TIMEOUT", "FORTIFLEX_READ_TIMEOUT", "FORTIFLEX_TASK_TIMEOUT"]:
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setenv("FORTIFLEX_TOKEN_CACHE", "false")
+    monkeypatch.setattr(Connection, "login", lambda self, check_error=True: None)
+    sent = []
+
+    def request(self, url, data, method="post", idempotent=None):
+        # Record the timeouts the request would be sent with
+        sent.append(dict(url=url, timeout=self._request_timeout(self._check_deadline(url))))
+        if url == "fail":
+            self.module.fail_json(msg="Request failed with status code 500", response={"message": "boom"})
+        return make_response(200, {"entitlements": []})
+
+    monkeypatch.setattr(Connection, "request", request)
+    plugin = HttpApi(FakePluginConnection())
+    plugin.sent = sent
+    return plugin
+
+
+def module_connection(plugin, params):
+    connection = Connection(SocketModule(params, socket_path="/tmp/socket"), "", "")
+    connection.persistent_connection = FakePersistentConnection(plugin)
+    return connection
+
+
+def test_persistent_requests_use_their_task_timeouts(plugin):
+    first = module_connection(plugin, {"connect_timeout": 3, "read_timeout": 4, "task_timeout": 60})
+    assert first.send_request("entitlements/list", {}) == {"entitlements": []}
+    connect_timeout, read_timeout = plugin.sent[0]["timeout"]
+    assert (connect_timeout, read_timeout) == (3, 4)
+
+    # The next task of the play gets its own timeouts and deadline, not those of the task that logged in
+    second = module_connection(plugin, {"read_timeout": 50, "task_timeout": 20})
+    second.send_request("entitlements/list", {})
+    connect_timeout, read_timeout = plugin.sent[1]["timeout"]
+    assert connect_timeout == 10 and 19 < read_timeout <= 20
+    assert second.persistent_connection.calls[0]["timeouts"]["read_timeout"] == 50
+
+    # Without a task timeout, the request has no deadline
+    third = module_connection(plugin, {})
+    third.send_request("entitlements/list", {})
+    assert plugin.sent[2]["timeout"] == (10, 120)
+    assert plugin.fortiflex.deadline is None
+    assert (plugin.fortiflex.connect_timeout, plugin.fortiflex.read_timeout) == (3, 4)
+
+
+def test_persistent_task_deadline(plugin):
+    connection = module_connection(plugin, {"task_timeout": 20})
+    connection.deadline = time.time() - 1
+    with pytest.raises(FailJson) as e:
+        connection.send_request("entitlements/list", {})
+    assert "Task timeout exceeded" in e.value.args[0]["msg"]
+    assert plugin.sent == []
+
+
+def test_persistent_errors_keep_their_details(plugin):
+    connection = module_connection(plugin, {})
+    with pytest.raises(ConnectionError):
+        connection.persistent_connection.send_request("fail", {}, timeouts={})
+
+    def send_request(url, data, **kwargs):
+        try:
+            return plugin.send_request(url, data, **kwargs)
+        except ConnectionError as e:
+            # Only the text of the error crosses the socket
+            raise ConnectionError(str(e), code=1)
+
+    connection.persistent_connection.send_request = send_request
+    with pytest.raises(FailJson) as e:
+        connection.send_request("fail", {})
+    assert e.value.args[0]["msg"] == "Request failed with status code 500"
+    assert e.value.args[0]["response"] == {"message": "boom"}
+
+
+def test_persistent_module_fail_json():
+    with pytest.raises(ConnectionError) as e:
+        PersistentModule().fail_json(msg="failed", response={"status": 1}, status=b"bytes")
+    assert persistent_error_details(e.value) == {"msg": "failed", "response": {"status": 1}, "status": "bytes"}
+
+
+def test_persistent_error_details_of_other_errors():
+    assert persistent_error_details(ConnectionError("socket closed", code=2)) == {"msg": "socket closed", "code": 2}
+    assert persistent_error_details(ConnectionError('["not", "details"]')) == {"msg": '["not", "details"]', "code": None}
@@ -0,0 +1,98 @@
+# Copyright: (c) 2023 Fortinet
+# GNU General Public License v3.0+ (see LICENSE or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import pytest
+
+from ansible.inventory.data import InventoryData
+from ansible.parsing.dataloader import DataLoader
+from ansible.template import Templar
+from ansible_collections.fortinet.fortiflexvm.plugins.inventory.fortiflexvm import InventoryModule, list_entitlements
+from ansible_collections.fortinet.fortiflexvm.tests.unit.plugins.utils import ExitJson, FakeModule
+
+
+OPTIONS = {"hostname": "serialNumber", "strict": False, "compose": {}, "groups": {}, "keyed_groups": [],
+           "programSerialNumbers": None, "configIds": None, "status": None, "include_tokens": False}
+
+CONFIGS = [{"id": 1, "name": "fgt", "programSerialNumber": "P1", "fortiGateBundle": {"cpu": 4}}]
+
+ENTITLEMENTS = [
+    {"serialNumber": "FGVMMLTM00000001", "configId": 1, "description": "web", "status": "ACTIVE", "tokenStatus": "USED",
+     "token": "T1"},
+    {"serialNumber": "FGVMMLTM00000002", "configId": 1, "description": "db", "status": "STOPPED", "tokenStatus": "NOTUSED",
+     "folderPath": "My Assets/lab", "token": "T2"},
+    {"serialNumber": "FGVMMLTM00000003", "configId": 1, "description": "db", "status": "ACTIVE", "tokenStatus": "NOTUSED"},
+    {"serialNumber": "FGVMMLTM00000004", "configId": 1, "description": "", "status": "ACTIVE", "tokenStatus": "NOTUSED"},
+]
+
+
+class FakeConnection():
+    # Answers the listings with the given entitlements.
+    def __init__(self, entitlements):
+        self.entitlements = entitlements
+        self.sent = []
+
+    def iter_response_items(self, url, data, key, method="post", others=None):
+        self.sent.append(data)
+        for entitlement in self.entitlements:
+            yield dict(entitlement)
+
+
+def make_plugin(**options):
+    plugin = InventoryModule()
+    plugin.inventory = InventoryData()
+    plugin.templar = Templar(loader=DataLoader())
+    values = dict(OPTIONS, **options)
+    plugin.get_option = lambda name: values[name]
+    return plugin
+
+
+def test_hostnames():
+    plugin = make_plugin()
+    assert plugin._hostnames(ENTITLEMENTS)["FGVMMLTM00000001"] == "FGVMMLTM00000001"
+    # A description shared by several entitlements, or empty, falls back to the serial number
+    warnings = []
+    plugin = make_plugin(hostname="description")
+    plugin.display.warning = warnings.append
+    assert plugin._hostnames(ENTITLEMENTS) == {"FGVMMLTM00000001": "web", "FGVMMLTM00000002": "FGVMMLTM00000002",
+                                               "FGVMMLTM00000003": "FGVMMLTM00000003", "FGVMMLTM00000004": "FGVMMLTM00000004"}
+    assert len(warnings) == 1 and "db" in warnings[0]
+
+
+def test_populate():
+    plugin = make_plugin(hostname="description", keyed_groups=[{"key": "fortiflex_entitlement.status", "prefix": "state"}])
+    plugin.display.warning = lambda msg: None
+    plugin._populate({"configs": CONFIGS, "entitlements": ENTITLEMENTS})
+    host = plugin.inventory.get_host("web")
+    assert host.vars["fortiflex_entitlement"]["serialNumber"] == "FGVMMLTM00000001"
+    assert host.vars["fortiflex_config"] == CONFIGS[0]
+    assert host.vars["fortiflex_product_type"] == "fortiGateBundle"
+    groups = plugin.inventory.groups
+    assert set(host.name for host in groups["fortiflex_config_1"].get_hosts()) == \
+        set(["web", "FGVMMLTM00000002", "FGVMMLTM00000003", "FGVMMLTM00000004"])
+    assert [host.name for host in groups["fortiflex_status_STOPPED"].get_hosts()] == ["FGVMMLTM00000002"]
+    assert [host.name for host in groups["fortiflex_folder_My_Assets_lab"].get_hosts()] == ["FGVMMLTM00000002"]
+    assert "web" in [host.name for host in groups["fortiflex_product_fortiGateBundle"].get_hosts()]
+    assert [host.name for host in groups["state_STOPPED"].get_hosts()] == ["FGVMMLTM00000002"]
+
+
+ALL = ["FGVMMLTM00000001", "FGVMMLTM00000002", "FGVMMLTM00000003", "FGVMMLTM00000004"]
+
+
+@pytest.mark.parametrize("status, include_tokens, sent, expected", [
+    (None, False, {"configId": 1}, ALL),
+    (["STOPPED"], False, {"configId": 1, "status": "STOPPED"}, ["FGVMMLTM00000002"]),
+    (["STOPPED", "ACTIVE"], True, {"configId": 1}, ALL),
+])
+def test_list_entitlements(status, include_tokens, sent, expected):
+    # The fake listing ignores the status sent, one status is filtered by FortiFlex
+    entitlements = ENTITLEMENTS if status != ["STOPPED"] else ENTITLEMENTS[1:2]
+    connection = FakeConnection(entitlements)
+    with pytest.raises(ExitJson) as e:
+        list_entitlements(FakeModule({"configId": 1, "status": status, "include_tokens": include_tokens}), connection)
+    assert connection.sent == [sent]
+    entitlements = e.value.args[0]["entitlements"]
+    assert [entitlement["serialNumber"] for entitlement in entitlements] == expected
+    assert any("token" in entitlement for entitlement in entitlements) is include_tokens
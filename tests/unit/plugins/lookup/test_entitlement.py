@@ -0,0 +1,106 @@
+# Copyright: (c) 2023 Fortinet
+# GNU General Public License v3.0+ (see LICENSE or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import os
+import time
+
+import pytest
+
+from ansible.errors import AnsibleError
+from ansible_collections.fortinet.fortiflexvm.plugins.lookup import entitlement as lookup
+
+
+OPTIONS = {"username": "user", "password": "password", "programSerialNumbers": None, "field": "entitlement",
+           "errors": "strict", "cache_ttl": 300}
+
+ENTITLEMENT = {"serialNumber": "FGVMMLTM00000001", "configId": 1, "description": "web", "token": "T1"}
+CONFIG = {"id": 1, "name": "fgt", "fortiGateBundle": {"cpu": 4}}
+
+
+@pytest.fixture
+def fetches(tmp_path, monkeypatch):
+    # Replace the listing of the programs with a fake, and count the listings.
+    fetched = []
+    monkeypatch.setattr(lookup, "_listings", {})
+
+    def fetch(self):
+        fetched.append(time.time())
+        return {"time": time.time(), "tokens": True, "entitlements": {ENTITLEMENT["serialNumber"]: dict(ENTITLEMENT)},
+                "configs": {"1": CONFIG}}
+
+    monkeypatch.setattr(lookup.LookupModule, "_fetch", fetch)
+    monkeypatch.setitem(OPTIONS, "cache_path", str(tmp_path / "lookup_cache.json"))
+    return fetched
+
+
+def run(terms, **options):
+    plugin = lookup.LookupModule()
+    values = dict(OPTIONS, **options)
+    plugin.set_options = lambda var_options=None, direct=None: None
+    plugin.get_option = lambda name: values[name]
+    return plugin.run(terms)
+
+
+def test_without_tokens():
+    listing = {"time": 1, "tokens": True, "entitlements": {"S1": {"serialNumber": "S1", "token": "T1"}}, "configs": {}}
+    assert lookup.without_tokens(listing) == {"time": 1, "tokens": False, "entitlements": {"S1": {"serialNumber": "S1"}},
+                                              "configs": {}}
+    # The listing itself is left as is
+    assert listing["entitlements"]["S1"]["token"] == "T1"
+
+
+def test_fields(fetches):
+    entitlement = dict(ENTITLEMENT)
+    del entitlement["token"]
+    assert run(["FGVMMLTM00000001"]) == [entitlement]
+    assert run(["FGVMMLTM00000001"], field="config") == [CONFIG]
+    assert run(["FGVMMLTM00000001"], field="token") == ["T1"]
+
+
+def test_missing_serial_number(fetches):
+    with pytest.raises(AnsibleError):
+        run(["FGVMMLTM00000009"])
+    assert run(["FGVMMLTM00000009", "FGVMMLTM00000001"], errors="ignore", field="token") == [None, "T1"]
+    # A serial number missing from the listing doesn't list the programs again
+    assert len(fetches) == 2
+
+
+def test_listing_is_shared(fetches):
+    run(["FGVMMLTM00000001"])
+    run(["FGVMMLTM00000001"])
+    assert len(fetches) == 1
+    # Another process of the run reads the file cache, which holds no token
+    lookup._listings.clear()
+    run(["FGVMMLTM00000001"])
+    assert len(fetches) == 1
+    with open(OPTIONS["cache_path"]) as f:
+        assert "T1" not in f.read()
+    # Another credential has its own listing
+    run(["FGVMMLTM00000001"], password="other")
+    assert len(fetches) == 2
+
+
+def test_token_lookup_lists_again(fetches):
+    run(["FGVMMLTM00000001"])
+    assert run(["FGVMMLTM00000001"], field="token") == ["T1"]
+    assert run(["FGVMMLTM00000001"], field="token") == ["T1"]
+    assert len(fetches) == 2
+
+
+def test_expired_listing(fetches, monkeypatch):
+    run(["FGVMMLTM00000001"])
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 300)
+    run(["FGVMMLTM00000001"])
+    assert len(fetches) == 2
+
+
+def test_without_file_cache(fetches):
+    run(["FGVMMLTM00000001"], cache_ttl=0)
+    run(["FGVMMLTM00000001"], cache_ttl=0)
+    assert len(fetches) == 1
+    assert not os.path.exists(OPTIONS["cache_path"])
+    assert not os.path.exists(OPTIONS["cache_path"] + ".key")
@@ -0,0 +1,98 @@
+# Copyright: (c) 2023 Fortinet
+# GNU General Public License v3.0+ (see LICENSE or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import pytest
+
+from ansible_collections.fortinet.fortiflexvm.plugins.module_utils import configs_cache
+from ansible_collections.fortinet.fortiflexvm.plugins.modules.fortiflexvm_configs_create import find_existing_config
+
+
+class FakeConnection():
+    # Lists the given configs, and counts the list calls.
+    def __init__(self, configs):
+        self.username = "user"
+        self.password = "password"
+        self.configs = configs
+        self.calls = 0
+
+    def send_request(self, url, data, method="post", check_error=True):
+        self.calls += 1
+        return {"configs": list(self.configs)}
+
+
+def config(config_id, name, status="ACTIVE", cpu="2"):
+    return {"id": config_id, "name": name, "status": status, "productType": {"id": 1},
+            "parameters": [{"id": 1, "value": cpu}, {"id": 2, "value": "FC"}]}
+
+
+@pytest.fixture(autouse=True)
+def cache_path(tmp_path, monkeypatch):
+    path = str(tmp_path / "configs_cache.json")
+    monkeypatch.setenv("FORTIFLEX_CONFIGS_CACHE_PATH", path)
+    monkeypatch.delenv("FORTIFLEX_CONFIGS_CACHE_TTL", raising=False)
+    return path
+
+
+def test_config_hash_ignores_order_and_types():
+    assert configs_cache.config_hash(1, [{"id": 1, "value": 2}, {"id": 2, "value": "FC"}]) == \
+        configs_cache.config_hash("1", [{"id": 2, "value": "FC"}, {"id": 1, "value": "2"}])
+    assert configs_cache.config_hash(1, [{"id": 1, "value": 2}]) != configs_cache.config_hash(2, [{"id": 1, "value": 2}])
+
+
+def test_configs_index_find():
+    index = configs_cache.ConfigsIndex([config(3, "web", status="DISABLED"), config(4, "web"), config(5, "db", cpu="4")])
+    # ACTIVE configurations first
+    assert index.find(name="web")["id"] == 4
+    assert index.find(product_type_id=1, parameters=[{"id": 2, "value": "FC"}, {"id": 1, "value": 4}])["id"] == 5
+    assert index.find(name="db", product_type_id=1, parameters=config(0, "")["parameters"]) is None
+    assert index.find(name="other") is None
+
+
+def test_list_configs_is_cached():
+    connection = FakeConnection([config(1, "web")])
+    assert configs_cache.list_configs(connection, "ELAVMS0000000001") == [config(1, "web")]
+    configs_cache.list_configs(connection, "ELAVMS0000000001")
+    assert connection.calls == 1
+    # Another program, a refresh or another credential list again
+    configs_cache.list_configs(connection, "ELAVMS0000000002")
+    configs_cache.list_configs(connection, "ELAVMS0000000001", refresh=True)
+    connection.password = "other"
+    configs_cache.list_configs(connection, "ELAVMS0000000001")
+    assert connection.calls == 4
+
+
+def test_list_configs_without_cache(monkeypatch, cache_path):
+    monkeypatch.setenv("FORTIFLEX_CONFIGS_CACHE_TTL", "0")
+    connection = FakeConnection([])
+    configs_cache.list_configs(connection, "ELAVMS0000000001")
+    configs_cache.list_configs(connection, "ELAVMS0000000001")
+    assert connection.calls == 2
+
+
+def test_store_config_updates_cached_listing():
+    connection = FakeConnection([config(1, "web")])
+    configs_cache.list_configs(connection, "ELAVMS0000000001")
+    configs_cache.store_config(connection, "ELAVMS0000000001", None, config(2, "db"))
+    configs_cache.store_config(connection, "ELAVMS0000000001", None, config(1, "web", cpu="8"))
+    assert configs_cache.list_configs(connection, "ELAVMS0000000001") == [config(2, "db"), config(1, "web", cpu="8")]
+    assert connection.calls == 1
+
+
+def test_find_existing_config_confirms_match_in_fresh_listing():
+    data = {"programSerialNumber": "ELAVMS0000000001", "name": "web", "productTypeId": 1,
+            "parameters": config(0, "")["parameters"]}
+    connection = FakeConnection([config(1, "web"), config(2, "other", cpu="4")])
+    configs_cache.list_configs(connection, "ELAVMS0000000001")
+    assert find_existing_config(connection, data, "name")["id"] == 1
+    assert find_existing_config(connection, data, "parameters")["id"] == 1
+    assert connection.calls == 3
+    assert find_existing_config(connection, dict(data, name="other"), "name_and_parameters") is None
+    # A miss in the cached listing is not looked up again
+    assert find_existing_config(connection, dict(data, name="db"), "name") is None
+    assert connection.calls == 3
+    # The configuration was deleted since it was cached
+    connection.configs = []
+    assert find_existing_config(connection, data, "name") is None
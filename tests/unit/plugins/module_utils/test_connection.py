@@ -0,0 +1,166 @@
+# Copyright: (c) 2023 Fortinet
+# GNU General Public License v3.0+ (see LICENSE or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import time
+
+import pytest
+import requests
+
+from ansible_collections.fortinet.fortiflexvm.plugins.module_utils.connection import Connection, RetryPolicy
+from ansible_collections.fortinet.fortiflexvm.tests.unit.plugins.utils import FailJson, FakeModule, FakeSession, make_response
+
+
+@pytest.fixture(autouse=True)
+def environment(monkeypatch):
+    for name in ["FORTIFLEX_RETRY_MAX_ATTEMPTS", "FORTIFLEX_RETRY_BACKOFF_FACTOR", "FORTIFLEX_RETRY_MAX_BACKOFF",
+                 "FORTIFLEX_RETRY_TOTAL_BUDGET", "FORTIFLEX_CONNECT_TIMEOUT", "FORTIFLEX_READ_TIMEOUT",
+                 "FORTIFLEX_TASK_TIMEOUT", "FORTIFLEX_LOG_PATH"]:
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setenv("FORTIFLEX_TOKEN_CACHE", "false")
+    monkeypatch.setattr(Connection, "login", lambda self, check_error=True: None)
+
+
+def make_connection(outcomes, params=None, **kwargs):
+    kwargs.setdefault("retry_policy", RetryPolicy(max_attempts=3, backoff_factor=0))
+    connection = Connection(FakeModule(params), "user", "password", **kwargs)
+    connection.http_session = FakeSession(list(outcomes))
+    return connection
+
+
+def test_retry_policy_settings(monkeypatch):
+    monkeypatch.setenv("FORTIFLEX_RETRY_MAX_ATTEMPTS", "7")
+    monkeypatch.setenv("FORTIFLEX_RETRY_BACKOFF_FACTOR", "invalid")
+    policy = RetryPolicy(max_backoff=2)
+    assert policy.max_attempts == 7
+    assert policy.backoff_factor == 1.0
+    assert policy.max_backoff == 2.0
+    assert policy.total_budget == 120.0
+    assert RetryPolicy(max_attempts=0).max_attempts == 1
+
+
+@pytest.mark.parametrize("status_code, idempotent, expected", [
+    (200, True, False),
+    (400, True, False),
+    (500, True, False),
+    (503, True, True),
+    (503, False, False),
+    (429, False, True),
+])
+def test_retry_policy_status_codes(status_code, idempotent, expected):
+    assert RetryPolicy().should_retry(idempotent, response=make_response(status_code)) is expected
+
+
+def test_retry_policy_transport_errors():
+    policy = RetryPolicy()
+    assert policy.should_retry(True, error=requests.exceptions.ConnectionError())
+    assert not policy.should_retry(False, error=requests.exceptions.ReadTimeout())
+    # A connect timeout never reached the server, so even a create is safe to resend
+    assert policy.should_retry(False, error=requests.exceptions.ConnectTimeout())
+
+
+def test_retry_policy_backoff():
+    policy = RetryPolicy(backoff_factor=1, max_backoff=5)
+    for attempt in range(10):
+        assert 0 <= policy.backoff(attempt) <= min(5, 2 ** attempt)
+    assert policy.backoff(0, make_response(429, headers={"Retry-After": "12"})) == 12
+    assert policy.backoff(0, make_response(429, headers={"Retry-After": "invalid date"})) <= 1
+    http_date = time.strftime("%a, %d %b %Y %H:%M:%S GMT", time.gmtime(time.time() + 30))
+    assert 25 <= policy.backoff(0, make_response(429, headers={"Retry-After": http_date})) <= 30
+
+
+def test_send_retries_idempotent_request():
+    connection = make_connection([make_response(503), requests.exceptions.ConnectionError(), make_response(200, {"ok": 1})])
+    response = connection.send("https://example.com/list", {}, idempotent=True)
+    assert response.status_code == 200
+    assert len(connection.http_session.calls) == 3
+
+
+def test_send_does_not_retry_non_idempotent_request():
+    connection = make_connection([make_response(503), make_response(200)])
+    response = connection.send("https://example.com/create", {}, idempotent=False)
+    assert response.status_code == 503
+    assert len(connection.http_session.calls) == 1
+
+
+def test_send_retries_throttled_request():
+    connection = make_connection([make_response(429), make_response(200)])
+    assert connection.send("https://example.com/create", {}, idempotent=False).status_code == 200
+
+
+def test_send_stops_after_max_attempts():
+    connection = make_connection([make_response(503)] * 5)
+    assert connection.send("https://example.com/list", {}, idempotent=True).status_code == 503
+    assert len(connection.http_session.calls) == 3
+
+
+def test_send_fails_on_transport_error():
+    connection = make_connection([requests.exceptions.ReadTimeout("timed out")])
+    with pytest.raises(FailJson) as e:
+        connection.send("https://example.com/create", {}, idempotent=False)
+    assert "timed out" in e.value.args[0]["msg"]
+
+
+def test_send_respects_total_budget():
+    # A Retry-After longer than the budget ends the retries instead of sleeping
+    policy = RetryPolicy(max_attempts=5, backoff_factor=0, total_budget=1)
+    connection = make_connection([make_response(429, headers={"Retry-After": "60"}), make_response(200)], retry_policy=policy)
+    assert connection.send("https://example.com/list", {}, idempotent=True).status_code == 429
+
+
+def test_timeout_settings(monkeypatch):
+    connection = make_connection([])
+    assert (connection.connect_timeout, connection.read_timeout, connection.deadline) == (10, 120, None)
+    # Argument, then module parameter, then environment variable. 0 disables the limit
+    monkeypatch.setenv("FORTIFLEX_CONNECT_TIMEOUT", "3")
+    monkeypatch.setenv("FORTIFLEX_READ_TIMEOUT", "0")
+    connection = make_connection([], params={"connect_timeout": 5})
+    assert (connection.connect_timeout, connection.read_timeout) == (5, None)
+    connection = make_connection([], params={"connect_timeout": 5}, connect_timeout=7)
+    assert connection.connect_timeout == 7
+    assert make_connection([]).connect_timeout == 3
+    with pytest.raises(FailJson):
+        make_connection([], params={"read_timeout": "soon"})
+
+
+def test_task_timeout_sets_deadline(monkeypatch):
+    monkeypatch.setenv("FORTIFLEX_TASK_TIMEOUT", "30")
+    connection = make_connection([])
+    assert 29 < connection.remaining_time() <= 30
+    connection = make_connection([], params={"task_timeout": 0})
+    assert connection.deadline is None and connection.remaining_time() is None
+
+
+def test_request_timeout_is_capped_by_deadline():
+    connection = make_connection([], connect_timeout=10, read_timeout=120)
+    assert connection._request_timeout(None) == (10, 120)
+    assert connection._request_timeout(5) == (5, 5)
+    connection.read_timeout = None
+    assert connection._request_timeout(50) == (10, 50)
+
+
+def test_send_uses_remaining_time():
+    connection = make_connection([make_response(200)], task_timeout=20)
+    connection.send("https://example.com/list", {}, idempotent=True)
+    connect_timeout, read_timeout = connection.http_session.calls[0]["timeout"]
+    assert connect_timeout == 10 and 19 < read_timeout <= 20
+
+
+def test_send_fails_after_deadline():
+    connection = make_connection([make_response(200)], task_timeout=20)
+    connection.deadline = time.time() - 1
+    with pytest.raises(FailJson) as e:
+        connection.send("https://example.com/list", {}, idempotent=True)
+    assert "Task timeout exceeded" in e.value.args[0]["msg"]
+    assert connection.http_session.calls == []
+
+
+def test_retries_stop_at_deadline():
+    # A backoff that ends after the task deadline is not waited for
+    policy = RetryPolicy(max_attempts=5, backoff_factor=0)
+    connection = make_connection([make_response(503, headers={"Retry-After": "10"}), make_response(200)],
+                                 retry_policy=policy, task_timeout=5)
+    assert connection.send("https://example.com/list", {}, idempotent=True).status_code == 503
+    assert len(connection.http_session.calls) == 1
@@ -0,0 +1,141 @@
+# Copyright: (c) 2023 Fortinet
+# GNU General Public License v3.0+ (see LICENSE or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import os
+
+import pytest
+
+from ansible_collections.fortinet.fortiflexvm.plugins.module_utils import mirror
+from ansible_collections.fortinet.fortiflexvm.plugins.module_utils.mirror import MirrorStore
+
+
+CONFIGS = [
+    {"id": 1, "name": "fgt", "status": "ACTIVE", "programSerialNumber": "P1", "accountId": 7,
+     "fortiGateBundle": {"cpu": 4, "service": "UTP", "fortiGuardServices": ["FGTAVDB", "FGTFAIS"]}},
+    {"id": 2, "name": "fgt-big", "status": "ACTIVE", "programSerialNumber": "P1", "accountId": 7,
+     "fortiGateBundle": {"cpu": 8, "service": "ATP", "fortiGuardServices": []}},
+]
+
+
+def entitlement(index, **kwargs):
+    record = {"serialNumber": "S%03d" % index, "configId": 1, "description": "web-%d" % index, "status": "ACTIVE",
+              "tokenStatus": "NOTUSED", "startDate": None, "endDate": None}
+    record.update(kwargs)
+    return record
+
+
+def serials(records):
+    return [record["serialNumber"] for record in records]
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = MirrorStore(str(tmp_path / "mirror.db"))
+    yield store
+    store.close()
+
+
+def sync_program(store, configs, entitlements, program="P1"):
+    scope = {"programSerialNumber": program}
+    counts = dict(configs=store.sync_table("configs", configs, scope), entitlements=store.sync_table("entitlements", entitlements, scope))
+    store.set_synced(program)
+    store.db.commit()
+    return counts
+
+
+def test_new_store_is_private(store):
+    assert os.stat(store.path).st_mode & 0o777 == 0o600
+
+
+def test_sync_table_counts(store):
+    entitlements = [entitlement(i) for i in range(5)]
+    counts = sync_program(store, CONFIGS, entitlements)
+    assert counts["entitlements"] == dict(inserted=5, updated=0, unchanged=0, deleted=0)
+    assert counts["configs"]["inserted"] == 2
+
+    entitlements[1] = entitlement(1, status="STOPPED")
+    del entitlements[3]
+    counts = sync_program(store, CONFIGS, entitlements)
+    assert counts["entitlements"] == dict(inserted=0, updated=1, unchanged=3, deleted=1)
+    assert counts["configs"] == dict(inserted=0, updated=0, unchanged=2, deleted=0)
+    assert serials(store.query("entitlements")) == ["S000", "S001", "S002", "S004"]
+
+
+def test_sync_table_scope(store):
+    # Syncing one program leaves the rows of the others alone
+    sync_program(store, CONFIGS, [entitlement(1)])
+    counts = sync_program(store, [], [entitlement(2, configId=3)], program="P2")
+    assert counts["entitlements"]["deleted"] == 0
+    assert len(list(store.query("entitlements"))) == 2
+    assert serials(store.query("entitlements", {"programSerialNumber": ["P2"]})) == ["S002"]
+
+
+def test_remove_program(store):
+    sync_program(store, CONFIGS, [entitlement(1), entitlement(2)])
+    assert store.remove_program("P1") == {"configs": 2, "entitlements": 2, "sync_state": 1}
+    store.db.commit()
+    assert store.db.execute("SELECT COUNT(*) FROM config_parameters").fetchone()[0] == 0
+    assert store.synced_at() is None
+
+
+def test_query_filters(store):
+    sync_program(store, CONFIGS, [entitlement(1), entitlement(2, configId=2, tokenStatus="USED"),
+                                  entitlement(3, description="db-3")])
+    assert serials(store.query("entitlements", {"tokenStatus": ["USED"]})) == ["S002"]
+    assert serials(store.query("entitlements", {"configId": [1], "status": ["ACTIVE"]})) == ["S001", "S003"]
+    assert serials(store.query("entitlements", description_pattern="web-*")) == ["S001", "S002"]
+    assert serials(store.query("entitlements", parameters={"cpu": 8})) == ["S002"]
+    assert serials(store.query("entitlements", parameters={"fortiGuardServices": ["FGTAVDB", "FGTFAIS"]})) == ["S001", "S003"]
+    assert serials(store.query("entitlements", product_types=["fortiGateBundle"], parameters={"service": "UTP"})) == ["S001", "S003"]
+    assert [config["id"] for config in store.query("configs", product_types=["fortiGateBundle"])] == [1, 2]
+    assert list(store.query("configs", product_types=["fortiWeb"])) == []
+    with pytest.raises(ValueError):
+        list(store.query("programs", {"status": ["ACTIVE"]}))
+
+
+def test_query_long_value_lists(store):
+    sync_program(store, CONFIGS, [entitlement(i) for i in range(10)])
+    accepted = ["S%03d" % i for i in range(0, 10, 2)] + ["X%d" % i for i in range(mirror.MAX_SQL_VALUES)]
+    assert serials(store.query("entitlements", {"serialNumber": accepted})) == ["S000", "S002", "S004", "S006", "S008"]
+
+
+def test_synced_at(store):
+    sync_program(store, CONFIGS, [])
+    assert store.synced_at(["P1"]) is not None
+    assert store.synced_at(["P1", "P2"]) is None
+    assert store.synced_at() == store.synced_at(["P1"])
+
+
+def test_readonly(store, tmp_path):
+    sync_program(store, CONFIGS, [entitlement(1)])
+    readonly = MirrorStore(store.path, readonly=True)
+    try:
+        assert len(list(readonly.query("entitlements"))) == 1
+        with pytest.raises(Exception):
+            readonly.db.execute("DELETE FROM entitlements")
+    finally:
+        readonly.close()
+    with pytest.raises(IOError):
+        MirrorStore(str(tmp_path / "missing.db"), readonly=True)
+
+
+def test_in_memory_copy(store, tmp_path):
+    sync_program(store, CONFIGS, [entitlement(1)])
+    copy = MirrorStore(store.path, in_memory=True)
+    try:
+        counts = sync_program(copy, CONFIGS, [entitlement(2)])
+        assert counts["entitlements"] == dict(inserted=1, updated=0, unchanged=0, deleted=1)
+    finally:
+        copy.close()
+    assert serials(store.query("entitlements")) == ["S001"]
+
+    path = str(tmp_path / "new" / "mirror.db")
+    copy = MirrorStore(path, in_memory=True)
+    try:
+        assert sync_program(copy, CONFIGS, [entitlement(1)])["entitlements"]["inserted"] == 1
+    finally:
+        copy.close()
+    assert not os.path.exists(os.path.dirname(path))
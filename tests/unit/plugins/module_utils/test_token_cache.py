@@ -0,0 +1,173 @@
+# Copyright: (c) 2023 Fortinet
+# GNU General Public License v3.0+ (see LICENSE or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import os
+import time
+import hashlib
+import threading
+
+import pytest
+
+from ansible_collections.fortinet.fortiflexvm.plugins.module_utils import connection as connection_utils
+from ansible_collections.fortinet.fortiflexvm.plugins.module_utils.connection import Connection
+from ansible_collections.fortinet.fortiflexvm.plugins.module_utils.token_cache import FileCache, TokenCache, LockTimeout
+from ansible_collections.fortinet.fortiflexvm.tests.unit.plugins.utils import FakeModule
+
+
+@pytest.fixture
+def cache_path(tmp_path, monkeypatch):
+    path = str(tmp_path / "token_cache.json")
+    monkeypatch.setenv("FORTIFLEX_TOKEN_CACHE", "true")
+    monkeypatch.setenv("FORTIFLEX_TOKEN_CACHE_PATH", path)
+    return path
+
+
+@pytest.fixture
+def grants(monkeypatch):
+    # Replace the token request with a slow fake, and count the tokens granted.
+    granted = []
+    lock = threading.Lock()
+
+    def grant_token(self, data, check_error=True):
+        time.sleep(0.2)
+        with lock:
+            granted.append(data["grant_type"])
+            self.access_token = "token-{0}".format(len(granted))
+        self.refresh_token = None
+        self.expires_at = time.time() + 3600
+        if self.save_session_file:
+            self._save_session()
+        return True
+
+    monkeypatch.setattr(Connection, "_grant_token", grant_token)
+    return granted
+
+
+def make_connection(cache_path):
+    connection = Connection(FakeModule(), "user", "password")
+    assert connection.token_cache.path == cache_path
+    return connection
+
+
+def test_file_cache_roundtrip(tmp_path):
+    cache = FileCache(str(tmp_path / "sub" / "cache.json"))
+    assert cache.get("key") is None
+    cache.set("key", {"value": 1})
+    cache.update("key", lambda entry: dict(entry, other=2))
+    assert cache.get("key") == {"value": 1, "other": 2}
+    assert os.stat(cache.path).st_mode & 0o777 == 0o600
+    cache.remove("key")
+    assert cache.get("key") is None
+
+
+def test_file_cache_ignores_invalid_file(tmp_path):
+    cache = FileCache(str(tmp_path / "cache.json"))
+    with open(cache.path, "w") as f:
+        f.write("not json")
+    assert cache.get("key") is None
+    cache.set("key", 1)
+    assert cache.get("key") == 1
+
+
+def test_credential_key(tmp_path):
+    cache = FileCache(str(tmp_path / "cache.json"))
+    key = cache.credential_key("user", "password")
+    # A secret kept next to the cache, so that the key isn't a plain hash of the password
+    assert key != hashlib.sha256(b"user\0password").hexdigest()
+    assert os.stat(cache.secret_path).st_mode & 0o777 == 0o600
+    assert FileCache(cache.path).credential_key("user", "password") == key
+    assert cache.credential_key("user", "other") != key
+    assert FileCache(str(tmp_path / "other.json")).credential_key("user", "password") != key
+
+
+def test_cache_holds_no_password_hash(cache_path, grants):
+    connection = make_connection(cache_path)
+    with open(cache_path) as f:
+        content = f.read()
+    assert connection.validation_hash not in content
+    assert connection.session_key() in content
+
+
+def test_refresh_lock_timeout(tmp_path):
+    cache = TokenCache(str(tmp_path / "cache.json"))
+    held = threading.Event()
+    release = threading.Event()
+
+    def hold():
+        with cache.refresh_lock():
+            held.set()
+            release.wait(5)
+
+    thread = threading.Thread(target=hold)
+    thread.start()
+    try:
+        held.wait(5)
+        with pytest.raises(LockTimeout):
+            with cache.refresh_lock(timeout=0.2):
+                pass
+        # get() and set() don't wait for the refresh lock
+        cache.set("key", 1)
+        assert cache.get("key") == 1
+    finally:
+        release.set()
+        thread.join()
+
+
+def test_login_reuses_cached_token(cache_path, grants):
+    make_connection(cache_path)
+    connection = make_connection(cache_path)
+    assert grants == ["password"]
+    assert connection.access_token == "token-1"
+
+
+def test_concurrent_refresh_is_single_flight(cache_path, grants):
+    connection = make_connection(cache_path)
+    stale_token = connection.access_token
+    # Expire the token, then let several threads notice it at the same time
+    connection.expires_at = time.time()
+    threads = [threading.Thread(target=connection.ensure_token) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(grants) == 2
+    assert connection.access_token != stale_token
+
+
+def test_refresh_waits_for_other_process(cache_path, grants):
+    # Connections of other processes share the token through the cache file, the refresh lock
+    # makes them wait for the one renewing it instead of requesting their own.
+    connection = make_connection(cache_path)
+    other = TokenCache(cache_path)
+    held = threading.Event()
+
+    def renew_elsewhere():
+        with other.refresh_lock():
+            held.set()
+            time.sleep(0.3)
+            other.set(connection.session_key(), {"access_token": "from-other-process", "refresh_token": None,
+                                                 "expires_at": time.time() + 3600})
+
+    thread = threading.Thread(target=renew_elsewhere)
+    thread.start()
+    held.wait(5)
+    connection.refresh_access_token()
+    thread.join()
+    assert connection.access_token == "from-other-process"
+    assert len(grants) == 1
+
+
+def test_refresh_without_cache(monkeypatch, grants):
+    monkeypatch.setenv("FORTIFLEX_TOKEN_CACHE", "false")
+    connection = Connection(FakeModule(), "user", "password")
+    assert connection.token_cache is None
+    connection.refresh_access_token()
+    assert grants == ["password", "password"]
+
+
+def test_refresh_locks_are_per_credential():
+    assert connection_utils._get_refresh_lock("a") is connection_utils._get_refresh_lock("a")
+    assert connection_utils._get_refresh_lock("a") is not connection_utils._get_refresh_lock("b")
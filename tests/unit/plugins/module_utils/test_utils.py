@@ -0,0 +1,163 @@
+# Copyright: (c) 2023 Fortinet
+# GNU General Public License v3.0+ (see LICENSE or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import json
+import threading
+
+import pytest
+
+from ansible.module_utils import basic
+from ansible.module_utils.common.text.converters import to_bytes
+from ansible_collections.fortinet.fortiflexvm.plugins.module_utils import utils
+from ansible_collections.fortinet.fortiflexvm.plugins.module_utils.argument_specs import BYPASS_PRODUCT_SPECS, CONFIG_PRODUCT_SPECS
+from ansible_collections.fortinet.fortiflexvm.tests.unit.plugins.utils import FailJson, FakeModule
+
+
+def test_canonical_parameters_ignores_order_and_types():
+    left = [{"id": 1, "value": 4}, {"id": 2, "value": "UTP"}, {"id": 10, "value": "5"}]
+    right = [{"id": "10", "value": 5}, {"id": 1, "value": "4"}, {"id": 2, "value": "UTP"}]
+    assert utils.canonical_parameters(left) == utils.canonical_parameters(right) == [(1, "4"), (2, "UTP"), (10, "5")]
+
+
+def test_canonical_parameters_keeps_repeated_parameters():
+    # List parameters such as the FortiGuard services repeat the same id
+    assert utils.canonical_parameters([{"id": 43, "value": "FGTAVDB"}, {"id": 43, "value": "FGTFAIS"}]) == \
+        utils.canonical_parameters([{"id": 43, "value": "FGTFAIS"}, {"id": 43, "value": "FGTAVDB"}])
+    assert utils.canonical_parameters([{"id": 43, "value": "FGTAVDB"}]) != \
+        utils.canonical_parameters([{"id": 43, "value": "FGTAVDB"}, {"id": 43, "value": "FGTFAIS"}])
+
+
+def test_canonical_parameters_ignores_read_only_parameters():
+    readonly = [param_id for param_id, param in utils.PARAMS_BY_ID.items() if param.get("readonly")]
+    assert readonly
+    assert utils.canonical_parameters([{"id": 1, "value": 4}, {"id": readonly[0], "value": "12"}]) == [(1, "4")]
+
+
+@pytest.mark.parametrize("args, expected", [
+    ({}, CONFIG_PRODUCT_SPECS),
+    ({"bypass_validation": False}, CONFIG_PRODUCT_SPECS),
+    ({"bypass_validation": True}, BYPASS_PRODUCT_SPECS),
+    ({"bypass_validation": "yes"}, BYPASS_PRODUCT_SPECS),
+])
+def test_get_product_specs(monkeypatch, args, expected):
+    monkeypatch.setattr(basic, "_ANSIBLE_ARGS", to_bytes(json.dumps({"ANSIBLE_MODULE_ARGS": args})))
+    assert utils.get_product_specs(CONFIG_PRODUCT_SPECS) is expected
+
+
+def test_iter_json_list():
+    document = {"status": 0, "entitlements": [{"serialNumber": "S1"}, {"serialNumber": "S2", "tags": [1, {"a": "]"}]}],
+                "message": "Request successfully processed."}
+    others = {}
+    items = list(utils.iter_json_list(json.dumps(document, indent=2), "entitlements", others))
+    assert items == document["entitlements"]
+    assert others == {"status": 0, "message": "Request successfully processed."}
+
+
+@pytest.mark.parametrize("text, expected", [
+    ('{"entitlements": []}', []),
+    ('{}', []),
+    (' {"message": "no list"} ', []),
+    ('{"entitlements": null}', []),
+    ('{"entitlements": [1,2 , 3]}', [1, 2, 3]),
+])
+def test_iter_json_list_shapes(text, expected):
+    assert list(utils.iter_json_list(text, "entitlements")) == expected
+
+
+def test_iter_json_list_is_lazy():
+    # The elements before an error are yielded before the error is raised
+    items = utils.iter_json_list('{"entitlements": [1, 2, oops]}', "entitlements")
+    assert next(items) == 1
+    assert next(items) == 2
+    with pytest.raises(ValueError):
+        next(items)
+
+
+@pytest.mark.parametrize("text", [
+    '',
+    '[1, 2]',
+    '{"entitlements": [1 2]}',
+    '{"entitlements" [1]}',
+    '{"entitlements": [1]',
+    '{"a": 1 "b": 2}',
+])
+def test_iter_json_list_invalid(text):
+    with pytest.raises(ValueError):
+        list(utils.iter_json_list(text, "entitlements"))
+
+
+class RunItemsConnection():
+    def __init__(self, module):
+        self.module = module
+        self.persistent_connection = None
+        self.threads = set()
+
+    def get_http_session(self):
+        pass
+
+
+def check_item(module, connection):
+    connection.threads.add(threading.current_thread().name)
+    if module.params["value"] < 0:
+        module.fail_json(msg="negative")
+    module.exit_json(changed=True, value=module.params["value"] * 2)
+
+
+@pytest.mark.parametrize("has_thread_pool", [True, False])
+def test_run_items(monkeypatch, has_thread_pool):
+    # Without concurrent.futures (Python 2) the items run one at a time in the calling thread
+    monkeypatch.setattr(utils, "HAS_THREAD_POOL", has_thread_pool)
+    module = FakeModule()
+    connection = RunItemsConnection(module)
+    results = utils.run_items(module, connection, check_item, [{"value": value} for value in [1, -1, 3]], workers=3)
+    assert [result.get("value") for result in results] == [2, None, 6]
+    assert [result["failed"] for result in results] == [False, True, False]
+    assert connection.module is module
+    assert (connection.threads == {threading.current_thread().name}) is not has_thread_pool
+
+
+def bundle_params(**kwargs):
+    params = dict((product_name, None) for product_name in utils.PRODUCT_NAMES)
+    params["fortiGateBundle"] = dict(cpu=2, service="FC", vdom=0, fortiGuardServices=[], cloudServices=["FGTFAMS"],
+                                     supportService=None)
+    params["fortiGateBundle"].update(kwargs)
+    return params
+
+
+def test_product_validator_transform():
+    validator = utils.get_product_validator("fortiGateBundle")
+    assert utils.get_product_validator("fortiGateBundle") is validator
+    parameters, errors = validator.transform(bundle_params()["fortiGateBundle"], check_param=True)
+    assert errors == []
+    # An empty list is sent as NONE, a list as one parameter per element
+    assert parameters == [{"id": 1, "value": 2}, {"id": 2, "value": "FC"}, {"id": 10, "value": 0},
+                          {"id": 43, "value": "NONE"}, {"id": 44, "value": "FGTFAMS"}]
+
+
+def test_product_validator_reports_every_error():
+    configs = bundle_params(cpu=200, service="XX", vdom="many", cloudServices=["FGTFAMS", "OTHER"])["fortiGateBundle"]
+    parameters, errors = utils.get_product_validator("fortiGateBundle").transform(configs, check_param=True)
+    assert errors == [
+        "Invalid value 200 of parameter cpu. Support range: 1 ~ 96 (inclusive)",
+        "Invalid value XX of parameter service. Support values: ['FC', 'UTP', 'ENT', 'ATP']",
+        "Invalid value many of parameter vdom. Support range: 0 ~ 500 (inclusive)",
+        "Invalid value OTHER of parameter cloudServices. Support values: "
+        "['FGTFAMS', 'FGTSWNM', 'FGTSOCA', 'FGTFAZC', 'FGTSWOS', 'FGTFSPA']",
+    ]
+    # Without check_param the values are sent as declared
+    assert utils.get_product_validator("fortiGateBundle").transform(configs)[1] == []
+
+
+def test_transform_parameters():
+    params = bundle_params()
+    params["fortiGateBundle"]["99"] = ["a", "b"]
+    parameters, product_id = utils.transform_parameters(FakeModule(params), check_param=True)
+    assert product_id == utils.PRODUCTS_BY_NAME["fortiGateBundle"]["id"]
+    # Parameters named by their id are sent as declared
+    assert parameters[-2:] == [{"id": 99, "value": "a"}, {"id": 99, "value": "b"}]
+    with pytest.raises(FailJson) as e:
+        utils.transform_parameters(FakeModule(bundle_params(cpu=0, service="XX")), check_param=True)
+    assert "parameter cpu" in e.value.args[0]["msg"] and "parameter service" in e.value.args[0]["msg"]
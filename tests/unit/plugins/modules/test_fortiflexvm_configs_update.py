@@ -0,0 +1,27 @@
+# Copyright: (c) 2023 Fortinet
+# GNU General Public License v3.0+ (see LICENSE or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+from ansible_collections.fortinet.fortiflexvm.plugins.modules.fortiflexvm_configs_update import config_params_differ
+
+
+CURRENT = {"name": "vm", "productType": {"id": 1}, "status": "ACTIVE",
+           "parameters": [{"id": 1, "value": "4"}, {"id": 2, "value": "UTP"}]}
+
+
+def target(**kwargs):
+    config = dict(CURRENT)
+    config.update(kwargs)
+    return config
+
+
+def test_same_config_in_another_order():
+    assert not config_params_differ(CURRENT, target(parameters=[{"id": 2, "value": "UTP"}, {"id": 1, "value": 4}]))
+
+
+def test_changed_config():
+    assert config_params_differ(CURRENT, target(name="other"))
+    assert config_params_differ(CURRENT, target(productType={"id": 2}))
+    assert config_params_differ(CURRENT, target(parameters=[{"id": 1, "value": "8"}, {"id": 2, "value": "UTP"}]))
@@ -0,0 +1,83 @@
+# Copyright: (c) 2023 Fortinet
+# GNU General Public License v3.0+ (see LICENSE or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import os
+import json
+
+import pytest
+
+from ansible_collections.fortinet.fortiflexvm.plugins.modules.fortiflexvm_entitlements_bulk_regenerate_token import (
+    TokenWriter,
+    read_completed,
+    read_serial_numbers,
+    regenerate_token,
+)
+from ansible_collections.fortinet.fortiflexvm.tests.unit.plugins.utils import ExitJson, FailJson, FakeModule
+
+
+class FakeConnection():
+    def __init__(self, response):
+        self.response = response
+
+    def send_request(self, url, data, method="post", check_error=True):
+        return self.response
+
+
+def read_lines(path):
+    with open(path) as f:
+        return f.read().splitlines()
+
+
+def test_read_serial_numbers(tmp_path):
+    path = str(tmp_path / "serial_numbers.txt")
+    with open(path, "w") as f:
+        f.write("# comment\nFGVMMLTM00000002\n\n  FGVMMLTM00000003  \nFGVMMLTM00000001\n")
+    module = FakeModule({"serialNumbers": ["FGVMMLTM00000001"], "serial_numbers_file": path})
+    assert read_serial_numbers(module) == ["FGVMMLTM00000001", "FGVMMLTM00000002", "FGVMMLTM00000003"]
+    module.params["serial_numbers_file"] = str(tmp_path / "missing.txt")
+    with pytest.raises(FailJson):
+        read_serial_numbers(module)
+
+
+def test_resume_after_interruption(tmp_path):
+    path = str(tmp_path / "tokens.jsonl")
+    writer = TokenWriter(path, truncate=True)
+    writer.write("FGVMMLTM00000001", "T1")
+    writer.close()
+    assert os.stat(path).st_mode & 0o777 == 0o600
+    # A line cut by an interruption is ignored, the next token starts on a new line
+    with open(path, "a") as f:
+        f.write('{"serialNumber": "FGVMMLTM000')
+    assert read_completed(path) == set(["FGVMMLTM00000001"])
+    writer = TokenWriter(path)
+    writer.write("FGVMMLTM00000002", "T2")
+    writer.close()
+    assert read_completed(path) == set(["FGVMMLTM00000001", "FGVMMLTM00000002"])
+    assert json.loads(read_lines(path)[-1]) == {"serialNumber": "FGVMMLTM00000002", "token": "T2"}
+
+
+def test_truncate_starts_over(tmp_path):
+    path = str(tmp_path / "tokens.jsonl")
+    with open(path, "w") as f:
+        f.write('{"serialNumber": "FGVMMLTM00000001", "token": "old"}\n')
+    TokenWriter(path, truncate=True).close()
+    assert read_completed(path) == set()
+    assert read_completed(str(tmp_path / "missing.jsonl")) == set()
+
+
+def test_regenerate_token(tmp_path):
+    path = str(tmp_path / "tokens.jsonl")
+    writer = TokenWriter(path, truncate=True)
+    module = FakeModule({"serialNumber": "FGVMMLTM00000001"})
+    with pytest.raises(ExitJson) as e:
+        regenerate_token(module, FakeConnection({"entitlements": [{"token": "T1"}]}), writer)
+    # The token is only written to the file
+    assert e.value.args[0] == {"changed": True}
+    with pytest.raises(FailJson) as e:
+        regenerate_token(module, FakeConnection({"entitlements": []}), writer)
+    assert "didn't return a token" in e.value.args[0]["msg"]
+    writer.close()
+    assert read_lines(path) == ['{"serialNumber": "FGVMMLTM00000001", "token": "T1"}']
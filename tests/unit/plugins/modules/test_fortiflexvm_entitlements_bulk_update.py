@@ -0,0 +1,90 @@
+# Copyright: (c) 2023 Fortinet
+# GNU General Public License v3.0+ (see LICENSE or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import pytest
+
+from ansible_collections.fortinet.fortiflexvm.plugins.modules.fortiflexvm_entitlements_bulk_update import (
+    make_update_item,
+    plan_operations,
+)
+from ansible_collections.fortinet.fortiflexvm.tests.unit.plugins.utils import ExitJson, FailJson, FakeModule
+
+
+class FakeConnection():
+    def __init__(self):
+        self.sent = []
+
+    def send_request(self, url, data, method="post", check_error=True):
+        self.sent.append((url, data))
+        return {"entitlements": [dict(data, status="ACTIVE")]}
+
+
+ENTITLEMENT = {"serialNumber": "FGVMMLTM00000001", "configId": 1, "description": "web", "endDate": "2030-01-01T00:00:00",
+               "status": "ACTIVE"}
+
+
+def params(**kwargs):
+    values = dict(serialNumber="FGVMMLTM00000001", configId=1, description=None, endDate=None, status=None)
+    values.update(kwargs)
+    return values
+
+
+@pytest.mark.parametrize("declared, expected", [
+    (params(), []),
+    (params(status="ACTIVE", description="web"), []),
+    (params(status="STOPPED"), ["stop"]),
+    (params(description="db"), ["update"]),
+    (params(description="db", endDate="2031-01-01T00:00:00"), ["update"]),
+    (params(status="STOPPED", endDate="2031-01-01T00:00:00"), ["stop", "update"]),
+])
+def test_plan_operations(declared, expected):
+    assert plan_operations(declared, ENTITLEMENT) == expected
+
+
+def test_plan_operations_without_current_state():
+    # Without configId the current state is unknown, only the status can be sent
+    assert plan_operations(params(configId=None, status="ACTIVE"), None) == ["reactivate"]
+    assert plan_operations(params(configId=None, status="STOPPED"), None) == ["stop"]
+    assert plan_operations(params(configId=None), None) == []
+
+
+def run_item(item, entitlements, errors=None, check_mode=False):
+    connection = FakeConnection()
+    with pytest.raises((ExitJson, FailJson)) as e:
+        make_update_item(entitlements, errors or {})(FakeModule(item, check_mode), connection)
+    return e.value.args[0], connection.sent
+
+
+def test_update_item_matches_config_and_serial_number():
+    other = dict(ENTITLEMENT, configId=2, description="other")
+    entitlements = {(1, ENTITLEMENT["serialNumber"]): ENTITLEMENT, (2, other["serialNumber"]): other}
+    result, sent = run_item(params(configId=2, description="other"), entitlements)
+    assert result["changed"] is False and result["entitlements"] == [other]
+    assert sent == []
+
+    result, sent = run_item(params(configId=3, description="web"), entitlements)
+    assert "Can't find target entitlement" in result["msg"]
+
+
+def test_update_item_sends_planned_operations():
+    entitlements = {(1, ENTITLEMENT["serialNumber"]): ENTITLEMENT}
+    result, sent = run_item(params(status="STOPPED", description="db"), entitlements)
+    assert result["changed"] is True and result["operations"] == ["stop", "update"]
+    assert [url for url, data in sent] == ["fortiflex/v2/entitlements/stop", "fortiflex/v2/entitlements/update"]
+    assert sent[1][1] == {"serialNumber": ENTITLEMENT["serialNumber"], "configId": 1, "description": "db"}
+
+
+def test_update_item_check_mode():
+    entitlements = {(1, ENTITLEMENT["serialNumber"]): ENTITLEMENT}
+    result, sent = run_item(params(description="db"), entitlements, check_mode=True)
+    assert result["changed"] is True and result["operations"] == ["update"]
+    assert sent == []
+
+
+def test_update_item_fails_when_listing_failed():
+    result, sent = run_item(params(description="db"), {}, errors={1: {"msg": "Request failed", "response": {"message": "no"}}})
+    assert "Failed to list the entitlements of configId 1" in result["msg"]
+    assert result["response"] == {"message": "no"}
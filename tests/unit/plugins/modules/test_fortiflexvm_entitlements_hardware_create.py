@@ -0,0 +1,105 @@
+# Copyright: (c) 2023 Fortinet
+# GNU General Public License v3.0+ (see LICENSE or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import pytest
+
+from ansible_collections.fortinet.fortiflexvm.plugins.module_utils import utils
+from ansible_collections.fortinet.fortiflexvm.plugins.modules.fortiflexvm_entitlements_hardware_create import (
+    create_serial_numbers,
+    rejected_serial_numbers,
+)
+from ansible_collections.fortinet.fortiflexvm.tests.unit.plugins.utils import FakeModule
+
+
+class FakeConnection():
+    # Creates the serial numbers, except that a chunk with an invalid one is rejected as a whole.
+    def __init__(self, invalid=(), name_invalid=True, status_code=400, unreachable=False):
+        self.invalid = set(invalid)
+        self.name_invalid = name_invalid
+        self.status_code = status_code
+        self.unreachable = unreachable
+        self.chunks = []
+
+    def request_status(self, url, data, method="post", idempotent=None):
+        serial_numbers = data["serialNumbers"]
+        self.chunks.append(serial_numbers)
+        if self.unreachable:
+            raise utils.BatchItemExit({"failed": True, "msg": "Connection refused"})
+        invalid = [serial_number for serial_number in serial_numbers if serial_number in self.invalid]
+        if invalid:
+            if self.name_invalid:
+                return self.status_code, {"message": "Invalid serial number: {0}".format(", ".join(invalid))}
+            return self.status_code, {"message": "Invalid serial number"}
+        return 200, {"entitlements": [{"serialNumber": serial_number} for serial_number in serial_numbers]}
+
+
+def params(split_failed_chunks=True):
+    return {"configId": 1, "endDate": None, "split_failed_chunks": split_failed_chunks}
+
+
+SERIAL_NUMBERS = ["FGT60F%010d" % i for i in range(8)]
+
+
+def created(entitlements):
+    return [entitlement["serialNumber"] for entitlement in entitlements]
+
+
+def failed_serial_numbers(failed):
+    return [item["serialNumber"] for item in failed]
+
+
+@pytest.mark.parametrize("status_code, response, expected", [
+    (400, {"message": "Serial number FGT60F0000000001 is invalid"}, ["FGT60F0000000001"]),
+    (400, {"error": "Invalid serial number"}, []),
+    (400, {"message": "Invalid endDate"}, None),
+    (429, {"message": "Serial number FGT60F0000000001 is invalid"}, None),
+    (500, {"message": "Invalid serial number"}, None),
+])
+def test_rejected_serial_numbers(status_code, response, expected):
+    assert rejected_serial_numbers(status_code, response, ["FGT60F0000000001", "FGT60F0000000002"]) == expected
+
+
+def test_chunk_created_in_one_request():
+    connection = FakeConnection()
+    entitlements, failed = create_serial_numbers(FakeModule(params()), connection, SERIAL_NUMBERS)
+    assert created(entitlements) == SERIAL_NUMBERS and failed == []
+    assert len(connection.chunks) == 1
+
+
+def test_named_serial_numbers_are_removed():
+    connection = FakeConnection(invalid=[SERIAL_NUMBERS[2], SERIAL_NUMBERS[5]])
+    entitlements, failed = create_serial_numbers(FakeModule(params()), connection, SERIAL_NUMBERS)
+    assert failed_serial_numbers(failed) == [SERIAL_NUMBERS[2], SERIAL_NUMBERS[5]]
+    assert created(entitlements) == [serial_number for i, serial_number in enumerate(SERIAL_NUMBERS) if i not in (2, 5)]
+    assert len(connection.chunks) == 2
+
+
+def test_unnamed_serial_numbers_are_isolated():
+    connection = FakeConnection(invalid=[SERIAL_NUMBERS[6]], name_invalid=False)
+    entitlements, failed = create_serial_numbers(FakeModule(params()), connection, SERIAL_NUMBERS)
+    assert failed_serial_numbers(failed) == [SERIAL_NUMBERS[6]]
+    assert failed[0]["response"] == {"message": "Invalid serial number"}
+    assert created(entitlements) == [serial_number for i, serial_number in enumerate(SERIAL_NUMBERS) if i != 6]
+    # 8 -> 4 + 4 -> 2 + 2 -> 1 + 1
+    assert len(connection.chunks) == 7
+
+
+@pytest.mark.parametrize("connection", [
+    FakeConnection(invalid=[SERIAL_NUMBERS[0]], status_code=500),
+    FakeConnection(invalid=[SERIAL_NUMBERS[0]], status_code=403),
+    FakeConnection(unreachable=True),
+])
+def test_other_errors_fail_the_chunk(connection):
+    entitlements, failed = create_serial_numbers(FakeModule(params()), connection, SERIAL_NUMBERS)
+    assert entitlements == [] and failed_serial_numbers(failed) == SERIAL_NUMBERS
+    assert len(connection.chunks) == 1
+
+
+def test_split_failed_chunks_disabled():
+    connection = FakeConnection(invalid=[SERIAL_NUMBERS[0]])
+    entitlements, failed = create_serial_numbers(FakeModule(params(split_failed_chunks=False)), connection, SERIAL_NUMBERS)
+    assert entitlements == [] and failed_serial_numbers(failed) == SERIAL_NUMBERS
+    assert len(connection.chunks) == 1
@@ -0,0 +1,63 @@
+# Copyright: (c) 2023 Fortinet
+# GNU General Public License v3.0+ (see LICENSE or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import os
+import json
+
+import pytest
+
+from ansible_collections.fortinet.fortiflexvm.plugins.modules.fortiflexvm_entitlements_list_info import write_entitlements
+from ansible_collections.fortinet.fortiflexvm.tests.unit.plugins.utils import ExitJson, FailJson, FakeModule
+
+
+class FakeConnection():
+    def __init__(self, entitlements, others=None):
+        self.entitlements = entitlements
+        self.others = others or {}
+
+    def iter_response_items(self, url, data, key, method="post", others=None):
+        others.update(self.others)
+        for entitlement in self.entitlements:
+            yield entitlement
+
+
+PARAMS = {"fields": None, "status": None, "tokenStatus": None, "description_prefix": None}
+ENTITLEMENTS = [{"serialNumber": "S1", "token": "T1"}, {"serialNumber": "S2", "token": "T2"}]
+
+
+def write(output_file, entitlements=ENTITLEMENTS, others=None, check_mode=False):
+    with pytest.raises((ExitJson, FailJson)) as e:
+        write_entitlements(FakeModule(dict(PARAMS, output_file=output_file), check_mode), FakeConnection(entitlements, others), {})
+    return e.value.args[0]
+
+
+def test_write_then_unchanged(tmp_path):
+    output_file = str(tmp_path / "entitlements.jsonl")
+    result = write(output_file)
+    assert result["changed"] is True and result["count"] == 2
+    with open(output_file) as f:
+        assert [json.loads(line) for line in f] == ENTITLEMENTS
+    assert os.stat(output_file).st_mode & 0o777 == 0o600
+    assert write(output_file)["changed"] is False
+    assert write(output_file, ENTITLEMENTS[:1])["changed"] is True
+    assert os.listdir(str(tmp_path)) == ["entitlements.jsonl"]
+
+
+def test_check_mode_writes_nothing(tmp_path):
+    output_file = str(tmp_path / "entitlements.jsonl")
+    result = write(output_file, check_mode=True)
+    assert result["changed"] is True and result["count"] == 2
+    assert os.listdir(str(tmp_path)) == []
+
+
+def test_error_keeps_previous_file(tmp_path):
+    output_file = str(tmp_path / "entitlements.jsonl")
+    write(output_file)
+    result = write(output_file, ENTITLEMENTS[:1], others={"error": "Internal error"})
+    assert "was not written" in result["msg"]
+    with open(output_file) as f:
+        assert len(f.readlines()) == 2
+    assert os.listdir(str(tmp_path)) == ["entitlements.jsonl"]
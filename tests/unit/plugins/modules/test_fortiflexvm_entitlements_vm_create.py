@@ -0,0 +1,129 @@
+# Copyright: (c) 2023 Fortinet
+# GNU General Public License v3.0+ (see LICENSE or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import time
+
+import pytest
+import requests
+
+from ansible_collections.fortinet.fortiflexvm.plugins.module_utils.connection import Connection, RetryPolicy
+from ansible_collections.fortinet.fortiflexvm.plugins.modules import fortiflexvm_entitlements_vm_create as vm_create
+from ansible_collections.fortinet.fortiflexvm.tests.unit.plugins.utils import ExitJson, FailJson, FakeModule, FakeSession, make_response
+
+
+@pytest.fixture(autouse=True)
+def environment(monkeypatch):
+    for name in ["FORTIFLEX_RETRY_MAX_ATTEMPTS", "FORTIFLEX_TASK_TIMEOUT", "FORTIFLEX_LOG_PATH"]:
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setenv("FORTIFLEX_TOKEN_CACHE", "false")
+    monkeypatch.setattr(Connection, "login", lambda self, check_error=True: None)
+
+
+@pytest.fixture
+def sessions(monkeypatch):
+    # The Connection of the module answers with the outcomes appended to the returned list.
+    outcomes = []
+
+    def make_connection(module, username, password, **kwargs):
+        connection = Connection(module, username, password, retry_policy=RetryPolicy(max_attempts=2, backoff_factor=0))
+        connection.access_token = "token"
+        connection.expires_at = time.time() + 3600
+        connection.http_session = FakeSession(outcomes)
+        return connection
+
+    monkeypatch.setattr(vm_create, "Connection", make_connection)
+    return outcomes
+
+
+def created(count, start=0):
+    return make_response(200, {"status": 0, "entitlements": [{"serialNumber": "FGVMMLTM{0:08d}".format(start + i)}
+                                                             for i in range(count)]})
+
+
+def run(journal, check_mode=False, resend_uncertain=False):
+    params = dict(username="user", password="password", configId=1, count=5, batch_size=2, workers=1,
+                  journal=journal, resend_uncertain=resend_uncertain, connect_timeout=None, read_timeout=None,
+                  task_timeout=None)
+    module = FakeModule(params, check_mode)
+    with pytest.raises((ExitJson, FailJson)) as e:
+        vm_create.create_in_batches(module, {"configId": 1, "count": 5})
+    return e.value.args[0]
+
+
+def states(result):
+    return [batch["state"] for batch in result["batches"]]
+
+
+def test_journal(tmp_path):
+    path = str(tmp_path / "vm_create.journal")
+    journal = vm_create.Journal(path, {"configId": 1, "count": 5})
+    journal.record(0, "pending")
+    journal.record(1, "created", [{"serialNumber": "S1"}])
+    journal.record(2, "pending")
+    journal.record(2, None)
+    assert vm_create.Journal(path, {"count": 5, "configId": 1}).batches == {
+        "0": {"state": "pending", "entitlements": []},
+        "1": {"state": "created", "entitlements": [{"serialNumber": "S1"}]},
+    }
+    # Another request has its own entry
+    assert vm_create.Journal(path, {"configId": 1, "count": 6}).batches == {}
+    # Without a journal file nothing is recorded
+    journal = vm_create.Journal(None, {"configId": 1})
+    journal.record(0, "pending")
+    assert journal.batches == {}
+
+
+def test_resume_sends_only_missing_batches(tmp_path, sessions):
+    path = str(tmp_path / "vm_create.journal")
+    sessions.extend([created(2), make_response(200, {"status": -1, "error": "Internal error"}), created(1, 4)])
+    result = run(path)
+    assert states(result) == ["created", "failed", "created"]
+    assert result["changed"] is True
+    # The rejected batch is forgotten, the others are not sent again
+    sessions.extend([created(2, 2)])
+    result = run(path)
+    assert states(result) == ["journaled", "created", "journaled"]
+    assert [entitlement["serialNumber"][-1] for entitlement in result["entitlements"]] == ["0", "1", "2", "3", "4"]
+    assert sessions == []
+
+
+def test_check_mode_sends_nothing(tmp_path, sessions):
+    result = run(str(tmp_path / "vm_create.journal"), check_mode=True)
+    assert result["changed"] is True
+    assert [data["count"] for data in result["send_data"]] == [2, 2, 1]
+
+
+def test_request_failure_leaves_batch_uncertain(tmp_path, sessions):
+    path = str(tmp_path / "vm_create.journal")
+    # A read timeout may come after FortiFlex created the batch, it isn't resent
+    sessions.extend([created(2), requests.exceptions.ReadTimeout("timed out"), created(1, 4)])
+    result = run(path)
+    assert states(result) == ["created", "uncertain", "created"]
+    result = run(path)
+    assert states(result) == ["journaled", "uncertain", "journaled"]
+    assert "may have been created" in result["batches"][1]["msg"]
+    sessions.extend([created(2, 2)])
+    assert states(run(path, resend_uncertain=True)) == ["journaled", "created", "journaled"]
+
+
+def test_failure_before_sending_is_not_journaled(tmp_path, sessions, monkeypatch):
+    path = str(tmp_path / "vm_create.journal")
+    # Every attempt timed out while connecting, FortiFlex never received the request
+    sessions.extend([created(2), requests.exceptions.ConnectTimeout("timed out"), requests.exceptions.ConnectTimeout("timed out"),
+                     created(1, 4)])
+    assert states(run(path)) == ["created", "failed", "created"]
+    assert vm_create.Journal(path, {"configId": 1, "count": 5, "batch_size": 2}).batches.keys() == set(["0", "2"])
+
+    # A login that fails never sends the batch
+    def refresh_access_token(self, check_error=True):
+        self.module.fail_json(msg="Failed to log in")
+
+    monkeypatch.setattr(Connection, "refresh_access_token", refresh_access_token)
+    monkeypatch.setattr(Connection, "token_expiring", lambda self: True)
+    result = run(path)
+    assert states(result) == ["journaled", "failed", "journaled"]
+    assert result["batches"][1]["msg"] == "Failed to log in"
+    assert "1" not in vm_create.Journal(path, {"configId": 1, "count": 5, "batch_size": 2}).batches
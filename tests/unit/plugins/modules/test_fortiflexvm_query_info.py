@@ -0,0 +1,101 @@
+# Copyright: (c) 2023 Fortinet
+# GNU General Public License v3.0+ (see LICENSE or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import json
+import time
+
+import pytest
+
+from ansible.module_utils import basic
+from ansible.module_utils.common.text.converters import to_bytes
+from ansible_collections.fortinet.fortiflexvm.plugins.module_utils.mirror import MirrorStore
+from ansible_collections.fortinet.fortiflexvm.plugins.modules import fortiflexvm_query_info as query_info
+from ansible_collections.fortinet.fortiflexvm.tests.unit.plugins.utils import ExitJson, FailJson, FakeModule
+
+
+CONFIGS = [
+    {"id": 1, "name": "fgt", "status": "ACTIVE", "programSerialNumber": "P1", "accountId": 7,
+     "fortiGateBundle": {"cpu": 4, "service": "UTP"}},
+    {"id": 2, "name": "fwb", "status": "ACTIVE", "programSerialNumber": "P1", "accountId": 7,
+     "fortiWeb": {"cpu": 2, "service": "FWBSTD"}},
+]
+ENTITLEMENTS = [
+    {"serialNumber": "S001", "configId": 1, "description": "web-1", "status": "ACTIVE", "tokenStatus": "USED"},
+    {"serialNumber": "S002", "configId": 1, "description": "web-2", "status": "STOPPED", "tokenStatus": "NOTUSED"},
+    {"serialNumber": "S003", "configId": 2, "description": "db-1", "status": "ACTIVE", "tokenStatus": "NOTUSED"},
+]
+
+
+def params(**kwargs):
+    values = dict((option, None) for option, column in query_info.FILTERS)
+    values.update(query="entitlements", description_pattern=None, productTypes=None, parameters=None)
+    values.update(kwargs)
+    return values
+
+
+@pytest.fixture
+def database(tmp_path):
+    store = MirrorStore(str(tmp_path / "mirror.db"))
+    scope = {"programSerialNumber": "P1"}
+    store.sync_table("configs", CONFIGS, scope)
+    store.sync_table("entitlements", [dict(entitlement, programSerialNumber="P1") for entitlement in ENTITLEMENTS], scope)
+    store.set_synced("P1")
+    store.db.commit()
+    store.close()
+    return store.path
+
+
+def run(monkeypatch, **args):
+    # Run the module with the given arguments, its result is returned instead of printed.
+    monkeypatch.setattr(basic, "_ANSIBLE_ARGS", to_bytes(json.dumps({"ANSIBLE_MODULE_ARGS": args})))
+    monkeypatch.setattr(basic.AnsibleModule, "exit_json", lambda module, **kwargs: FakeModule().exit_json(**kwargs))
+    monkeypatch.setattr(basic.AnsibleModule, "fail_json", lambda module, **kwargs: FakeModule().fail_json(**kwargs))
+    with pytest.raises((ExitJson, FailJson)) as e:
+        query_info.main()
+    return e.value.args[0]
+
+
+def test_build_filters():
+    assert query_info.build_filters(FakeModule(params(serialNumbers=["S001"], status=["ACTIVE"]))) == \
+        {"serialNumber": ["S001"], "status": ["ACTIVE"]}
+    # configs are keyed by id
+    assert query_info.build_filters(FakeModule(params(query="configs", configIds=[1]))) == {"id": [1]}
+
+
+@pytest.mark.parametrize("args", [
+    params(query="programs", tokenStatus=["USED"]),
+    params(query="configs", description_pattern="web-*"),
+    params(query="programs", productTypes=["fortiGateBundle"]),
+])
+def test_build_filters_rejects_unsupported_options(args):
+    with pytest.raises(FailJson):
+        query_info.build_filters(FakeModule(args))
+
+
+def test_group_value():
+    assert query_info.group_value("configs", CONFIGS[1], "productType") == "fortiWeb"
+    assert query_info.group_value("entitlements", ENTITLEMENTS[0], "status") == "ACTIVE"
+
+
+def test_query_entitlements(monkeypatch, database):
+    result = run(monkeypatch, database=database, status=["ACTIVE"], group_by="configId", fields=["serialNumber"])
+    assert result["changed"] is False and result["count"] == 2
+    assert result["entitlements"] == [{"serialNumber": "S001"}, {"serialNumber": "S003"}]
+    assert result["groups"] == {"1": ["S001"], "2": ["S003"]}
+    result = run(monkeypatch, database=database, description_pattern="web-*", productTypes=["fortiGateBundle"])
+    assert [record["serialNumber"] for record in result["entitlements"]] == ["S001", "S002"]
+
+
+def test_query_configs_by_product_type(monkeypatch, database):
+    result = run(monkeypatch, database=database, query="configs", group_by="productType")
+    assert result["groups"] == {"fortiGateBundle": [1], "fortiWeb": [2]}
+
+
+def test_query_fails_on_stale_mirror(monkeypatch, database):
+    assert run(monkeypatch, database=database, max_age=3600)["count"] == 3
+    monkeypatch.setattr(time, "time", lambda: 4102444800.0)
+    result = run(monkeypatch, database=database, max_age=3600)
+    assert "run fortiflexvm_sync first" in result["msg"]
@@ -0,0 +1,54 @@
+# Copyright: (c) 2023 Fortinet
+# GNU General Public License v3.0+ (see LICENSE or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import pytest
+
+from ansible_collections.fortinet.fortiflexvm.plugins.modules.fortiflexvm_sync import fetch_program
+from ansible_collections.fortinet.fortiflexvm.tests.unit.plugins.utils import ExitJson, FailJson, FakeModule
+
+
+class FakeConnection():
+    # Answers every listing with the given items, and the given other members of the response.
+    def __init__(self, listings):
+        self.listings = listings
+
+    def iter_response_items(self, url, data, key, method="post", others=None):
+        items, response = self.listings[key]
+        others.update(response)
+        for item in items:
+            yield item
+
+
+PROGRAM = {"serialNumber": "ELAVMS0000000001", "accountId": 12345}
+
+
+def fetch(listings, entitlements=True):
+    with pytest.raises((ExitJson, FailJson)) as e:
+        fetch_program(FakeModule({"program": PROGRAM, "entitlements": entitlements}), FakeConnection(listings))
+    return e.type, e.value.args[0]
+
+
+def test_fetch_program():
+    kind, result = fetch({"configs": ([{"id": 1, "productType": {"id": 1}, "parameters": []}], {"status": 0}),
+                          "entitlements": ([{"serialNumber": "FGVMMLTM00000001"}], {"status": 0})})
+    assert kind is ExitJson
+    assert result["configs"][0]["programSerialNumber"] == PROGRAM["serialNumber"]
+    assert result["entitlements"] == [{"serialNumber": "FGVMMLTM00000001", "programSerialNumber": PROGRAM["serialNumber"]}]
+    kind, result = fetch({"configs": ([], {})}, entitlements=False)
+    assert kind is ExitJson and result["entitlements"] is None
+
+
+@pytest.mark.parametrize("failed_key, response", [
+    ("configs", {"status": -1, "message": "Internal error"}),
+    ("entitlements", {"status": 0, "error": "Internal error"}),
+])
+def test_fetch_program_fails_on_error_response(failed_key, response):
+    # An error with status 200 comes with an incomplete listing, the program must fail instead of syncing it
+    listings = {"configs": ([], {"status": 0}), "entitlements": ([], {"status": 0})}
+    listings[failed_key] = ([], response)
+    kind, result = fetch(listings)
+    assert kind is FailJson
+    assert "Internal error" in result["msg"]
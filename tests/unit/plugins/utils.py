@@ -0,0 +1,60 @@
+# Copyright: (c) 2023 Fortinet
+# GNU General Public License v3.0+ (see LICENSE or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import json
+
+import requests
+
+
+class ExitJson(Exception):
+    pass
+
+
+class FailJson(Exception):
+    pass
+
+
+class FakeModule():
+    # Stands in for AnsibleModule: exit_json() and fail_json() raise with the result, warnings are collected.
+    def __init__(self, params=None, check_mode=False):
+        self.params = params or {}
+        self.check_mode = check_mode
+        self.warnings = []
+
+    def exit_json(self, **kwargs):
+        raise ExitJson(kwargs)
+
+    def fail_json(self, **kwargs):
+        raise FailJson(kwargs)
+
+    def warn(self, warning):
+        self.warnings.append(warning)
+
+
+def make_response(status_code, data=None, headers=None):
+    response = requests.models.Response()
+    response.status_code = status_code
+    response._content = json.dumps(data if data is not None else {}).encode("utf-8")
+    response.headers.update(headers or {})
+    return response
+
+
+class FakeSession():
+    # Stands in for the requests session of a Connection. Answers the requests with the given responses,
+    # or raises the given exceptions, in order. They are taken from the given list, later ones can be appended to it.
+    def __init__(self, outcomes):
+        self.outcomes = outcomes
+        self.calls = []
+
+    def post(self, url, json=None, headers=None, timeout=None):
+        self.calls.append(dict(url=url, data=json, timeout=timeout))
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    def close(self):
+        pass
@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+
+# Copyright: (c) 2023 Fortinet
+# GNU General Public License v3.0+ (see LICENSE or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# Generate plugins/module_utils/argument_specs.py from PRODUCTS in plugins/module_utils/settings.py.
+# Run it again whenever PRODUCTS changes:
+#     python tools/generate_argument_specs.py
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import os
+import runpy
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SETTINGS_PATH = os.path.join(ROOT, "plugins", "module_utils", "settings.py")
+OUTPUT_PATH = os.path.join(ROOT, "plugins", "module_utils", "argument_specs.py")
+
+HEADER = '''# Copyright: (c) 2023 Fortinet
+# GNU General Public License v3.0+ (see LICENSE or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This file is generated by tools/generate_argument_specs.py from PRODUCTS in settings.py. Do not edit it.
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+'''
+
+
+def param_spec(param, for_calc):
+    spec = [("type", param["type"]), ("required", param["required"])]
+    if for_calc and param["id"] == 47:  # fortiEDR -> endpoints
+        spec[1] = ("required", True)
+    if "default" in param:
+        spec.append(("default", param["default"]))
+    if "elements" in param:
+        spec.append(("elements", param["elements"]))
+    return "dict({0})".format(", ".join("{0}={1!r}".format(key, value) for key, value in spec))
+
+
+def product_specs(products, for_calc):
+    lines = []
+    for product in products:
+        lines.append("    {0!r}: {{\"type\": \"dict\", \"required\": False, \"options\": {{".format(product["name"]))
+        for param in product["parameters"]:
+            if param.get("readonly", False) and not for_calc:
+                continue
+            lines.append("        {0!r}: {1},".format(param["name"], param_spec(param, for_calc)))
+        lines.append("    }},")
+    return "\n".join(lines)
+
+
+def main():
+    products = runpy.run_path(SETTINGS_PATH)["PRODUCTS"]
+    content = [HEADER]
+    content.append("# Product options of fortiflexvm_configs_create and fortiflexvm_configs_update. Read only parameters are excluded.")
+    content.append("CONFIG_PRODUCT_SPECS = {")
+    content.append(product_specs(products, for_calc=False))
+    content.append("}\n")
+    content.append("# Product options of fortiflexvm_tools_calc_info.")
+    content.append("CALC_PRODUCT_SPECS = {")
+    content.append(product_specs(products, for_calc=True))
+    content.append("}\n")
+    content.append("# Product options when bypass_validation is true, the product parameters are not validated.")
+    content.append("BYPASS_PRODUCT_SPECS = {")
+    for product in products:
+        content.append("    {0!r}: {{\"type\": \"dict\", \"required\": False}},".format(product["name"]))
+    content.append("}")
+    with open(OUTPUT_PATH, "w") as f:
+        f.write("\n".join(content).replace("'", '"') + "\n")
+
+
+if __name__ == "__main__":
+    main()